@@ -0,0 +1,54 @@
+from core import io_pool
+
+import os
+import tarfile
+from typing import AsyncIterator, Iterable, Tuple
+
+# Блок, которым файлы читаются с диска при отдаче архива
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+_BLOCK = tarfile.BLOCKSIZE
+
+
+def _open(path: str):
+    f = open(path, 'rb')
+    return f, os.fstat(f.fileno())
+
+
+async def tar_stream(entries: Iterable[Tuple[str, str]]) -> AsyncIterator[bytes]:
+    """
+    Потоковая отдача файлов одним несжатым tar-архивом (ustar)
+
+    Архив не собирается в памяти: заголовок каждого файла, его содержимое блоками по
+    ARCHIVE_CHUNK_SIZE и выравнивание до 512 байт отдаются по мере чтения. Файл, который
+    не удалось открыть (например, удалён после формирования списка), пропускается.
+
+    Args:
+        entries: пары (имя в архиве, путь к файлу)
+    """
+    for name, path in entries:
+        try:
+            f, stat = await io_pool.run(_open, path)
+        except OSError:
+            continue
+        try:
+            info = tarfile.TarInfo(name)
+            info.size = stat.st_size
+            info.mtime = int(stat.st_mtime)
+            yield info.tobuf(format=tarfile.USTAR_FORMAT)
+
+            remaining = stat.st_size
+            while remaining > 0:
+                chunk = await io_pool.run(f.read, min(ARCHIVE_CHUNK_SIZE, remaining))
+                if not chunk:
+                    # Файл укоротился во время чтения - дополняем нулями до заявленного размера
+                    chunk = b'\0' * remaining
+                remaining -= len(chunk)
+                yield chunk
+            padding = -stat.st_size % _BLOCK
+            if padding:
+                yield b'\0' * padding
+        finally:
+            await io_pool.run(f.close)
+    # Конец архива - два пустых блока
+    yield b'\0' * (2 * _BLOCK)
@@ -0,0 +1,36 @@
+from fastapi import HTTPException, Request, Response, status
+
+from user_models import sessions
+
+from typing import Optional
+
+
+def session_token(request: Request) -> Optional[str]:
+    """Токен сессии из cookie или заголовка "Authorization: Bearer <токен>" """
+    authorization = request.headers.get('authorization', '')
+    scheme, _, token = authorization.partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        return token.strip()
+    return request.cookies.get(sessions.SESSION_COOKIE)
+
+
+async def require_session(request: Request) -> sessions.SessionInfo:
+    """Зависимость: пользователь текущей сессии (без запросов к БД)"""
+    session = sessions.resolve(session_token(request))
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Не авторизован")
+    return session
+
+
+def set_session_cookie(response: Response, token: str) -> None:
+    """Cookie сессии для браузера (недоступна скриптам страницы)"""
+    response.set_cookie(
+        sessions.SESSION_COOKIE, token,
+        max_age=int(sessions.SESSION_TTL), path='/', httponly=True, samesite='lax',
+        secure=sessions.SESSION_COOKIE_SECURE
+    )
+
+
+def clear_session_cookie(response: Response) -> None:
+    """Удаление cookie сессии при выходе"""
+    response.delete_cookie(sessions.SESSION_COOKIE, path='/')
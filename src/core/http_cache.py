@@ -0,0 +1,119 @@
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from core import io_pool
+
+import os
+import re
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# URL с хэшем содержимого никогда не меняет ответ - браузер хранит его без перепроверки
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Ответ по URL кадра может смениться при загрузке нового изображения - браузер перепроверяет
+# его по ETag и получает 304 без тела, если изображение то же
+REVALIDATE = "no-cache"
+
+# Файлы хранилища и их копии: <sha256><ext> и <sha256>.<размер>.webp
+_CONTENT_NAME = re.compile(r'^([0-9a-f]{64}(?:\.[a-z]+)?)\.[A-Za-z0-9]+$')
+
+_MEDIA_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+}
+_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+]
+
+
+def is_content_digest(value: str) -> bool:
+    """Является ли строка хэшем SHA-256 в hex (адрес изображения в хранилище)"""
+    return re.fullmatch(r'[0-9a-f]{64}', value) is not None
+
+
+def content_etag(path: str) -> Optional[str]:
+    """ETag из хэша содержимого в имени файла хранилища (без чтения файла) или None"""
+    match = _CONTENT_NAME.match(os.path.basename(path))
+    return f'"{match.group(1)}"' if match else None
+
+
+def _sniff(path: str) -> Optional[str]:
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    for signature, media_type in _SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    return None
+
+
+def media_type_for(path: str) -> str:
+    """Content-Type изображения по расширению, а для неизвестных расширений - по первым байтам файла"""
+    media_type = _MEDIA_TYPES.get(os.path.splitext(path)[1].lower())
+    if media_type is None:
+        media_type = _sniff(path) or 'application/octet-stream'
+    return media_type
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+    # Сравнение слабое (RFC 9110): W/ у тегов клиента не учитывается
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return any((tag[2:] if tag.startswith('W/') else tag) == etag for tag in candidates)
+
+
+def _not_modified_since(if_modified_since: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and int(mtime) <= since.timestamp()
+
+
+def file_etag(path: str, stat: os.stat_result) -> str:
+    """ETag файла: хэш содержимого для файлов хранилища, иначе время изменения и размер"""
+    return content_etag(path) or f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def is_not_modified(request: Request, etag: str, mtime: Optional[float] = None) -> bool:
+    """Совпадает ли версия у клиента: If-None-Match или, без него, If-Modified-Since (если известен mtime)"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get('if-modified-since')
+    return mtime is not None and if_modified_since is not None and _not_modified_since(if_modified_since, mtime)
+
+
+async def cached_file_response(request: Request, path: str, media_type: Optional[str] = None,
+                               immutable: bool = False, stat: Optional[os.stat_result] = None) -> Response:
+    """
+    Ответ с файлом изображения и валидаторами кэша
+
+    ETag - хэш содержимого для файлов хранилища, иначе время изменения и размер файла.
+    If-None-Match (или, без него, If-Modified-Since) с совпадающим значением даёт 304 без тела.
+
+    Args:
+        request: запрос клиента
+        path: путь к файлу
+        media_type: Content-Type, если известен заранее (иначе определяется по файлу)
+        immutable: URL адресует содержимое, ответ можно кэшировать без перепроверки
+        stat: результат os.stat файла, если уже известен (иначе файл проверяется в пуле файловых операций)
+    """
+    if stat is None:
+        stat = await io_pool.run(os.stat, path)
+    etag = file_etag(path, stat)
+    headers = {'ETag': etag, 'Cache-Control': IMMUTABLE if immutable else REVALIDATE}
+    if is_not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    if media_type is None:
+        media_type = await io_pool.run(media_type_for, path)
+    return FileResponse(path=path, media_type=media_type, headers=headers, stat_result=stat)
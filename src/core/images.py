@@ -0,0 +1,139 @@
+try:
+    from PIL import Image
+except ImportError:  # Pillow не установлен - клиентам отдаются только оригиналы
+    Image = None
+
+from core import io_pool
+from database import blob_store
+
+import asyncio
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+# Уменьшенные копии изображений кадров: размер по большей стороне в пикселях.
+# Копия лежит рядом с исходным файлом как <имя>.<размер>.webp; для файлов хранилища
+# (адресация по содержимому) она общая для всех кадров с тем же изображением и не устаревает.
+ORIGINAL = 'original'
+IMAGE_SIZES: Dict[str, int] = {
+    'thumb': int(os.getenv("IMAGE_THUMB_SIZE", "240")),
+    'preview': int(os.getenv("IMAGE_PREVIEW_SIZE", "960")),
+}
+# Потоки фонового пула, в котором строятся копии
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+VARIANT_MEDIA_TYPE = 'image/webp'
+VARIANT_QUALITY = 80
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+# Построение копий, которое уже идёт, по пути исходного файла
+_in_flight: Dict[str, Future] = {}
+
+
+def is_available() -> bool:
+    """Можно ли строить уменьшенные копии (установлен ли Pillow)"""
+    return Image is not None
+
+
+def variant_path(pic_path: str, size: str) -> str:
+    """Путь к копии изображения pic_path размера size"""
+    return f"{os.path.splitext(pic_path)[0]}.{size}.webp"
+
+
+def _save_variant(image, path: str):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".variant-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            image.save(out, format='WEBP', quality=VARIANT_QUALITY)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_variants(pic_path: str) -> None:
+    """Построение всех уменьшенных копий изображения (исходный файл читается один раз)"""
+    with Image.open(pic_path) as source:
+        source.load()
+        mode = 'RGBA' if source.mode in ('RGBA', 'LA', 'P') else 'RGB'
+        image = source.convert(mode)
+    # От большей копии к меньшей: каждая следующая уменьшается из предыдущей
+    for size, pixels in sorted(IMAGE_SIZES.items(), key=lambda item: -item[1]):
+        image.thumbnail((pixels, pixels))
+        _save_variant(image, variant_path(pic_path, size))
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image-variants")
+        return _executor
+
+
+def _run(pic_path: str):
+    try:
+        build_variants(pic_path)
+    except Exception as e:
+        print(f"Error building image variants for {pic_path}: {e}")
+    finally:
+        with _lock:
+            _in_flight.pop(pic_path, None)
+
+
+def submit_variants(pic_path: str) -> Optional[Future]:
+    """
+    Постановка построения копий изображения в фоновый пул
+
+    Args:
+        pic_path: путь к исходному файлу изображения
+
+    Returns:
+        future: задача построения (уже идущая, если её поставил другой запрос) или None без Pillow
+    """
+    if not is_available() or not pic_path:
+        return None
+    executor = _get_executor()
+    with _lock:
+        future = _in_flight.get(pic_path)
+        if future is None:
+            future = executor.submit(_run, pic_path)
+            _in_flight[pic_path] = future
+        return future
+
+
+async def resolve(pic_path: str, size: str) -> Tuple[str, Optional[str]]:
+    """
+    Файл для отдачи клиенту в размере size
+
+    Копия, которой ещё нет на диске (например, для изображений, загруженных до появления копий),
+    строится в фоновом пуле, и запрос ждёт её. Без Pillow или при ошибке отдаётся оригинал.
+
+    Returns:
+        (путь к файлу, media type копии или None для оригинала)
+    """
+    if size == ORIGINAL or size not in IMAGE_SIZES or not is_available():
+        return pic_path, None
+    path = variant_path(pic_path, size)
+    if not await io_pool.run(os.path.exists, path):
+        future = submit_variants(pic_path)
+        if future is not None:
+            await asyncio.wrap_future(future)
+        if not await io_pool.run(os.path.exists, path):
+            return pic_path, None
+    return path, VARIANT_MEDIA_TYPE
+
+
+def remove_variants(pic_path: str) -> None:
+    """Удаление копий вместе с исходным файлом"""
+    for size in IMAGE_SIZES:
+        path = variant_path(pic_path, size)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+blob_store.removal_hooks.append(remove_variants)
@@ -1,9 +1,13 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
+from core import io_pool
+from database import orphan_gc
 from routes import admin_router, frame_router, graphic_editor_router, page_router, project_router, user_router, auth_router
 
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # запуск сервера
@@ -19,7 +23,30 @@ from pathlib import Path
 # uv venv --python 3.11
 # uv sync
 
-app = FastAPI()
+
+async def _collect_orphans_periodically():
+    """Периодический проход сборщика неиспользуемых файлов загрузок"""
+    while True:
+        await asyncio.sleep(orphan_gc.ORPHAN_GC_INTERVAL)
+        try:
+            result = await io_pool.run(orphan_gc.collect_now)
+            if result['orphans']:
+                print(f"Orphan files queued for removal: {result}")
+        except Exception as e:
+            print(f"Error collecting orphan files: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = None
+    if orphan_gc.ORPHAN_GC_INTERVAL > 0:
+        task = asyncio.create_task(_collect_orphans_periodically())
+    yield
+    if task is not None:
+        task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Получаем путь к текущему файлу
 current_dir = Path(__file__).parent.parent
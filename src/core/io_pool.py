@@ -0,0 +1,148 @@
+from database import blob_store
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import os
+
+# Отдельный пул потоков для блокирующих файловых операций (чтение и запись загрузок, stat,
+# удаление файлов). Число потоков ограничено, а запросы, которым не хватило места в очереди,
+# ждут его в цикле событий, не занимая потоков. Общий пул starlette (run_in_threadpool)
+# остаётся синхронному коду моделей и не забивается файловыми операциями.
+IO_WORKERS = int(os.getenv("IO_WORKERS", "8"))
+# Операций из запросов в пуле одновременно (выполняются и ждут потока)
+IO_QUEUE_LIMIT = int(os.getenv("IO_QUEUE_LIMIT", "256"))
+
+
+class IOMetrics:
+    """Глубина очереди пула файловых операций, время ожидания потока и время выполнения"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.submitted = 0
+            self.completed = 0
+            self.failed = 0
+            self.queued = 0
+            self.active = 0
+            self.queued_max = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+            self.run_time_total = 0.0
+            self.run_time_max = 0.0
+
+    def record_submit(self):
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+            if self.queued > self.queued_max:
+                self.queued_max = self.queued
+
+    def record_start(self, waited: float):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.wait_time_total += waited
+            if waited > self.wait_time_max:
+                self.wait_time_max = waited
+
+    def record_finish(self, seconds: float, failed: bool):
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+            if failed:
+                self.failed += 1
+            self.run_time_total += seconds
+            if seconds > self.run_time_max:
+                self.run_time_max = seconds
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': IO_WORKERS,
+                'queue_limit': IO_QUEUE_LIMIT,
+                'queued': self.queued,
+                'queued_max': self.queued_max,
+                'active': self.active,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'wait_time_avg_ms': round(self.wait_time_total * 1000 / self.completed, 3) if self.completed else 0.0,
+                'wait_time_max_ms': round(self.wait_time_max * 1000, 3),
+                'run_time_avg_ms': round(self.run_time_total * 1000 / self.completed, 3) if self.completed else 0.0,
+                'run_time_max_ms': round(self.run_time_max * 1000, 3),
+            }
+
+
+metrics = IOMetrics()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+# Места в очереди для операций из запросов (семафор своего цикла событий)
+_slots: Optional[asyncio.Semaphore] = None
+_slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="file-io")
+        return _executor
+
+
+def _get_slots() -> asyncio.Semaphore:
+    global _slots, _slots_loop
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots_loop is not loop:
+        _slots = asyncio.Semaphore(IO_QUEUE_LIMIT)
+        _slots_loop = loop
+    return _slots
+
+
+def _measured(fn: Callable, args, kwargs, submitted: float):
+    metrics.record_start(time.perf_counter() - submitted)
+    started = time.perf_counter()
+    failed = True
+    try:
+        result = fn(*args, **kwargs)
+        failed = False
+        return result
+    finally:
+        metrics.record_finish(time.perf_counter() - started, failed)
+
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """
+    Запуск файловой операции в пуле без ожидания результата
+
+    Для синхронного кода (например, удаление файлов после фиксации транзакции): очередь
+    не ограничивается, чтобы не блокировать вызывающий поток.
+    """
+    metrics.record_submit()
+    return _get_executor().submit(_measured, fn, args, kwargs, time.perf_counter())
+
+
+async def run(fn: Callable, *args, **kwargs) -> Any:
+    """Выполнение файловой операции в пуле из асинхронного кода (ждёт места в очереди и результата)"""
+    async with _get_slots():
+        return await asyncio.wrap_future(submit(fn, *args, **kwargs))
+
+
+def get_metrics() -> Dict:
+    """Состояние пула файловых операций текущего процесса"""
+    return metrics.snapshot()
+
+
+def _run_blob_task(task: Callable[[], None]) -> None:
+    submit(task)
+
+
+# Файлы хранилища изображений удаляются в этом пуле, а не в потоке цикла событий
+blob_store.run_file_task = _run_blob_task
@@ -0,0 +1,264 @@
+from fastapi import HTTPException, Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from database import blob_store, media
+from core import io_pool
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import Dict, List, NamedTuple, Optional
+
+# Каталог загруженных изображений (не зависит от рабочего каталога сервера)
+UPLOAD_DIR = media.absolute_path(media.UPLOAD_DIR)
+# Максимальный размер загружаемого изображения
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+# Размер блока, которым файл пишется на диск (блоки из тела запроса объединяются до этого размера)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+# Запас на заголовки частей и обычные поля формы сверх размера файла
+FORM_OVERHEAD = 64 * 1024
+# Допустимые типы изображений кадров
+IMAGE_TYPES = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']
+
+
+class UploadTooLargeError(Exception):
+    """Размер загружаемого файла превысил лимит"""
+
+
+class InvalidUploadError(Exception):
+    """Тело запроса - не multipart/form-data с файлом нужного типа"""
+
+
+class ReceivedUpload(NamedTuple):
+    """Загруженный файл, целиком записанный во временный файл"""
+    tmp_path: str
+    size: int
+    sha256: str
+
+
+class ReceivedForm(NamedTuple):
+    """Форма с одним файлом: файл во временном файле, его имя и тип, остальные поля формы"""
+    file: ReceivedUpload
+    filename: str
+    content_type: str
+    fields: Dict[str, str]
+
+
+def _write_chunk(out, digest, chunk: bytes):
+    out.write(chunk)
+    digest.update(chunk)
+
+
+def _discard(out, tmp_path: str):
+    out.close()
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+
+class _FormReceiver:
+    """Разбор частей multipart/form-data: данные файла копятся до записи, поля формы - в памяти"""
+
+    def __init__(self, file_field: str, max_size: int, allowed_types: Optional[List[str]]):
+        self.file_field = file_field
+        self.max_size = max_size
+        self.allowed_types = allowed_types
+        self.fields: Dict[str, str] = {}
+        self.filename = ''
+        self.content_type = ''
+        self.file_seen = False
+        self.file_size = 0
+        self.fields_size = 0
+        self.pending: List[bytes] = []
+        self.pending_size = 0
+        self.error: Optional[Exception] = None
+        self.complete = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b''
+        self._header_value = b''
+        self._name: Optional[str] = None
+        self._is_file = False
+        self._value: List[bytes] = []
+
+    def callbacks(self) -> Dict:
+        return {
+            'on_part_begin': self._part_begin,
+            'on_header_field': self._header_field_data,
+            'on_header_value': self._header_value_data,
+            'on_header_end': self._header_end,
+            'on_headers_finished': self._headers_finished,
+            'on_part_data': self._part_data,
+            'on_part_end': self._part_end,
+            'on_end': self._end,
+        }
+
+    def _part_begin(self):
+        self._headers = {}
+        self._name = None
+        self._is_file = False
+        self._value = []
+
+    def _header_field_data(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _header_value_data(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def _headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b'content-disposition'))
+        self._name = options.get(b'name', b'').decode('utf-8', 'replace')
+        if self._name != self.file_field:
+            return
+        if self.file_seen:
+            self.error = InvalidUploadError("Больше одного файла в форме")
+            return
+        self._is_file = True
+        self.file_seen = True
+        self.filename = options.get(b'filename', b'').decode('utf-8', 'replace')
+        self.content_type = self._headers.get(b'content-type', b'').decode('latin-1').strip().lower()
+        # Тип проверяется до записи первого байта
+        if self.allowed_types is not None and self.content_type not in self.allowed_types:
+            self.error = InvalidUploadError("Неподдерживаемый формат изображения")
+
+    def _part_data(self, data: bytes, start: int, end: int):
+        if self.error is not None:
+            return
+        chunk = data[start:end]
+        if self._is_file:
+            self.file_size += len(chunk)
+            if self.file_size > self.max_size:
+                self.error = UploadTooLargeError(f"Размер файла превышает {self.max_size} байт")
+                return
+            self.pending.append(chunk)
+            self.pending_size += len(chunk)
+        else:
+            self.fields_size += len(chunk)
+            if self.fields_size > FORM_OVERHEAD:
+                self.error = UploadTooLargeError("Слишком большие поля формы")
+                return
+            self._value.append(chunk)
+
+    def _part_end(self):
+        if not self._is_file and self._name:
+            self.fields[self._name] = b''.join(self._value).decode('utf-8', 'replace')
+
+    def _end(self):
+        self.complete = True
+
+    def take_pending(self) -> bytes:
+        chunk = b''.join(self.pending)
+        self.pending = []
+        self.pending_size = 0
+        return chunk
+
+
+async def receive_form(request: Request, file_field: str, directory: str = UPLOAD_DIR,
+                       max_size: int = MAX_UPLOAD_SIZE,
+                       allowed_types: Optional[List[str]] = None) -> ReceivedForm:
+    """
+    Потоковый приём формы multipart/form-data с одним файлом прямо из тела запроса
+
+    Тело читается через request.stream() и разбирается по мере поступления, без промежуточной
+    копии starlette (UploadFile). Данные файла пишутся во временный файл в каталоге directory
+    блоками по UPLOAD_CHUNK_SIZE и хэшируются в пуле файловых операций (core.io_pool), поэтому
+    каждый байт попадает на диск один раз. Приём прерывается, как только файл превысил max_size
+    или пришёл файл недопустимого типа. Вызывающий затем передаёт временный файл в хранилище
+    или удаляет его (remove_upload).
+
+    Args:
+        request: запрос с телом multipart/form-data
+        file_field: имя поля формы с файлом
+        directory: каталог для временного файла
+        max_size: максимальный размер файла в байтах
+        allowed_types: допустимые Content-Type файла (None - любые)
+
+    Returns:
+        form: временный файл с размером и SHA-256, имя и тип файла, остальные поля формы
+
+    Raises:
+        UploadTooLargeError: файл или тело запроса больше лимита (временный файл удаляется)
+        InvalidUploadError: тело не разбирается, файла нет или его тип недопустим
+    """
+    content_type, options = parse_options_header(request.headers.get('content-type'))
+    boundary = options.get(b'boundary')
+    if content_type != b'multipart/form-data' or not boundary:
+        raise InvalidUploadError("Ожидается multipart/form-data")
+    body_limit = max_size + FORM_OVERHEAD
+    declared = request.headers.get('content-length')
+    if declared and declared.isdigit() and int(declared) > body_limit:
+        # Заведомо слишком большое тело отклоняется до чтения
+        raise UploadTooLargeError(f"Размер файла превышает {max_size} байт")
+
+    receiver = _FormReceiver(file_field, max_size, allowed_types)
+    parser = MultipartParser(boundary, receiver.callbacks())
+    received = 0
+
+    await io_pool.run(os.makedirs, directory, exist_ok=True)
+    fd, tmp_path = await io_pool.run(tempfile.mkstemp, dir=directory, prefix=".upload-", suffix=".part")
+    out = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > body_limit:
+                raise UploadTooLargeError(f"Размер файла превышает {max_size} байт")
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise InvalidUploadError(f"Некорректное тело запроса: {e}")
+            if receiver.error is not None:
+                raise receiver.error
+            if receiver.pending_size >= UPLOAD_CHUNK_SIZE:
+                await io_pool.run(_write_chunk, out, digest, receiver.take_pending())
+        if not receiver.complete:
+            raise InvalidUploadError("Тело запроса оборвалось")
+        if not receiver.file_seen:
+            raise InvalidUploadError(f"Нет файла в поле {file_field}")
+        if receiver.pending:
+            await io_pool.run(_write_chunk, out, digest, receiver.take_pending())
+        await io_pool.run(out.close)
+    except BaseException:
+        # Незавершённая загрузка не должна оставлять файлов в каталоге загрузок
+        await asyncio.shield(io_pool.run(_discard, out, tmp_path))
+        raise
+    return ReceivedForm(
+        ReceivedUpload(tmp_path, receiver.file_size, digest.hexdigest()),
+        receiver.filename, receiver.content_type, receiver.fields
+    )
+
+
+async def receive_image_form(request: Request, file_field: str, directory: str) -> ReceivedForm:
+    """receive_form для изображения кадра: ошибки приёма превращаются в ответы 413 и 400"""
+    try:
+        return await receive_form(request, file_field, directory, allowed_types=IMAGE_TYPES)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Слишком большой размер файла"
+        )
+    except InvalidUploadError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+async def place_upload(received: ReceivedUpload, pic_path: str):
+    """Перенос полученного файла в хранилище изображений в пуле файловых операций (после add_blob)"""
+    try:
+        await io_pool.run(blob_store.place, received.tmp_path, pic_path)
+    except BaseException:
+        await asyncio.shield(remove_upload(received.tmp_path))
+        raise
+
+
+async def remove_upload(file_path: str):
+    """Удаление полученного файла (например, если его не удалось сохранить)"""
+    if await io_pool.run(os.path.exists, file_path):
+        await io_pool.run(os.remove, file_path)
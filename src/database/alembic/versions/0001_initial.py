@@ -0,0 +1,58 @@
+"""Исходная схема (как в reset_db.sql до появления миграций)
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001_initial'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('login', sa.Text, nullable=False, unique=True),
+        sa.Column('password', sa.Text, nullable=False),
+        sa.Column('role', sa.Text, nullable=False),
+    )
+    op.create_table(
+        'project',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.Text, nullable=False),
+        sa.Column('owner', sa.Integer, sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+    )
+    op.create_table(
+        'page',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('project_id', sa.Integer, sa.ForeignKey('project.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('number', sa.Integer, nullable=False),
+        sa.Column('text', sa.Text),
+        sa.UniqueConstraint('project_id', 'number', name='page_project_id_number_key'),
+    )
+    op.create_table(
+        'frame',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('project_id', sa.Integer, sa.ForeignKey('project.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('description', sa.Text),
+        sa.Column('start_time', sa.Integer, nullable=False),
+        sa.Column('end_time', sa.Integer, nullable=False),
+        sa.Column('pic_path', sa.Text, nullable=False),
+        sa.Column('connected_page', sa.Integer, sa.ForeignKey('page.id', ondelete='SET NULL')),
+        sa.Column('number', sa.Integer, nullable=False),
+        sa.UniqueConstraint('project_id', 'number', name='frame_project_id_number_key'),
+        sa.CheckConstraint('end_time >= start_time', name='frame_check'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('frame')
+    op.drop_table('page')
+    op.drop_table('project')
+    op.drop_table('users')
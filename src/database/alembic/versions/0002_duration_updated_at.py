@@ -0,0 +1,30 @@
+"""Длительность кадра (TIMELINE_MODE=derived) и время изменения проекта (updated_since)
+
+Revision ID: 0002_duration_updated_at
+Revises: 0001_initial
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002_duration_updated_at'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('frame', sa.Column('duration', sa.Integer, nullable=False, server_default='0'))
+    op.create_check_constraint('check_duration_non_negative', 'frame', 'duration >= 0')
+    op.execute('UPDATE frame SET duration = end_time - start_time')
+    op.add_column(
+        'project',
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now())
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('project', 'updated_at')
+    op.drop_constraint('check_duration_non_negative', 'frame', type_='check')
+    op.drop_column('frame', 'duration')
@@ -0,0 +1,25 @@
+"""Индексы для частых запросов: проекты по владельцу, кадры по связанной странице
+
+Кадры и страницы по (project_id, number) уже покрыты индексами UNIQUE-ограничений.
+
+Revision ID: 0003_hot_lookup_indexes
+Revises: 0002_duration_updated_at
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = '0003_hot_lookup_indexes'
+down_revision = '0002_duration_updated_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_project_owner', 'project', ['owner'])
+    op.create_index('ix_frame_connected_page', 'frame', ['connected_page'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_frame_connected_page', table_name='frame')
+    op.drop_index('ix_project_owner', table_name='project')
@@ -0,0 +1,33 @@
+"""Хранилище изображений с адресацией по содержимому и счётчиком ссылок
+
+Существующие пути кадров (uploads/frame_*) остаются как есть: у каждого такого файла один
+владелец, и он удаляется вместе с кадром, как раньше.
+
+Revision ID: 0004_image_blob
+Revises: 0003_hot_lookup_indexes
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004_image_blob'
+down_revision = '0003_hot_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'image_blob',
+        sa.Column('hash', sa.Text, primary_key=True),
+        sa.Column('path', sa.Text, nullable=False, unique=True),
+        sa.Column('size', sa.Integer, nullable=False),
+        sa.Column('refcount', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint('refcount >= 0', name='check_refcount_non_negative'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('image_blob')
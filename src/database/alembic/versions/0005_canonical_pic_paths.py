@@ -0,0 +1,48 @@
+"""Канонические пути изображений кадров
+
+frame.pic_path приводится к виду "uploads/..." относительно MEDIA_ROOT ("/uploads/a.png",
+"uploads\\a.png" и абсолютные пути внутри MEDIA_ROOT), чтобы сервер находил файл одной
+проверкой, а не перебором вариантов. Пути вне MEDIA_ROOT не меняются.
+
+Revision ID: 0005_canonical_pic_paths
+Revises: 0004_image_blob
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from database import media
+
+
+revision = '0005_canonical_pic_paths'
+down_revision = '0004_image_blob'
+branch_labels = None
+depends_on = None
+
+
+def _canonicalize(connection, table: str, column: str) -> None:
+    rows = connection.execute(sa.text(f"SELECT DISTINCT {column} FROM {table}")).scalars().all()
+    for old in rows:
+        new = media.canonical_path(old)
+        if old and new != old:
+            connection.execute(
+                sa.text(f"UPDATE {table} SET {column} = :new WHERE {column} = :old"),
+                {'new': new, 'old': old}
+            )
+
+
+def upgrade() -> None:
+    if op.get_context().as_sql:
+        # Без подключения к БД (alembic upgrade --sql) - только самый частый случай "/uploads/..."
+        op.execute(
+            f"UPDATE frame SET pic_path = substr(pic_path, 2) WHERE pic_path LIKE '/{media.UPLOAD_DIR}/%'"
+        )
+        return
+    connection = op.get_bind()
+    _canonicalize(connection, 'frame', 'pic_path')
+    _canonicalize(connection, 'image_blob', 'path')
+
+
+def downgrade() -> None:
+    # Канонические пути понимает и прежний код - возвращать старый вид не нужно
+    pass
@@ -0,0 +1,25 @@
+"""Номер ревизии текста страницы
+
+page.revision увеличивается при каждом изменении текста. Правки текста (patchPage)
+применяются только к той ревизии, от которой их посчитал клиент.
+
+Revision ID: 0006_page_revision
+Revises: 0005_canonical_pic_paths
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006_page_revision'
+down_revision = '0005_canonical_pic_paths'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('page', sa.Column('revision', sa.Integer, nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('page', 'revision')
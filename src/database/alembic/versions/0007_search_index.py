@@ -0,0 +1,43 @@
+"""GIN-индексы полнотекстового поиска по тексту страниц и описаниям кадров
+
+Выражения индексов совпадают с database.search.document, иначе запрос поиска их не использует.
+Только для PostgreSQL: на других СУБД поиск строит индекс в памяти.
+
+Revision ID: 0007_search_index
+Revises: 0006_page_revision
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007_search_index'
+down_revision = '0006_page_revision'
+branch_labels = None
+depends_on = None
+
+
+def _is_postgresql() -> bool:
+    return op.get_context().dialect.name == 'postgresql'
+
+
+def upgrade() -> None:
+    if not _is_postgresql():
+        return
+    op.create_index(
+        'ix_page_text_search', 'page',
+        [sa.text("to_tsvector('russian'::regconfig, coalesce(text, ''))")],
+        postgresql_using='gin'
+    )
+    op.create_index(
+        'ix_frame_description_search', 'frame',
+        [sa.text("to_tsvector('russian'::regconfig, coalesce(description, ''))")],
+        postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    if not _is_postgresql():
+        return
+    op.drop_index('ix_frame_description_search', table_name='frame')
+    op.drop_index('ix_page_text_search', table_name='page')
@@ -0,0 +1,787 @@
+from sqlalchemy import Integer, Text, and_, cast, literal, null, select, union_all, update
+
+from database import blob_store, image_paths, media, ordering, read_cache, search, text_patch, timeline
+from database.base import get_async_sessionmaker
+from database.models import User, Project, Page, Frame, ImageBlob
+
+import os
+from datetime import datetime
+from typing import AsyncIterator, Optional, Dict, List, Tuple
+
+
+# Столбцы общей выборки снимка проекта и их типы: у каждой части UNION ALL одинаковый набор,
+# отсутствующие у сущности столбцы заполняются NULL нужного типа
+_SNAPSHOT_COLUMNS = [
+    ('number', Integer), ('text', Text), ('start_time', Integer), ('end_time', Integer),
+    ('duration', Integer), ('pic_path', Text), ('connected_page', Integer),
+]
+
+
+def _snapshot_select(kind: str, model, **columns):
+    """Часть запроса снимка проекта для одной сущности (kind - project, frame или page)"""
+    return select(
+        cast(literal(kind), Text).label('kind'),
+        model.id.label('id'),
+        *[
+            cast(columns[name] if name in columns else null(), column_type).label(name)
+            for name, column_type in _SNAPSHOT_COLUMNS
+        ]
+    )
+
+
+class AsyncDatabaseRepository:
+    """Асинхронный аналог DatabaseRepository поверх AsyncEngine (asyncpg)"""
+
+    def __init__(self, session_factory=None):
+        # session_factory передаёт единица работы, чтобы все вызовы шли в её транзакции
+        self.Session = session_factory or get_async_sessionmaker()
+
+    # ==================== User Methods ====================
+
+    async def create_user(self, username: str, password: str, email: str) -> bool:
+        """Создание записи для нового пользователя"""
+        async with self.Session() as session:
+            try:
+                # Проверяем существует ли пользователь
+                existing = await session.scalar(select(User.id).where(User.login == username))
+                if existing is not None:
+                    return False
+
+                session.add(User(login=username, password=password, role='user'))
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error creating user: {e}")
+                return False
+
+    async def read_user_info(self, username: str) -> Optional[Dict]:
+        """Получение информации о пользователе"""
+        async with self.Session() as session:
+            try:
+                user = await session.scalar(select(User).where(User.login == username))
+
+                if user:
+                    return {
+                        'username': user.login,
+                        'password': user.password,
+                        'role': user.role
+                    }
+                return None
+
+            except Exception as e:
+                print(f"Error reading user info: {e}")
+                return None
+
+    async def read_all_users(self) -> List[Dict]:
+        """Получение списка всех пользователей"""
+        async with self.Session() as session:
+            rows = await session.execute(select(User.login, User.role).order_by(User.id))
+            return [{'username': login, 'role': role} for login, role in rows]
+
+    @staticmethod
+    def _users_query(login_prefix: Optional[str] = None, role: Optional[str] = None):
+        query = select(User.id, User.login, User.role).order_by(User.id)
+        if login_prefix:
+            query = query.where(User.login.startswith(login_prefix, autoescape=True))
+        if role:
+            query = query.where(User.role == role)
+        return query
+
+    async def read_users_page(self, limit: int, after_id: Optional[int] = None,
+                              login_prefix: Optional[str] = None, role: Optional[str] = None) -> List[Dict]:
+        """Страница пользователей с keyset-пагинацией по id и фильтрами по началу логина и роли"""
+        async with self.Session() as session:
+            query = self._users_query(login_prefix, role)
+            if after_id is not None:
+                query = query.where(User.id > after_id)
+            rows = await session.execute(query.limit(limit))
+            return [{'user_id': user_id, 'username': login, 'role': role} for user_id, login, role in rows]
+
+    async def stream_users(self, login_prefix: Optional[str] = None, role: Optional[str] = None,
+                           batch_size: int = 1000) -> AsyncIterator[Dict]:
+        """
+        Все подходящие пользователи по одному, без загрузки списка в память
+
+        Строки читаются серверным курсором пачками по batch_size. Сессия открывается на всё
+        время обхода, поэтому репозиторий должен быть создан без единицы работы запроса.
+        """
+        async with self.Session() as session:
+            result = await session.stream(
+                self._users_query(login_prefix, role).execution_options(yield_per=batch_size)
+            )
+            async for user_id, login, role_name in result:
+                yield {'user_id': user_id, 'username': login, 'role': role_name}
+
+    async def update_user_info(self, username: str, password: Optional[str] = None,
+                               email: Optional[str] = None, role: Optional[str] = None) -> bool:
+        """Изменение информации о пользователе"""
+        async with self.Session() as session:
+            try:
+                user = await session.scalar(select(User).where(User.login == username))
+
+                if not user:
+                    return False
+
+                if password:
+                    user.password = password
+                if role:
+                    user.role = role
+
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating user info: {e}")
+                return False
+
+    async def delete_user(self, username: str) -> bool:
+        """Удаление пользователя и его проектов"""
+        async with self.Session() as session:
+            try:
+                user = await session.scalar(select(User).where(User.login == username))
+
+                if not user:
+                    return False
+
+                # Снимаем ссылки кадров пользователя на изображения
+                pic_paths = (await session.scalars(
+                    select(Frame.pic_path).join(Project, Frame.project_id == Project.id)
+                    .where(Project.owner == user.id)
+                )).all()
+                await session.run_sync(blob_store.release, pic_paths)
+                image_paths.clear_after_commit(session)
+                for project_id in (await session.scalars(select(Project.id).where(Project.owner == user.id))).all():
+                    read_cache.invalidate_project_after_commit(session, project_id)
+
+                # Каскадное удаление через SQLAlchemy
+                await session.delete(user)
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error deleting user: {e}")
+                return False
+
+    async def user_exist(self, username: str) -> bool:
+        """Проверка наличия пользователя с переданным логином"""
+        async with self.Session() as session:
+            user_id = await session.scalar(select(User.id).where(User.login == username))
+            return user_id is not None
+
+    async def get_user_id_by_login(self, username: str) -> Optional[int]:
+        """Получение ID пользователя по логину"""
+        async with self.Session() as session:
+            return await session.scalar(select(User.id).where(User.login == username))
+
+    # ==================== Project Methods ====================
+
+    async def user_project_exist(self, project_name: str, username: str) -> bool:
+        """Проверка наличия проекта с переданным названием у пользователя"""
+        async with self.Session() as session:
+            project_id = await session.scalar(
+                select(Project.id).join(User).where(
+                    Project.name == project_name,
+                    User.login == username
+                ).limit(1)
+            )
+            return project_id is not None
+
+    async def read_user_projects(self, username: str) -> List[Dict]:
+        """Получение списка проектов пользователя"""
+        async with self.Session() as session:
+            rows = await session.execute(
+                select(Project.id, Project.name).join(User).where(User.login == username)
+            )
+            return [
+                {
+                    'project_id': project_id,
+                    'project_name': name,
+                    'owner_username': username
+                }
+                for project_id, name in rows
+            ]
+
+    async def read_user_projects_page(self, username: str, limit: Optional[int] = None,
+                                      after_id: Optional[int] = None,
+                                      updated_since: Optional[datetime] = None) -> Optional[List[Dict]]:
+        """Проекты пользователя (id и название) одним запросом с keyset-пагинацией по id; None, если пользователя нет"""
+        async with self.Session() as session:
+            # Условия на проекты стоят в ON, чтобы пользователь без подходящих проектов вернул одну строку с NULL
+            conditions = [Project.owner == User.id]
+            if after_id is not None:
+                conditions.append(Project.id > after_id)
+            if updated_since is not None:
+                conditions.append(Project.updated_at >= updated_since)
+            query = (
+                select(User.id, Project.id, Project.name)
+                .outerjoin(Project, and_(*conditions))
+                .where(User.login == username)
+                .order_by(Project.id)
+            )
+            if limit is not None:
+                query = query.limit(limit)
+            rows = (await session.execute(query)).all()
+            if not rows:
+                return None
+            return [
+                {'project_id': project_id, 'project_name': name}
+                for _, project_id, name in rows
+                if project_id is not None
+            ]
+
+    async def create_project(self, name: str, owner_id: int) -> bool:
+        """Создание нового проекта пользователя"""
+        async with self.Session() as session:
+            try:
+                # Проверяем существование пользователя
+                if await session.get(User, owner_id) is None:
+                    return False
+
+                session.add(Project(name=name, owner=owner_id))
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error creating project: {e}")
+                return False
+
+    async def read_project_info(self, project_id: int) -> Optional[Dict]:
+        """Получение информации о проекте пользователя"""
+        async with self.Session() as session:
+            try:
+                key = read_cache.project_key(project_id)
+                cached, version = read_cache.lookup(session, key)
+                if cached is not None:
+                    return cached
+
+                row = (await session.execute(
+                    select(Project.id, Project.name, User.login)
+                    .outerjoin(User, User.id == Project.owner)
+                    .where(Project.id == project_id)
+                )).first()
+
+                if row:
+                    return read_cache.store(key, {
+                        'project_id': row.id,
+                        'project_name': row.name,
+                        'owner_username': row.login
+                    }, version)
+                return None
+
+            except Exception as e:
+                print(f"Error reading project info: {e}")
+                return None
+
+    async def read_project_snapshot(self, project_id: int) -> Optional[Dict]:
+        """
+        Проект, его кадры и страницы одним запросом (UNION ALL трёх выборок)
+
+        Returns:
+            snapshot: {'project': строка проекта, 'frames': строки кадров по порядку,
+                       'pages': строки страниц по порядку} или None, если проекта нет
+        """
+        statement = union_all(
+            _snapshot_select('project', Project, text=Project.name).where(Project.id == project_id),
+            _snapshot_select(
+                'frame', Frame, number=Frame.number, text=Frame.description, start_time=Frame.start_time,
+                end_time=Frame.end_time, duration=Frame.duration, pic_path=Frame.pic_path,
+                connected_page=Frame.connected_page
+            ).where(Frame.project_id == project_id),
+            _snapshot_select('page', Page, number=Page.number, text=Page.text).where(Page.project_id == project_id),
+        )
+        async with self.Session() as session:
+            rows = (await session.execute(statement)).all()
+
+        snapshot = {'project': None, 'frames': [], 'pages': []}
+        for item in rows:
+            if item.kind == 'project':
+                snapshot['project'] = item
+            else:
+                snapshot[f'{item.kind}s'].append(item)
+        if snapshot['project'] is None:
+            return None
+        snapshot['frames'].sort(key=lambda item: item.number)
+        snapshot['pages'].sort(key=lambda item: item.number)
+        return snapshot
+
+    async def update_project_name(self, project_id: int, new_name: str) -> bool:
+        """Изменение названия проекта"""
+        async with self.Session() as session:
+            try:
+                project = await session.get(Project, project_id)
+
+                if not project:
+                    return False
+
+                project.name = new_name
+                read_cache.invalidate_project_after_commit(session, project_id)
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating project name: {e}")
+                return False
+
+    async def delete_project(self, project_id: int) -> bool:
+        """Удаление проекта пользователя"""
+        async with self.Session() as session:
+            try:
+                project = await session.get(Project, project_id)
+
+                if not project:
+                    return False
+
+                # Снимаем ссылки кадров проекта на изображения (файлы без ссылок удалятся после фиксации)
+                pic_paths = (await session.scalars(
+                    select(Frame.pic_path).where(Frame.project_id == project_id)
+                )).all()
+                await session.run_sync(blob_store.release, pic_paths)
+                image_paths.invalidate_project_after_commit(session, project_id)
+                read_cache.invalidate_project_after_commit(session, project_id)
+
+                # Удаляем проект (каскадное удаление через SQLAlchemy)
+                await session.delete(project)
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error deleting project: {e}")
+                return False
+
+    # ==================== Frame Methods ====================
+
+    async def create_frame(self, project_id: int, start_time: int, end_time: int,
+                           pic_path: str, description: Optional[str] = None,
+                           number: Optional[int] = None) -> bool:
+        """Создание записи о новом кадре"""
+        async with self.Session() as session:
+            try:
+                # Проверяем существование проекта
+                if await session.get(Project, project_id) is None:
+                    return False
+
+                # Если номер не указан, определяем автоматически
+                if number is None:
+                    number = await self._next_number(session, Frame, project_id)
+
+                session.add(Frame(
+                    project_id=project_id,
+                    description=description,
+                    start_time=start_time,
+                    end_time=end_time,
+                    pic_path=media.canonical_path(pic_path),
+                    number=number,
+                    duration=max(0, end_time - start_time)
+                ))
+                # Кадр с уже сохранённым изображением (копия) ссылается на тот же файл
+                await session.run_sync(blob_store.add_ref, pic_path)
+                timeline.invalidate_after_commit(session, project_id)
+                read_cache.invalidate_frames_after_commit(session, project_id)
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error creating frame: {e}")
+                return False
+
+    async def read_frame_info(self, frame_id: int) -> Optional[Dict]:
+        """Получение информации о кадре"""
+        async with self.Session() as session:
+            try:
+                key = read_cache.frame_key(frame_id)
+                cached, version = read_cache.lookup(session, key)
+                if cached is not None:
+                    return cached
+
+                frame = await session.get(Frame, frame_id)
+
+                if frame:
+                    number = frame.number
+                    if ordering.is_sparse():
+                        number = await session.scalar(
+                            ordering.display_number_query(Frame, frame.project_id, frame.number)
+                        )
+                    start_time, end_time = frame.start_time, frame.end_time
+                    if timeline.is_derived():
+                        start_time, end_time = await session.run_sync(
+                            timeline.frame_times, frame.project_id, frame.id
+                        )
+                    return read_cache.store(key, {
+                        'project_id': frame.project_id,
+                        'description': frame.description,
+                        'start_time': start_time,
+                        'end_time': end_time,
+                        'pic_path': frame.pic_path,
+                        'number': number,
+                        'connected_page': frame.connected_page
+                    }, version)
+                return None
+
+            except Exception as e:
+                print(f"Error reading frame info: {e}")
+                return None
+
+    async def update_frame_info(self, frame_id: int, start_time: Optional[int] = None,
+                                end_time: Optional[int] = None, pic_path: Optional[str] = None,
+                                description: Optional[str] = None, number: Optional[int] = None) -> bool:
+        """Изменение информации о кадре"""
+        async with self.Session() as session:
+            try:
+                frame = await session.get(Frame, frame_id)
+
+                if not frame:
+                    return False
+
+                if start_time is not None:
+                    frame.start_time = start_time
+                if end_time is not None:
+                    frame.end_time = end_time
+                if start_time is not None or end_time is not None:
+                    # Длительность всегда соответствует хранимым временам (для перехода в режим derived)
+                    frame.duration = max(0, frame.end_time - frame.start_time)
+                    # В режиме derived времена читаются из кэша таймлайна - он получает новую длительность
+                    timeline.set_duration_after_commit(session, frame.project_id, frame_id, frame.duration)
+                if pic_path is not None:
+                    frame.pic_path = media.canonical_path(pic_path)
+                    image_paths.invalidate_after_commit(session, frame_id)
+                if description is not None:
+                    frame.description = description
+                if number is not None:
+                    frame.number = number
+                    timeline.invalidate_after_commit(session, frame.project_id)
+
+                read_cache.invalidate_frames_after_commit(session, frame.project_id)
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating frame info for frame {frame_id}: {e}")
+                return False
+
+    async def delete_frame(self, frame_id: int) -> bool:
+        """Удаление записи о кадре"""
+        async with self.Session() as session:
+            try:
+                frame = await session.get(Frame, frame_id)
+
+                if not frame:
+                    return False
+
+                # Снимаем ссылку на изображение кадра
+                await session.run_sync(blob_store.release, [frame.pic_path])
+                image_paths.invalidate_after_commit(session, frame_id)
+
+                await session.delete(frame)
+                timeline.invalidate_after_commit(session, frame.project_id)
+                read_cache.invalidate_frames_after_commit(session, frame.project_id)
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error deleting frame: {e}")
+                return False
+
+    async def change_pic(self, frame_id: int, new_pic_path: str) -> bool:
+        """Изменение изображения кадра"""
+        async with self.Session() as session:
+            try:
+                frame = await session.get(Frame, frame_id)
+
+                if not frame:
+                    return False
+
+                # Снимаем ссылку на старое изображение (ссылку на новое держит вызывающий)
+                await session.run_sync(blob_store.release, [frame.pic_path])
+                image_paths.invalidate_after_commit(session, frame_id)
+
+                frame.pic_path = media.canonical_path(new_pic_path)
+                read_cache.invalidate_frames_after_commit(session, frame.project_id)
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error changing picture: {e}")
+                return False
+
+    async def read_pic_path(self, frame_id: int) -> Optional[str]:
+        """Получение пути к изображению кадра"""
+        async with self.Session() as session:
+            return await session.scalar(select(Frame.pic_path).where(Frame.id == frame_id))
+
+    async def read_frame_image(self, frame_id: int) -> Optional[Tuple[int, str]]:
+        """Проект кадра и путь к его изображению одним запросом (для отдачи изображения)"""
+        async with self.Session() as session:
+            row = (await session.execute(
+                select(Frame.project_id, Frame.pic_path).where(Frame.id == frame_id)
+            )).first()
+            return (row.project_id, row.pic_path) if row else None
+
+    async def read_project_images(self, project_id: int,
+                                  frame_ids: Optional[List[int]] = None) -> Optional[List[Tuple[int, str]]]:
+        """Кадры проекта (или только frame_ids) и пути к их изображениям по порядку, одним запросом; None, если проекта нет"""
+        async with self.Session() as session:
+            condition = Frame.project_id == Project.id
+            if frame_ids is not None:
+                condition = and_(condition, Frame.id.in_(frame_ids))
+            rows = (await session.execute(
+                select(Frame.id, Frame.pic_path)
+                .select_from(Project)
+                .outerjoin(Frame, condition)
+                .where(Project.id == project_id)
+                .order_by(Frame.number)
+            )).all()
+            if not rows:
+                return None
+            return [(row.id, row.pic_path) for row in rows if row.id is not None]
+
+    async def read_blob_path(self, digest: str) -> Optional[str]:
+        """Путь к файлу хранилища изображений по хэшу содержимого"""
+        async with self.Session() as session:
+            return await session.scalar(select(ImageBlob.path).where(ImageBlob.hash == digest))
+
+    async def get_max_frame_number(self, project_id: int) -> int:
+        """Получение максимального номера кадра в проекте"""
+        async with self.Session() as session:
+            return await self._max_number(session, Frame, project_id) or 0
+
+    # ==================== Page Methods ====================
+
+    async def create_page(self, project_id: int, number: Optional[int] = None, text: Optional[str] = None) -> bool:
+        """Создание записи о новой странице сценария"""
+        async with self.Session() as session:
+            try:
+                # Проверяем существование проекта
+                if await session.get(Project, project_id) is None:
+                    return False
+
+                # Если номер не указан, находим максимальный номер + 1
+                if number is None:
+                    number = await self._next_number(session, Page, project_id)
+
+                session.add(Page(project_id=project_id, number=number, text=text))
+                read_cache.invalidate_pages_after_commit(session, project_id)
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error creating page: {e}")
+                return False
+
+    async def read_page_info(self, page_id: int) -> Optional[Dict]:
+        """Получение информации о странице сценария"""
+        async with self.Session() as session:
+            try:
+                key = read_cache.page_key(page_id)
+                cached, version = read_cache.lookup(session, key)
+                if cached is not None:
+                    return cached
+
+                page = await session.get(Page, page_id)
+
+                if page:
+                    number = page.number
+                    if ordering.is_sparse():
+                        number = await session.scalar(
+                            ordering.display_number_query(Page, page.project_id, page.number)
+                        )
+                    return read_cache.store(key, {
+                        'page_id': page.id,
+                        'number': number,
+                        'text': page.text,
+                        'project_id': page.project_id,
+                        'revision': page.revision
+                    }, version)
+                return None
+
+            except Exception as e:
+                print(f"Error reading page info: {e}")
+                return None
+
+    async def read_project_pages(self, project_id: int) -> List[Dict]:
+        """Получение всех страниц проекта по порядку"""
+        async with self.Session() as session:
+            rows = await session.execute(
+                select(Page.id, Page.number, Page.text)
+                .where(Page.project_id == project_id)
+                .order_by(Page.number)
+            )
+            return [
+                {'page_id': page_id, 'number': i + 1 if ordering.is_sparse() else number, 'text': text}
+                for i, (page_id, number, text) in enumerate(rows)
+            ]
+
+    async def search_project(self, project_id: int, query: str, limit: int = search.SEARCH_LIMIT,
+                             kinds: Tuple[str, ...] = search.KINDS) -> List[Dict]:
+        """
+        Полнотекстовый поиск по тексту страниц и описаниям кадров проекта
+
+        Returns:
+            [{'kind', 'id', 'number', 'rank', 'snippet'}] по убыванию релевантности
+        """
+        async with self.Session() as session:
+            if session.get_bind().dialect.name == 'postgresql':
+                rows = await session.execute(search.postgres_query(project_id, query, limit, kinds))
+                return [dict(row._mapping) for row in rows]
+
+            # Без tsvector: индекс документов проекта строится в памяти
+            documents = {}
+            for kind, model, column in (('page', Page, Page.text), ('frame', Frame, Frame.description)):
+                documents[kind] = (await session.execute(
+                    select(model.id, model.number, column)
+                    .where(model.project_id == project_id)
+                    .order_by(model.number)
+                )).all() if kind in kinds else []
+            return search.build_index(documents['page'], documents['frame']).search(query, limit, kinds)
+
+    async def update_page_text(self, page_id: int, text: str) -> Optional[int]:
+        """Изменение текста страницы сценария, возвращает новую ревизию (None - страницы нет)"""
+        async with self.Session() as session:
+            try:
+                revision = await session.scalar(
+                    update(Page).where(Page.id == page_id)
+                    .values(text=text, revision=Page.revision + 1)
+                    .returning(Page.revision)
+                )
+                read_cache.invalidate_page_after_commit(session, page_id)
+                await session.commit()
+                return revision
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating page text: {e}")
+                return None
+
+    async def patch_page_text(self, page_id: int, base_revision: int,
+                              edits: List[text_patch.TextEdit]) -> Optional[Dict]:
+        """
+        Применение правок к тексту страницы, если он не менялся с ревизии base_revision
+
+        Returns:
+            {'applied': bool, 'revision': текущая ревизия} или None, если страницы нет
+        """
+        async with self.Session() as session:
+            row = (await session.execute(
+                select(Page.text, Page.revision).where(Page.id == page_id)
+            )).first()
+            if row is None:
+                return None
+            text, revision = row
+            if revision != base_revision:
+                return {'applied': False, 'revision': revision}
+            try:
+                new_text = text_patch.apply_edits(text, edits)
+            except text_patch.PatchError as e:
+                print(f"Error patching page {page_id}: {e}")
+                return {'applied': False, 'revision': revision}
+
+            # Запись только поверх прочитанной ревизии: параллельное сохранение не затирается
+            new_revision = await session.scalar(
+                update(Page).where(Page.id == page_id, Page.revision == base_revision)
+                .values(text=new_text, revision=Page.revision + 1)
+                .returning(Page.revision)
+            )
+            if new_revision is None:
+                current = await session.scalar(select(Page.revision).where(Page.id == page_id))
+                return {'applied': False, 'revision': current}
+            read_cache.invalidate_page_after_commit(session, page_id)
+            await session.commit()
+            return {'applied': True, 'revision': new_revision}
+
+    async def delete_page(self, page_id: int) -> bool:
+        """Удаление записи о странице сценария"""
+        async with self.Session() as session:
+            try:
+                page = await session.get(Page, page_id)
+
+                if not page:
+                    return False
+
+                project_id = page.project_id
+                deleted_number = page.number
+                await session.delete(page)
+                await session.flush()
+                # Кадры, связанные со страницей, теряют connected_page
+                read_cache.invalidate_pages_after_commit(session, project_id)
+                read_cache.invalidate_frames_after_commit(session, project_id)
+
+                # В режиме ключей с промежутками остальные страницы не меняются
+                if ordering.is_sparse():
+                    await session.commit()
+                    return True
+
+                # Сдвигаем номера последующих страниц в два шага: сначала за пределы текущего
+                # диапазона, затем на место, чтобы не нарушить UNIQUE(project_id, number) посреди UPDATE
+                shift = await self._next_number(session, Page, project_id)
+                await session.execute(
+                    update(Page).where(Page.project_id == project_id, Page.number > deleted_number)
+                    .values(number=Page.number + shift)
+                )
+                await session.execute(
+                    update(Page).where(Page.project_id == project_id, Page.number > shift)
+                    .values(number=Page.number - shift - 1)
+                )
+                await session.commit()
+                return True
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error deleting page: {e}")
+                return False
+
+    async def update_page_number(self, page_id: int, new_page_number: int) -> bool:
+        """Изменение номера страницы сценария"""
+        async with self.Session() as session:
+            try:
+                if ordering.is_sparse():
+                    # new_page_number - позиция с 1, меняется только ключ этой страницы
+                    page = await session.get(Page, page_id)
+                    if not page:
+                        return False
+                    new_page_number = await session.run_sync(
+                        ordering.place_key, Page, page.project_id, page.id, new_page_number
+                    )
+                    # Отображаемые номера остальных страниц сдвигаются
+                    read_cache.invalidate_pages_after_commit(session, page.project_id)
+                result = await session.execute(
+                    update(Page).where(Page.id == page_id).values(number=new_page_number)
+                )
+                read_cache.invalidate_page_after_commit(session, page_id)
+                await session.commit()
+                return result.rowcount > 0
+
+            except Exception as e:
+                await session.rollback()
+                print(f"Error updating page number: {e}")
+                return False
+
+    async def get_max_page_number(self, project_id: int) -> int:
+        """Получение максимального номера страницы в проекте"""
+        async with self.Session() as session:
+            return await self._max_number(session, Page, project_id) or 0
+
+    # ==================== Helpers ====================
+
+    @staticmethod
+    async def _max_number(session, model, project_id: int) -> Optional[int]:
+        """Максимальный номер (ключ порядка) кадра/страницы в проекте"""
+        return await session.scalar(
+            select(model.number).where(model.project_id == project_id)
+            .order_by(model.number.desc()).limit(1)
+        )
+
+    @classmethod
+    async def _next_number(cls, session, model, project_id: int) -> int:
+        """Следующий свободный порядковый номер кадра/страницы в проекте"""
+        return ordering.next_key(await cls._max_number(session, model, project_id))
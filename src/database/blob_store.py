@@ -0,0 +1,273 @@
+from sqlalchemy import delete, event, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database import media
+from database.models import ImageBlob
+
+import os
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Хранилище изображений кадров с адресацией по содержимому:
+#   файл лежит в BLOB_DIR/<первые 2 символа хэша>/<sha256><расширение> и хранится один раз
+#   для всех кадров с одинаковыми байтами, строка image_blob считает ссылки (refcount) на него.
+#   Файл удаляется после фиксации транзакции, в которой счётчик дошёл до нуля, если его не
+#   обновили (place() в этом или другом воркере) после того, как была снята последняя ссылка.
+# Путь задаётся относительно media.MEDIA_ROOT - в таком виде он попадает в Frame.pic_path
+BLOB_DIR = os.getenv("BLOB_DIR", f"{media.UPLOAD_DIR}/blobs")
+
+# Обработчики, вызываемые после удаления файла изображения (например, удаление его уменьшенных копий)
+removal_hooks: List[Callable[[str], None]] = []
+
+# Запуск файловой операции хранилища (удаление файла после фиксации). По умолчанию выполняется
+# сразу в вызывающем потоке; core.io_pool при импорте переносит её в пул файловых операций
+run_file_task: Callable[[Callable[[], None]], None] = lambda task: task()
+
+# Файлов, забираемых из очереди удаления за один раз
+REMOVAL_BATCH_SIZE = int(os.getenv("REMOVAL_BATCH_SIZE", "100"))
+
+# Очередь удаления: абсолютный путь -> время, раньше которого файл должен быть изменён, чтобы
+# его удалить (None - удалить в любом случае). place() снимает путь отсюда, если то же содержимое
+# загрузили снова до того, как файл успели удалить. Очередь разбирает одна задача пачками
+_queued: Dict[str, Optional[float]] = {}
+_queued_lock = threading.Lock()
+# Пути, с файлами которых сейчас работают place() или очередь удаления. Блокировка очереди
+# держится только на время отметки, сами файловые операции идут без неё; place() ждёт, пока
+# очередь закончит с тем же путём, а очередь не трогает путь, который сейчас переносит place()
+_busy: Set[str] = set()
+_released = threading.Condition(_queued_lock)
+_drain_scheduled = False
+_removal_stats = {'removed': 0, 'kept': 0, 'failed': 0}
+
+
+def blob_path(digest: str, extension: str) -> str:
+    """Канонический путь к файлу хранилища для содержимого с хэшем digest"""
+    return media.canonical_path(f"{BLOB_DIR}/{digest[:2]}/{digest}{extension.lower()}")
+
+
+def blob_dir() -> str:
+    """Абсолютный путь к каталогу хранилища (в нём же создаются временные файлы загрузок)"""
+    return media.absolute_path(BLOB_DIR)
+
+
+def add_blob(session: Session, digest: str, size: int, extension: str) -> str:
+    """
+    Добавление одной ссылки на изображение с хэшем digest (только строка image_blob в БД)
+
+    Файл в хранилище кладёт place(): его вызывает код запроса в пуле файловых операций
+    (core.uploads.place_upload), а не модель внутри транзакции - синхронный код моделей
+    выполняется в потоке цикла событий.
+
+    Args:
+        session: синхронная сессия SQLAlchemy
+        digest: SHA-256 содержимого в hex
+        size: размер содержимого в байтах
+        extension: расширение исходного файла (используется только для нового файла)
+
+    Returns:
+        path: канонический путь к файлу хранилища для Frame.pic_path
+    """
+    insert = postgresql.insert if session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+    statement = insert(ImageBlob).values(
+        hash=digest, path=blob_path(digest, extension), size=size, refcount=1
+    )
+    return session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[ImageBlob.hash], set_={'refcount': ImageBlob.refcount + 1}
+        ).returning(ImageBlob.path)
+    ).scalar_one()
+
+
+def place(tmp_path: str, path: str) -> None:
+    """
+    Перенос полученного файла в хранилище (блокирующие файловые операции - вызывать в пуле)
+
+    Если файл с таким содержимым уже есть, временный файл удаляется - повторной записи на диск
+    нет. Иначе временный файл переименовывается в файл хранилища.
+
+    Args:
+        tmp_path: временный файл с полученным содержимым (в той же файловой системе, что BLOB_DIR)
+        path: путь из add_blob
+    """
+    file_path = media.absolute_path(path)
+    with _released:
+        # Файл, который очередь уже начала удалять, сначала дожидаемся
+        _released.wait_for(lambda: file_path not in _busy)
+        # Удаление файла, запланированное до этой загрузки, отменяется: на него снова есть ссылка
+        _queued.pop(file_path, None)
+        _busy.add(file_path)
+    try:
+        if os.path.exists(file_path):
+            os.remove(tmp_path)
+        else:
+            # Новое содержимое (или файл хранилища потерян) - переносим полученный файл на место
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.replace(tmp_path, file_path)
+        # Свежее время изменения защищает файл от удаления, запланированного другим воркером
+        # (его очередь не видна отсюда), и от сборщика неиспользуемых файлов (orphan_gc):
+        # оба удаляют только файлы, изменённые раньше, чем была снята последняя ссылка
+        now = time.time_ns()
+        os.utime(file_path, ns=(now, now))
+    finally:
+        _release(file_path)
+
+
+def _release(file_path: str):
+    with _released:
+        _busy.discard(file_path)
+        _released.notify_all()
+
+
+def add_ref(session: Session, path: Optional[str]) -> bool:
+    """Ещё одна ссылка на уже сохранённое изображение (копия кадра) без копирования байтов"""
+    if not path:
+        return False
+    result = session.execute(
+        update(ImageBlob).where(ImageBlob.path == media.canonical_path(path)).values(refcount=ImageBlob.refcount + 1),
+        execution_options={'synchronize_session': False}
+    )
+    return bool(result.rowcount)
+
+
+def release(session: Session, paths: Iterable[Optional[str]]) -> None:
+    """
+    Снятие ссылок кадров на изображения (по одной на каждый элемент paths)
+
+    Файлы, на которые больше никто не ссылается, удаляются после фиксации транзакции.
+    Пути вне хранилища (загруженные до его появления) принадлежат одному кадру и удаляются сразу
+    после фиксации, как раньше.
+    """
+    for path, count in Counter(media.canonical_path(path) for path in paths if path).items():
+        remaining = session.execute(
+            update(ImageBlob).where(ImageBlob.path == path)
+            .values(refcount=ImageBlob.refcount - count)
+            .returning(ImageBlob.refcount),
+            execution_options={'synchronize_session': False}
+        ).scalar()
+        if remaining is not None and remaining > 0:
+            continue
+        if remaining is not None:
+            session.execute(
+                delete(ImageBlob).where(ImageBlob.path == path, ImageBlob.refcount <= 0),
+                execution_options={'synchronize_session': False}
+            )
+        remove_after_commit(session, path)
+
+
+# Файлы удаляются только после фиксации транзакции: при откате ссылки в БД остаются, и файлы тоже.
+# Для каждого файла запоминается время снятия ссылки: place() в другом воркере может сослаться на
+# файл снова, пока удаление ждёт в очереди этого воркера, и тогда обновляет время изменения файла
+
+def _pending(session) -> Dict[str, float]:
+    return session.info.setdefault('blob_store_removals', {})
+
+
+def remove_after_commit(session, path: str):
+    """Удаление файла (путь из Frame.pic_path) после фиксации текущей транзакции"""
+    file_path = media.absolute_path(path)
+    if file_path:
+        _pending(session)[file_path] = time.time()
+
+
+def _remove_file(path: str, older_than: Optional[float]):
+    try:
+        try:
+            if older_than is not None and os.stat(path).st_mtime >= older_than:
+                _count('kept')
+                return
+            os.remove(path)
+            _count('removed')
+        finally:
+            # Файл удалён (или оставлен) - place() с тем же путём может продолжать
+            _release(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        _count('failed')
+        print(f"Error removing image file {path}: {e}")
+        return
+    try:
+        for hook in removal_hooks:
+            hook(path)
+    except OSError as e:
+        print(f"Error removing image file {path}: {e}")
+
+
+def _drain():
+    global _drain_scheduled
+    while True:
+        with _queued_lock:
+            if not _queued:
+                _drain_scheduled = False
+                return
+            batch = []
+            for _ in range(min(REMOVAL_BATCH_SIZE, len(_queued))):
+                path, older_than = _queued.popitem()
+                if path in _busy:
+                    # place() прямо сейчас снова ссылается на файл - удалять нечего
+                    _removal_stats['kept'] += 1
+                    continue
+                _busy.add(path)
+                batch.append((path, older_than))
+        # Файлы удаляются без блокировки очереди: отмеченные пути place() дождётся, остальные
+        # загрузки и постановка в очередь не ждут всей пачки
+        for path, older_than in batch:
+            _remove_file(path, older_than)
+
+
+def _count(outcome: str):
+    with _queued_lock:
+        _removal_stats[outcome] += 1
+
+
+def enqueue_removals(paths: Iterable[str], older_than: Optional[float] = None) -> int:
+    """
+    Постановка файлов в очередь удаления
+
+    Args:
+        paths: абсолютные пути к файлам
+        older_than: удалять файл, только если он изменён раньше этого времени (time.time());
+            None - удалять в любом случае
+
+    Returns:
+        count: число поставленных в очередь файлов
+    """
+    return _enqueue((path, older_than) for path in paths)
+
+
+def _enqueue(items: Iterable[Tuple[str, Optional[float]]]) -> int:
+    global _drain_scheduled
+    count = 0
+    with _queued_lock:
+        for path, older_than in items:
+            if path in _queued and _queued[path] is None:
+                continue
+            _queued[path] = older_than
+            count += 1
+        schedule = bool(_queued) and not _drain_scheduled
+        if schedule:
+            _drain_scheduled = True
+    if schedule:
+        run_file_task(_drain)
+    return count
+
+
+def removal_stats() -> Dict:
+    """Длина очереди удаления и счётчики удалённых, оставленных и неудачно удалённых файлов"""
+    with _queued_lock:
+        return {'pending': len(_queued), **_removal_stats}
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    removals = session.info.pop('blob_store_removals', {})
+    if removals:
+        _enqueue(removals.items())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop('blob_store_removals', None)
@@ -0,0 +1,110 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+# Кэш найденных файлов изображений кадров: (frame_id, размер) -> путь, stat и Content-Type.
+# Повторный запрос изображения кадра отдаётся без обращения к БД и к диску. Записи
+# сбрасываются после фиксации транзакции, изменившей или удалившей изображение кадра,
+# а изменения из других воркеров станут видны не позже IMAGE_PATH_CACHE_TTL секунд.
+IMAGE_PATH_CACHE_SIZE = int(os.getenv("IMAGE_PATH_CACHE_SIZE", "4096"))
+IMAGE_PATH_CACHE_TTL = float(os.getenv("IMAGE_PATH_CACHE_TTL", "30"))
+
+
+class ResolvedImage(NamedTuple):
+    """Файл, которым отвечает запрос изображения кадра"""
+    project_id: int
+    path: str
+    stat: os.stat_result
+    media_type: str
+    loaded_at: float
+
+
+_cache: "OrderedDict[Tuple[int, str], ResolvedImage]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def get(frame_id: int, size: str) -> Optional[ResolvedImage]:
+    """Найденный ранее файл изображения кадра или None"""
+    key = (frame_id, size)
+    with _lock:
+        resolved = _cache.get(key)
+        if resolved is None:
+            return None
+        if time.monotonic() - resolved.loaded_at >= IMAGE_PATH_CACHE_TTL:
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return resolved
+
+
+def put(frame_id: int, size: str, project_id: int, path: str, stat: os.stat_result,
+        media_type: str) -> ResolvedImage:
+    """Сохранение найденного файла; при переполнении вытесняются давно не запрошенные записи"""
+    resolved = ResolvedImage(project_id, path, stat, media_type, time.monotonic())
+    if IMAGE_PATH_CACHE_SIZE <= 0:
+        return resolved
+    key = (frame_id, size)
+    with _lock:
+        _cache[key] = resolved
+        _cache.move_to_end(key)
+        while len(_cache) > IMAGE_PATH_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return resolved
+
+
+def invalidate(frame_id: int) -> None:
+    """Сброс записей кадра (всех размеров)"""
+    with _lock:
+        for key in [key for key in _cache if key[0] == frame_id]:
+            del _cache[key]
+
+
+def invalidate_project(project_id: int) -> None:
+    """Сброс записей всех кадров проекта"""
+    with _lock:
+        for key in [key for key, resolved in _cache.items() if resolved.project_id == project_id]:
+            del _cache[key]
+
+
+def clear() -> None:
+    """Сброс всего кэша"""
+    with _lock:
+        _cache.clear()
+
+
+# Кэш сбрасывается только после фиксации транзакции: до неё другие запросы ещё видят
+# в БД прежний путь и могли бы снова положить его в кэш
+
+def _pending(session) -> List[Callable[[], None]]:
+    return session.info.setdefault('image_path_cache_ops', [])
+
+
+def invalidate_after_commit(session, frame_id: int):
+    """Сброс записей кадра после фиксации текущей транзакции (изображение изменено или кадр удалён)"""
+    _pending(session).append(lambda: invalidate(frame_id))
+
+
+def invalidate_project_after_commit(session, project_id: int):
+    """Сброс записей кадров проекта после фиксации текущей транзакции (проект удалён)"""
+    _pending(session).append(lambda: invalidate_project(project_id))
+
+
+def clear_after_commit(session):
+    """Сброс всего кэша после фиксации текущей транзакции"""
+    _pending(session).append(clear)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    for operation in session.info.pop('image_path_cache_ops', []):
+        operation()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop('image_path_cache_ops', None)
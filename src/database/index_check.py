@@ -0,0 +1,99 @@
+"""
+Проверка наличия индексов под частые запросы репозиториев
+
+Запуск (из каталога src):
+    python -m database.index_check             # по живой БД из DATABASE_URL
+    python -m database.index_check --metadata  # по моделям SQLAlchemy, без подключения к БД
+"""
+from sqlalchemy import Index, PrimaryKeyConstraint, UniqueConstraint, inspect
+
+import sys
+from typing import Dict, List, Tuple
+
+# Шаблоны запросов: таблица и столбцы условия WHERE/JOIN (в порядке использования)
+QUERY_PATTERNS: List[Tuple[str, Tuple[str, ...], str]] = [
+    ('users', ('login',), 'пользователь по логину (вход, user_exist, read_user_info)'),
+    ('project', ('owner',), 'проекты пользователя (loadInfo, удаление пользователя)'),
+    ('frame', ('project_id', 'number'), 'кадры проекта по порядку (таймлайн, перестановка)'),
+    ('page', ('project_id', 'number'), 'страницы проекта по порядку (сценарий, перестановка)'),
+    ('frame', ('connected_page',), 'кадры, связанные со страницей (удаление страницы)'),
+    ('image_blob', ('path',), 'изображение по пути кадра (счётчик ссылок хранилища)'),
+]
+
+
+def _is_covered(columns: Tuple[str, ...], indexed: List[Tuple[str, ...]]) -> bool:
+    """Запрос покрыт, если его столбцы - префикс столбцов какого-либо индекса"""
+    return any(index[:len(columns)] == columns for index in indexed)
+
+
+def metadata_indexes(metadata) -> Dict[str, List[Tuple[str, ...]]]:
+    """Столбцы индексов, первичных ключей и UNIQUE-ограничений по таблицам моделей"""
+    result: Dict[str, List[Tuple[str, ...]]] = {}
+    for table in metadata.tables.values():
+        indexed = result.setdefault(table.name, [])
+        for index in table.indexes:
+            indexed.append(tuple(column.name for column in index.columns))
+        for constraint in table.constraints:
+            if isinstance(constraint, (PrimaryKeyConstraint, UniqueConstraint)):
+                indexed.append(tuple(column.name for column in constraint.columns))
+        for column in table.columns:
+            if column.unique or column.index:
+                indexed.append((column.name,))
+    return result
+
+
+def database_indexes(engine) -> Dict[str, List[Tuple[str, ...]]]:
+    """Столбцы индексов, первичных ключей и UNIQUE-ограничений по таблицам живой БД"""
+    inspector = inspect(engine)
+    result: Dict[str, List[Tuple[str, ...]]] = {}
+    for table in inspector.get_table_names():
+        indexed = result.setdefault(table, [])
+        for index in inspector.get_indexes(table):
+            indexed.append(tuple(index['column_names']))
+        for constraint in inspector.get_unique_constraints(table):
+            indexed.append(tuple(constraint['column_names']))
+        primary_key = inspector.get_pk_constraint(table).get('constrained_columns')
+        if primary_key:
+            indexed.append(tuple(primary_key))
+    return result
+
+
+def find_missing(indexes: Dict[str, List[Tuple[str, ...]]]) -> List[Tuple[str, Tuple[str, ...], str]]:
+    """
+    Шаблоны запросов, для которых нет подходящего индекса
+
+    Args:
+        indexes: столбцы индексов по таблицам (metadata_indexes или database_indexes)
+
+    Returns:
+        missing: список (таблица, столбцы, описание запроса)
+    """
+    return [
+        (table, columns, description)
+        for table, columns, description in QUERY_PATTERNS
+        if not _is_covered(columns, indexes.get(table, []))
+    ]
+
+
+def main(argv: List[str]) -> int:
+    if '--metadata' in argv:
+        from database.models import Base
+        indexes = metadata_indexes(Base.metadata)
+        source = 'модели SQLAlchemy'
+    else:
+        from database.base import engine
+        indexes = database_indexes(engine)
+        source = 'база данных'
+
+    missing = find_missing(indexes)
+    if not missing:
+        print(f"Все частые запросы покрыты индексами ({source})")
+        return 0
+    print(f"Нет индексов для запросов ({source}):")
+    for table, columns, description in missing:
+        print(f"  {table}({', '.join(columns)}) - {description}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,47 @@
+import os
+import posixpath
+from typing import Optional
+
+# Корень файлового хранилища: пути в frame.pic_path хранятся относительно него в каноническом
+# виде "uploads/..." и не зависят от рабочего каталога сервера. По умолчанию - каталог src,
+# в котором лежит uploads (в docker-compose он смонтирован томом).
+MEDIA_ROOT = os.path.abspath(os.getenv("MEDIA_ROOT", os.path.join(os.path.dirname(__file__), "..")))
+# Каталог загрузок внутри MEDIA_ROOT
+UPLOAD_DIR = "uploads"
+
+
+def canonical_path(pic_path: Optional[str]) -> str:
+    """
+    Канонический вид пути к изображению для frame.pic_path
+
+    "/uploads/a.png", "uploads\\a.png" и абсолютный путь внутри MEDIA_ROOT приводятся
+    к "uploads/a.png". Пустой путь (у кадра нет изображения) остаётся пустым, абсолютные
+    пути вне MEDIA_ROOT и пути, выходящие за его пределы, не меняются.
+    """
+    if not pic_path:
+        return ''
+    path = pic_path.replace('\\', '/')
+    if path.startswith('/') and not path.startswith(f'/{UPLOAD_DIR}/'):
+        # Абсолютный путь файловой системы
+        relative = os.path.relpath(pic_path, MEDIA_ROOT)
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return pic_path
+        path = relative.replace(os.sep, '/')
+    path = posixpath.normpath(path.lstrip('/'))
+    if path == '..' or path.startswith('../'):
+        return pic_path
+    return path
+
+
+def absolute_path(pic_path: Optional[str]) -> str:
+    """Абсолютный путь к файлу изображения по значению frame.pic_path (пустая строка, если файла быть не может)"""
+    path = canonical_path(pic_path)
+    if path.startswith(f'/{UPLOAD_DIR}/'):
+        # Путь загрузок, выходящий за пределы MEDIA_ROOT
+        return ''
+    if path.startswith('/'):
+        return path
+    path = posixpath.normpath(path) if path else ''
+    if not path or path == '..' or path.startswith('../'):
+        return ''
+    return os.path.join(MEDIA_ROOT, *path.split('/'))
@@ -13,6 +13,8 @@
 
 
 -- Удаляем существующие таблицы (если нужно пересоздать)
+DROP TABLE IF EXISTS alembic_version;
+DROP TABLE IF EXISTS image_blob;
 DROP TABLE IF EXISTS frame;
 DROP TABLE IF EXISTS page;
 DROP TABLE IF EXISTS project;
@@ -29,7 +31,8 @@ CREATE TABLE users (
 CREATE TABLE project (
     id SERIAL PRIMARY KEY,
     name TEXT NOT NULL,
-    owner INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE
+    owner INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now() -- Время создания или последнего изменения
 );
 
 CREATE TABLE page (
@@ -37,6 +40,7 @@ CREATE TABLE page (
     project_id INTEGER NOT NULL REFERENCES project(id) ON DELETE CASCADE,
     number INTEGER NOT NULL,
     text TEXT,
+    revision INTEGER NOT NULL DEFAULT 0, -- Растёт при каждом изменении текста
     UNIQUE(project_id, number) -- Уникальный номер страницы в рамках проекта
 );
 
@@ -49,10 +53,37 @@ CREATE TABLE frame (
     pic_path TEXT NOT NULL,
     connected_page INTEGER REFERENCES page(id) ON DELETE SET NULL,
     number INTEGER NOT NULL,
+    duration INTEGER NOT NULL DEFAULT 0, -- Длительность кадра (TIMELINE_MODE=derived)
     UNIQUE(project_id, number), -- Уникальный номер кадра в рамках проекта
-    CHECK (end_time >= start_time) -- Проверка корректности временных интервалов
+    CHECK (end_time >= start_time), -- Проверка корректности временных интервалов
+    CONSTRAINT check_duration_non_negative CHECK (duration >= 0)
 );
 
+-- Изображения кадров с адресацией по содержимому: один файл на одинаковое содержимое,
+-- refcount - число кадров, у которых pic_path указывает на этот файл
+CREATE TABLE image_blob (
+    hash TEXT PRIMARY KEY, -- SHA-256 содержимого
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    refcount INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    CONSTRAINT check_refcount_non_negative CHECK (refcount >= 0)
+);
+
+-- Индексы для частых запросов (кадры и страницы по (project_id, number) покрыты UNIQUE)
+CREATE INDEX ix_project_owner ON project (owner);
+CREATE INDEX ix_frame_connected_page ON frame (connected_page);
+-- Полнотекстовый поиск (выражения совпадают с database.search.document)
+CREATE INDEX ix_page_text_search ON page USING gin (to_tsvector('russian'::regconfig, coalesce(text, '')));
+CREATE INDEX ix_frame_description_search ON frame USING gin (to_tsvector('russian'::regconfig, coalesce(description, '')));
+
+-- Схема соответствует последней миграции Alembic (src/database/alembic/versions)
+CREATE TABLE alembic_version (
+    version_num VARCHAR(32) NOT NULL,
+    CONSTRAINT alembic_version_pkc PRIMARY KEY (version_num)
+);
+INSERT INTO alembic_version (version_num) VALUES ('0007_search_index');
+
 
 
 -- Вставка тестовых данных для проверки
@@ -72,11 +103,11 @@ INSERT INTO page (project_id, number, text) VALUES
     (2, 1, 'Текст страницы второго проекта'),
     (3, 1, 'Текст тестовой страницы');
 
-INSERT INTO frame (project_id, description, start_time, end_time, pic_path, connected_page, number) VALUES 
-    (1, 'Первый кадр проекта', 0, 10, '/uploads/frame1.jpg', 1, 1),
-    (1, 'Второй кадр проекта', 10, 20, '/uploads/frame2.jpg', 2, 2),
-    (2, 'Кадр второго проекта', 0, 15, '/uploads/frame3.jpg', 3, 1),
-    (3, 'Тестовый кадр', 0, 5, '/uploads/test.jpg', 4, 1);
+INSERT INTO frame (project_id, description, start_time, end_time, pic_path, connected_page, number, duration) VALUES 
+    (1, 'Первый кадр проекта', 0, 10, 'uploads/frame1.jpg', 1, 1, 10),
+    (1, 'Второй кадр проекта', 10, 20, 'uploads/frame2.jpg', 2, 2, 10),
+    (2, 'Кадр второго проекта', 0, 15, 'uploads/frame3.jpg', 3, 1, 15),
+    (3, 'Тестовый кадр', 0, 5, 'uploads/test.jpg', 4, 1, 5);
 
 -- Даем необходимые привилегии пользователю aaa (если используете другого пользователя, замените имя)
 -- GRANT ALL PRIVILEGES ON TABLE users TO aaa;
@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, CheckConstraint, Index, UniqueConstraint, func, literal_column
+from sqlalchemy.dialects import postgresql  # noqa: F401 - регистрирует функции to_tsvector/ts_* для PostgreSQL
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
 # Создаем базовый класс для моделей
 Base = declarative_base()
 
+
+def _search_document(column):
+    """Выражение GIN-индекса полнотекстового поиска (совпадает с database.search.document)"""
+    return func.to_tsvector(literal_column("'russian'::regconfig"), func.coalesce(column, literal_column("''")))
+
+
 # Модели таблиц
 class User(Base):
     __tablename__ = 'users'
@@ -24,6 +31,14 @@ class Project(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     owner = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    # Время создания или последнего изменения проекта, его кадров или страниц
+    # (фильтр updated_since в списке проектов, см. database/project_activity.py)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    
+    # Индексы (см. migrations/reset_db.sql и database/alembic)
+    __table_args__ = (
+        Index('ix_project_owner', 'owner'),
+    )
     
     # Связи
     owner_user = relationship("User", back_populates="projects")
@@ -38,10 +53,13 @@ class Page(Base):
     project_id = Column(Integer, ForeignKey('project.id', ondelete='CASCADE'), nullable=False)
     number = Column(Integer, nullable=False)
     text = Column(Text)
+    revision = Column(Integer, nullable=False, default=0, server_default='0')  # Растёт при каждом изменении текста
     
     # Ограничения
     __table_args__ = (
         CheckConstraint('number > 0', name='check_page_number_positive'),
+        UniqueConstraint('project_id', 'number', name='page_project_id_number_key'),
+        Index('ix_page_text_search', _search_document(text), postgresql_using='gin').ddl_if(dialect='postgresql'),
     )
     
     # Связи
@@ -60,14 +78,38 @@ class Frame(Base):
     pic_path = Column(String(500), nullable=False)
     connected_page = Column(Integer, ForeignKey('page.id', ondelete='SET NULL'))
     number = Column(Integer, nullable=False)
+    # Длительность кадра; в режиме TIMELINE_MODE=derived start_time/end_time вычисляются по ней
+    duration = Column(Integer, nullable=False, default=0, server_default='0')
     
     # Ограничения
     __table_args__ = (
         CheckConstraint('start_time >= 0', name='check_start_time_positive'),
         CheckConstraint('end_time >= start_time', name='check_end_time_gte_start_time'),
         CheckConstraint('number > 0', name='check_frame_number_positive'),
+        CheckConstraint('duration >= 0', name='check_duration_non_negative'),
+        UniqueConstraint('project_id', 'number', name='frame_project_id_number_key'),
+        Index('ix_frame_connected_page', 'connected_page'),
+        Index('ix_frame_description_search', _search_document(description),
+              postgresql_using='gin').ddl_if(dialect='postgresql'),
     )
     
     # Связи
     project_rel = relationship("Project", back_populates="frames")
-    connected_page_rel = relationship("Page", back_populates="connected_frames")
\ No newline at end of file
+    connected_page_rel = relationship("Page", back_populates="connected_frames")
+
+class ImageBlob(Base):
+    """Изображение в хранилище с адресацией по содержимому (общий файл для всех кадров с такими же байтами)"""
+    __tablename__ = 'image_blob'
+    
+    # SHA-256 содержимого в hex
+    hash = Column(String(64), primary_key=True)
+    path = Column(String(500), unique=True, nullable=False)
+    size = Column(Integer, nullable=False)
+    # Количество кадров, у которых pic_path указывает на этот файл
+    refcount = Column(Integer, nullable=False, default=0, server_default='0')
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    
+    # Ограничения
+    __table_args__ = (
+        CheckConstraint('refcount >= 0', name='check_refcount_non_negative'),
+    )
@@ -0,0 +1,131 @@
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm import Session
+
+import os
+from typing import Optional, Tuple
+
+# Режим хранения порядка кадров и страниц в колонке number:
+#   dense  - номера 1..N подряд, вставка/удаление/перемещение перенумеровывают хвост
+#   sparse - номера используются как ключи с промежутками (шаг ORDER_KEY_STEP), перемещение
+#            и удаление меняют одну строку, а номер для клиента (1..N) вычисляется при чтении
+ORDERING_MODE = os.getenv("ORDERING_MODE", "dense").strip().lower()
+ORDER_KEY_STEP = int(os.getenv("ORDER_KEY_STEP", "1024"))
+# Минимальный промежуток между соседними ключами, после которого проект перестраивается в фоне
+ORDER_REBALANCE_GAP = int(os.getenv("ORDER_REBALANCE_GAP", "8"))
+
+
+def is_sparse() -> bool:
+    """Включён ли режим ключей с промежутками"""
+    return ORDERING_MODE == "sparse"
+
+
+def key_step() -> int:
+    return ORDER_KEY_STEP if is_sparse() else 1
+
+
+def next_key(max_key: Optional[int]) -> int:
+    """Ключ для добавления элемента в конец проекта"""
+    return (max_key or 0) + key_step()
+
+
+def key_between(prev_key: Optional[int], next_key_: Optional[int]) -> Optional[int]:
+    """
+    Ключ между двумя соседями
+
+    Args:
+        prev_key: ключ предыдущего элемента или None, если вставка в начало
+        next_key_: ключ следующего элемента или None, если вставка в конец
+
+    Returns:
+        key: новый ключ или None, если промежуток исчерпан и нужна перестройка
+    """
+    low = prev_key or 0
+    if next_key_ is None:
+        return low + key_step()
+    if next_key_ - low < 2:
+        return None
+    return (low + next_key_) // 2
+
+
+def display_number_query(model, project_id: int, key: int):
+    """Запрос порядкового номера (с 1) элемента с ключом key для отдачи клиенту"""
+    return select(func.count(model.id)).where(model.project_id == project_id, model.number <= key)
+
+
+def _neighbour_keys(session: Session, model, project_id: int, item_id: int,
+                    position: int) -> Tuple[Optional[int], Optional[int]]:
+    others = and_(model.project_id == project_id, model.id != item_id)
+    if position <= 1:
+        first = session.execute(
+            select(model.number).where(others).order_by(model.number).limit(1)
+        ).scalar()
+        return None, first
+    keys = session.execute(
+        select(model.number).where(others).order_by(model.number)
+        .offset(position - 2).limit(2)
+    ).scalars().all()
+    if not keys:
+        # Позиция за концом списка - ставим последним
+        return session.execute(select(func.max(model.number)).where(others)).scalar(), None
+    return keys[0], (keys[1] if len(keys) > 1 else None)
+
+
+def place_key(session: Session, model, project_id: int, item_id: int, position: int) -> int:
+    """
+    Ключ, ставящий элемент item_id на позицию position (с 1) среди остальных элементов проекта.
+    Если между соседями не осталось места, проект перестраивается и ключ вычисляется заново.
+
+    Args:
+        session: синхронная сессия SQLAlchemy
+        model: Frame или Page
+        project_id: id проекта
+        item_id: id перемещаемого элемента
+        position: новая позиция элемента
+
+    Returns:
+        key: ключ для колонки number
+    """
+    prev_key, following_key = _neighbour_keys(session, model, project_id, item_id, position)
+    key = key_between(prev_key, following_key)
+    if key is None:
+        rebalance(session, model, project_id)
+        prev_key, following_key = _neighbour_keys(session, model, project_id, item_id, position)
+        key = key_between(prev_key, following_key)
+    return key
+
+
+def needs_rebalance(session: Session, model, project_id: int) -> bool:
+    """Есть ли в проекте соседние ключи ближе ORDER_REBALANCE_GAP"""
+    gaps = select(
+        (model.number - func.lag(model.number).over(order_by=model.number)).label('gap')
+    ).where(model.project_id == project_id).subquery()
+    min_gap = session.execute(select(func.min(gaps.c.gap))).scalar()
+    return min_gap is not None and min_gap < ORDER_REBALANCE_GAP
+
+
+def rebalance(session: Session, model, project_id: int) -> None:
+    """
+    Перестройка ключей проекта с равномерным шагом текущего режима (в dense - 1..N).
+    Выполняется двумя UPDATE без загрузки строк в Python.
+    """
+    count, max_key = session.execute(
+        select(func.count(model.id), func.max(model.number)).where(model.project_id == project_id)
+    ).one()
+    if not count:
+        return
+    step = key_step()
+
+    # Сначала уводим ключи выше итогового диапазона, чтобы не нарушить UNIQUE(project_id, number)
+    offset = max(max_key, count * step)
+    session.execute(
+        update(model).where(model.project_id == project_id).values(number=model.number + offset),
+        execution_options={'synchronize_session': False}
+    )
+    ranked = select(
+        model.id, func.row_number().over(order_by=model.number).label('rn')
+    ).where(model.project_id == project_id).subquery()
+    session.execute(
+        update(model).where(model.id == ranked.c.id).values(number=ranked.c.rn * step),
+        execution_options={'synchronize_session': False}
+    )
+    session.expire_all()
@@ -0,0 +1,98 @@
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+
+from database import blob_store, media
+from database.base import SessionLocal
+from database.models import Frame, ImageBlob
+
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Сборщик неиспользуемых файлов: сверяет каталог загрузок с путями изображений в БД
+# (frame.pic_path и image_blob.path) и ставит в очередь удаления blob_store файлы, на которые
+# ничто не ссылается. Такие файлы остаются после сбоя между фиксацией и удалением, после
+# прерванных загрузок и от изображений, удалённых до появления хранилища.
+# Файлы моложе ORPHAN_GC_GRACE не трогаются: ссылка на них может быть ещё не зафиксирована.
+ORPHAN_GC_INTERVAL = int(os.getenv("ORPHAN_GC_INTERVAL", "3600"))  # секунды между проходами, 0 - выключен
+ORPHAN_GC_GRACE = int(os.getenv("ORPHAN_GC_GRACE", "3600"))
+
+# Уменьшенная копия изображения: <имя>.<размер>.webp рядом с исходным файлом
+_VARIANT = re.compile(r'^(.+)\.[a-z]+\.webp$')
+
+
+def scan_files(root: str) -> List[Tuple[str, float]]:
+    """
+    Файлы каталога загрузок
+
+    Returns:
+        [(канонический путь, время изменения)]
+    """
+    files = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            files.append((media.canonical_path(path), mtime))
+    return files
+
+
+def referenced_paths(session: Session) -> Set[str]:
+    """Пути изображений, на которые ссылаются кадры и хранилище"""
+    rows = session.execute(union(
+        select(Frame.pic_path).where(Frame.pic_path != ''),
+        select(ImageBlob.path),
+    ))
+    return {media.canonical_path(row[0]) for row in rows if row[0]}
+
+
+def find_orphans(files: Iterable[Tuple[str, float]], referenced: Set[str], cutoff: float) -> List[str]:
+    """
+    Неиспользуемые файлы среди files
+
+    Копия изображения используется, пока используется её исходный файл. Файлы, изменённые
+    не раньше cutoff, считаются используемыми.
+    """
+    stems = {os.path.splitext(path)[0] for path in referenced}
+    orphans = []
+    for path, mtime in files:
+        if mtime >= cutoff or path in referenced:
+            continue
+        variant = _VARIANT.match(path)
+        if variant and variant.group(1) in stems:
+            continue
+        orphans.append(path)
+    return orphans
+
+
+def collect(session: Session, grace: int = ORPHAN_GC_GRACE) -> Dict:
+    """
+    Один проход сборщика
+
+    Каталог просматривается до запроса ссылок, поэтому файлы, появившиеся во время прохода,
+    в него не попадают. Очередь blob_store удаляет найденный файл, только если он по-прежнему
+    старше grace секунд (blob_store.place() обновляет время изменения файла при новой ссылке на него).
+
+    Returns:
+        {'scanned', 'orphans', 'queued'}
+    """
+    cutoff = time.time() - grace
+    files = scan_files(media.absolute_path(media.UPLOAD_DIR))
+    orphans = find_orphans(files, referenced_paths(session), cutoff)
+    queued = blob_store.enqueue_removals(
+        [media.absolute_path(path) for path in orphans], older_than=cutoff
+    )
+    return {'scanned': len(files), 'orphans': len(orphans), 'queued': queued}
+
+
+def collect_now(grace: int = ORPHAN_GC_GRACE) -> Dict:
+    """Проход сборщика в собственной сессии (из фоновой задачи или пула потоков)"""
+    session = SessionLocal()
+    try:
+        return collect(session, grace)
+    finally:
+        session.close()
@@ -0,0 +1,54 @@
+from sqlalchemy import event, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from database.models import Page, Project
+
+from typing import Set
+
+# Время последнего изменения проекта (Project.updated_at, фильтр updated_since в списке проектов).
+# onupdate у колонки срабатывает только при изменении самой строки проекта, поэтому изменения
+# кадров и страниц отмечают проект в сессии, а перед фиксацией транзакции updated_at всех
+# отмеченных проектов обновляется одним UPDATE. Отметки ставят сбросы кэша чтения
+# (read_cache.invalidate_frames/pages/page_after_commit), которые сопровождают каждую запись
+# кадров и страниц.
+
+
+def _projects(session) -> Set[int]:
+    return session.info.setdefault('touched_projects', set())
+
+
+def _pages(session) -> Set[int]:
+    return session.info.setdefault('touched_pages', set())
+
+
+def touch(session, project_id: int):
+    """Отметка: в текущей транзакции изменились кадры или страницы проекта"""
+    _projects(session).add(project_id)
+
+
+def touch_page(session, page_id: int):
+    """Отметка: в текущей транзакции изменилась страница (проект определяется по ней)"""
+    _pages(session).add(page_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _update_touched(session):
+    project_ids = session.info.pop('touched_projects', None)
+    page_ids = session.info.pop('touched_pages', None)
+    if not project_ids and not page_ids:
+        return
+    conditions = []
+    if project_ids:
+        conditions.append(Project.id.in_(project_ids))
+    if page_ids:
+        conditions.append(Project.id.in_(select(Page.project_id).where(Page.id.in_(page_ids))))
+    session.execute(
+        update(Project).where(or_(*conditions)).values(updated_at=func.now()),
+        execution_options={'synchronize_session': False}
+    )
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched(session):
+    session.info.pop('touched_projects', None)
+    session.info.pop('touched_pages', None)
@@ -0,0 +1,274 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import project_activity
+
+from abc import ABC, abstractmethod
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Кэш чтения проектов, кадров и страниц поверх репозиториев:
+#   project:<id>  - read_project_info
+#   frames:<id>   - кадры проекта (FrameModel.get_project_frames)
+#   frame:<id>    - read_frame_info, помечен тегом frames:<id проекта>
+#   page:<id>     - read_page_info, помечен тегом pages:<id проекта>
+# Номер и (в режиме derived) времена кадра зависят от соседних кадров, поэтому любое изменение
+# кадров проекта сбрасывает весь тег frames:<id проекта>, а не только изменённый кадр.
+# Сброс применяется после фиксации транзакции; изменения из других воркеров станут видны
+# не позже READ_CACHE_TTL секунд (или сразу - при общем бэкенде).
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "10000"))
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "30"))
+
+
+class CacheBackend(ABC):
+    """
+    Хранилище кэша чтения
+
+    Реализация для общего кэша нескольких воркеров (например, поверх Redis) подключается через
+    set_backend и должна поддерживать сброс записей по ключам и по тегам.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Значение по ключу или None"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, tags: Iterable[str] = (), version: Optional[int] = None) -> None:
+        """
+        Сохранение значения
+
+        Args:
+            version: значение version(), полученное до чтения из БД; если после него были сбросы,
+                     значение могло устареть и не сохраняется
+        """
+
+    @abstractmethod
+    def invalidate(self, keys: Iterable[str] = (), tags: Iterable[str] = ()) -> None:
+        """Сброс записей по ключам и всех записей с любым из тегов"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Сброс всех записей"""
+
+    @abstractmethod
+    def version(self) -> int:
+        """Счётчик сбросов (для отбрасывания значений, прочитанных до сброса)"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Счётчики попаданий, промахов, вытеснений и сбросов"""
+
+
+class LocalLRUBackend(CacheBackend):
+    """Кэш в памяти процесса: LRU с ограничением числа записей и временем жизни записи"""
+
+    def __init__(self, max_entries: int = READ_CACHE_SIZE, ttl: float = READ_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Any, Set[str], float]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def _drop(self, key: str):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            if time.monotonic() - entry[2] >= self.ttl:
+                self._drop(key)
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = (), version: Optional[int] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        tags = set(tags)
+        with self._lock:
+            if version is not None and version != self._version:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, tags, time.monotonic())
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def invalidate(self, keys: Iterable[str] = (), tags: Iterable[str] = ()) -> None:
+        with self._lock:
+            self._version += 1
+            doomed = set(keys)
+            for tag in tags:
+                doomed |= self._tags.get(tag, set())
+            for key in doomed:
+                if key in self._entries:
+                    self._drop(key)
+                    self._counters['invalidations'] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._counters['invalidations'] += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, size=len(self._entries), max_size=self.max_entries)
+
+
+_backend: CacheBackend = LocalLRUBackend()
+
+
+def set_backend(backend: CacheBackend) -> None:
+    """Подключение другого хранилища кэша (например, общего для всех воркеров)"""
+    global _backend
+    _backend = backend
+
+
+def get_backend() -> CacheBackend:
+    return _backend
+
+
+def get_stats() -> Dict[str, int]:
+    """Счётчики кэша чтения текущего процесса"""
+    return _backend.stats()
+
+
+def project_key(project_id: int) -> str:
+    return f"project:{project_id}"
+
+
+def project_frames_key(project_id: int) -> str:
+    return f"frames:{project_id}"
+
+
+def frame_key(frame_id: int) -> str:
+    return f"frame:{frame_id}"
+
+
+def page_key(page_id: int) -> str:
+    return f"page:{page_id}"
+
+
+def frames_tag(project_id: int) -> str:
+    return f"frames:{project_id}"
+
+
+def pages_tag(project_id: int) -> str:
+    return f"pages:{project_id}"
+
+
+def _tags_for(key: str, value: Any) -> List[str]:
+    if key.startswith("frame:"):
+        return [frames_tag(value['project_id'])]
+    if key.startswith("page:"):
+        return [pages_tag(value['project_id'])]
+    return []
+
+
+def has_pending_changes(session) -> bool:
+    """Есть ли в транзакции сессии незафиксированные изменения, затрагивающие кэш"""
+    return bool(session.info.get('read_cache_ops'))
+
+
+def lookup(session, key: str) -> Tuple[Optional[Any], Optional[int]]:
+    """
+    Чтение из кэша перед обращением к БД
+
+    Returns:
+        (копия значения или None, версия для store при промахе)
+    """
+    if has_pending_changes(session):
+        # Транзакция уже изменила данные - общий кэш для неё не годится
+        return None, None
+    version = _backend.version()
+    value = _backend.get(key)
+    if value is not None:
+        return copy.deepcopy(value), None
+    return None, version
+
+
+def store(key: str, value: Any, version: Optional[int]) -> Any:
+    """Сохранение значения, прочитанного из БД после промаха lookup (None не кэшируется)"""
+    if value is not None and version is not None:
+        _backend.set(key, copy.deepcopy(value), _tags_for(key, value), version)
+    return value
+
+
+def cached(session, key: str, loader: Callable[[], Any]) -> Any:
+    """Чтение через кэш для синхронного кода: при промахе значение загружает loader"""
+    value, version = lookup(session, key)
+    if value is not None:
+        return value
+    return store(key, loader(), version)
+
+
+# Сброс применяется только после фиксации транзакции: при откате кэш остаётся согласованным с БД
+
+def _pending(session) -> List[Callable[[], None]]:
+    return session.info.setdefault('read_cache_ops', [])
+
+
+def invalidate_project_after_commit(session, project_id: int):
+    """Сброс проекта, его кадров и страниц (проект переименован или удалён)"""
+    _pending(session).append(lambda: _backend.invalidate(
+        [project_key(project_id), project_frames_key(project_id)],
+        [frames_tag(project_id), pages_tag(project_id)]
+    ))
+
+
+def invalidate_frames_after_commit(session, project_id: int):
+    """Сброс кадров проекта (изменён состав, порядок, времена или данные кадров)"""
+    project_activity.touch(session, project_id)
+    _pending(session).append(lambda: _backend.invalidate(
+        [project_frames_key(project_id)], [frames_tag(project_id)]
+    ))
+
+
+def invalidate_page_after_commit(session, page_id: int):
+    """Сброс одной страницы (изменены только её текст или номер)"""
+    project_activity.touch_page(session, page_id)
+    _pending(session).append(lambda: _backend.invalidate([page_key(page_id)]))
+
+
+def invalidate_pages_after_commit(session, project_id: int):
+    """Сброс страниц проекта (изменён состав, порядок или текст страниц)"""
+    project_activity.touch(session, project_id)
+    _pending(session).append(lambda: _backend.invalidate((), [pages_tag(project_id)]))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    for operation in session.info.pop('read_cache_ops', []):
+        operation()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop('read_cache_ops', None)
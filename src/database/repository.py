@@ -1,8 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import relationship
 
-from database.base import engine
+from database import blob_store, image_paths, media, ordering, read_cache, timeline
+from database.unit_of_work import get_session
 from database.models import User, Project, Page, Frame
 
 import os
@@ -12,7 +13,7 @@ from typing import Optional, Dict, List
 
 class DatabaseRepository:
     def __init__(self):
-        self.Session = sessionmaker(bind=engine)
+        self.Session = get_session
 
     # ==================== User Methods ====================
 
@@ -62,6 +63,15 @@ class DatabaseRepository:
         finally:
             session.close()
 
+    def read_all_users(self) -> List[Dict]:
+        """Получение списка всех пользователей"""
+        session = self.Session()
+        try:
+            rows = session.query(User.login, User.role).order_by(User.id).all()
+            return [{'username': login, 'role': role} for login, role in rows]
+        finally:
+            session.close()
+
     def update_user_info(self, username: str, password: Optional[str] = None, 
                          email: Optional[str] = None, role: Optional[str] = None) -> bool:
         """Изменение информации о пользователе"""
@@ -96,6 +106,15 @@ class DatabaseRepository:
             if not user:
                 return False
             
+            # Снимаем ссылки кадров пользователя на изображения
+            pic_paths = session.query(Frame.pic_path).join(Project, Frame.project_id == Project.id).filter(
+                Project.owner == user.id
+            ).all()
+            blob_store.release(session, [row[0] for row in pic_paths])
+            image_paths.clear_after_commit(session)
+            for (project_id,) in session.query(Project.id).filter(Project.owner == user.id).all():
+                read_cache.invalidate_project_after_commit(session, project_id)
+            
             # Каскадное удаление через SQLAlchemy
             session.delete(user)
             session.commit()
@@ -175,15 +194,20 @@ class DatabaseRepository:
         """Получение информации о проекте пользователя"""
         session = self.Session()
         try:
+            key = read_cache.project_key(project_id)
+            cached, version = read_cache.lookup(session, key)
+            if cached is not None:
+                return cached
+            
             project = session.query(Project).filter(Project.id == project_id).first()
             
             if project:
                 owner = session.query(User).filter(User.id == project.owner).first()
-                return {
+                return read_cache.store(key, {
                     'project_id': project.id,
                     'project_name': project.name,
                     'owner_username': owner.login if owner else None
-                }
+                }, version)
             return None
             
         except Exception as e:
@@ -202,6 +226,7 @@ class DatabaseRepository:
                 return False
             
             project.name = new_name
+            read_cache.invalidate_project_after_commit(session, project_id)
             session.commit()
             return True
             
@@ -221,11 +246,11 @@ class DatabaseRepository:
             if not project:
                 return False
             
-            # Удаляем изображения кадров проекта
-            frames = session.query(Frame).filter(Frame.project_id == project_id).all()
-            for frame in frames:
-                if os.path.exists(frame.pic_path):
-                    os.remove(frame.pic_path)
+            # Снимаем ссылки кадров проекта на изображения (файлы без ссылок удалятся после фиксации)
+            pic_paths = session.query(Frame.pic_path).filter(Frame.project_id == project_id).all()
+            blob_store.release(session, [row[0] for row in pic_paths])
+            image_paths.invalidate_project_after_commit(session, project_id)
+            read_cache.invalidate_project_after_commit(session, project_id)
             
             # Удаляем проект (каскадное удаление через SQLAlchemy)
             session.delete(project)
@@ -257,7 +282,7 @@ class DatabaseRepository:
                 max_number = session.query(Frame.number).filter(
                     Frame.project_id == project_id
                 ).order_by(Frame.number.desc()).first()
-                new_number = 1 if not max_number else max_number[0] + 1
+                new_number = ordering.next_key(max_number[0] if max_number else None)
             else:
                 new_number = number
             
@@ -266,11 +291,16 @@ class DatabaseRepository:
                 description=description,
                 start_time=start_time,
                 end_time=end_time,
-                pic_path=pic_path,
-                number=new_number
+                pic_path=media.canonical_path(pic_path),
+                number=new_number,
+                duration=max(0, end_time - start_time)
             )
             
             session.add(new_frame)
+            # Кадр с уже сохранённым изображением (копия) ссылается на тот же файл
+            blob_store.add_ref(session, pic_path)
+            timeline.invalidate_after_commit(session, project_id)
+            read_cache.invalidate_frames_after_commit(session, project_id)
             session.commit()
             return True
             
@@ -285,18 +315,32 @@ class DatabaseRepository:
         """Получение информации о кадре"""
         session = self.Session()
         try:
-            frame = session.query(Frame).filter(Frame.id == frame_id).first()
+            key = read_cache.frame_key(frame_id)
+            cached, version = read_cache.lookup(session, key)
+            if cached is not None:
+                return cached
+            
+            # session.get берёт объект из identity map, если он уже загружен в этой единице работы
+            frame = session.get(Frame, frame_id)
             
             if frame:
-                return {
+                number = frame.number
+                if ordering.is_sparse():
+                    number = session.execute(
+                        ordering.display_number_query(Frame, frame.project_id, frame.number)
+                    ).scalar()
+                start_time, end_time = frame.start_time, frame.end_time
+                if timeline.is_derived():
+                    start_time, end_time = timeline.frame_times(session, frame.project_id, frame.id)
+                return read_cache.store(key, {
                     'project_id': frame.project_id,
                     'description': frame.description,
-                    'start_time': frame.start_time,
-                    'end_time': frame.end_time,
+                    'start_time': start_time,
+                    'end_time': end_time,
                     'pic_path': frame.pic_path,
-                    'number': frame.number,
+                    'number': number,
                     'connected_page': frame.connected_page
-                }
+                }, version)
             return None
             
         except Exception as e:
@@ -322,13 +366,21 @@ class DatabaseRepository:
                 frame.start_time = start_time
             if end_time is not None:
                 frame.end_time = end_time
+            if start_time is not None or end_time is not None:
+                # Длительность всегда соответствует хранимым временам (для перехода в режим derived)
+                frame.duration = max(0, frame.end_time - frame.start_time)
+                # В режиме derived времена читаются из кэша таймлайна - он получает новую длительность
+                timeline.set_duration_after_commit(session, frame.project_id, frame_id, frame.duration)
             if pic_path is not None:
-                frame.pic_path = pic_path
+                frame.pic_path = media.canonical_path(pic_path)
+                image_paths.invalidate_after_commit(session, frame_id)
             if description is not None:
                 frame.description = description
             if number is not None:
                 frame.number = number
+                timeline.invalidate_after_commit(session, frame.project_id)
             
+            read_cache.invalidate_frames_after_commit(session, frame.project_id)
             session.commit()
             print(f"update_frame_info: commit successful for frame {frame_id}")
             return True
@@ -351,12 +403,14 @@ class DatabaseRepository:
             if not frame:
                 return False
             
-            # Удаляем изображение кадра
-            if os.path.exists(frame.pic_path):
-                os.remove(frame.pic_path)
+            # Снимаем ссылку на изображение кадра
+            blob_store.release(session, [frame.pic_path])
+            image_paths.invalidate_after_commit(session, frame_id)
             
             # Удаляем запись из БД
             session.delete(frame)
+            timeline.invalidate_after_commit(session, frame.project_id)
+            read_cache.invalidate_frames_after_commit(session, frame.project_id)
             session.commit()
             return True
             
@@ -367,6 +421,28 @@ class DatabaseRepository:
         finally:
             session.close()
 
+    def delete_project_frames(self, project_id: int) -> int:
+        """Удаление всех кадров проекта одним запросом (возвращает число удалённых кадров или -1)"""
+        session = self.Session()
+        try:
+            # Снимаем ссылки кадров на изображения (файлы без ссылок удалятся после фиксации)
+            pic_paths = session.query(Frame.pic_path).filter(Frame.project_id == project_id).all()
+            blob_store.release(session, [row[0] for row in pic_paths])
+            image_paths.invalidate_project_after_commit(session, project_id)
+            
+            deleted = session.query(Frame).filter(Frame.project_id == project_id).delete(synchronize_session=False)
+            timeline.invalidate_after_commit(session, project_id)
+            read_cache.invalidate_frames_after_commit(session, project_id)
+            session.commit()
+            return deleted
+            
+        except Exception as e:
+            session.rollback()
+            print(f"Error deleting project frames: {e}")
+            return -1
+        finally:
+            session.close()
+
     def change_pic(self, frame_id: int, new_pic_path: str) -> bool:
         """Изменение изображения кадра"""
         session = self.Session()
@@ -376,12 +452,13 @@ class DatabaseRepository:
             if not frame:
                 return False
             
-            # Удаляем старое изображение
-            if os.path.exists(frame.pic_path):
-                os.remove(frame.pic_path)
+            # Снимаем ссылку на старое изображение (ссылку на новое держит вызывающий)
+            blob_store.release(session, [frame.pic_path])
+            image_paths.invalidate_after_commit(session, frame_id)
             
             # Обновляем путь к изображению
-            frame.pic_path = new_pic_path
+            frame.pic_path = media.canonical_path(new_pic_path)
+            read_cache.invalidate_frames_after_commit(session, frame.project_id)
             session.commit()
             return True
             
@@ -392,6 +469,21 @@ class DatabaseRepository:
         finally:
             session.close()
 
+    def store_image(self, digest: str, size: int, extension: str) -> Optional[str]:
+        """Новая ссылка на изображение в хранилище с адресацией по содержимому (файл кладёт вызывающий)"""
+        session = self.Session()
+        try:
+            path = blob_store.add_blob(session, digest, size, extension)
+            session.commit()
+            return path
+            
+        except Exception as e:
+            session.rollback()
+            print(f"Error storing image: {e}")
+            return None
+        finally:
+            session.close()
+
     def read_pic_path(self, frame_id: int) -> Optional[str]:
         """Получение пути к изображению кадра"""
         session = self.Session()
@@ -417,7 +509,7 @@ class DatabaseRepository:
                 max_number = session.query(Page.number).filter(
                     Page.project_id == project_id
                 ).order_by(Page.number.desc()).first()
-                number = 1 if not max_number else max_number[0] + 1
+                number = ordering.next_key(max_number[0] if max_number else None)
             
             new_page = Page(
                 project_id=project_id,
@@ -426,6 +518,7 @@ class DatabaseRepository:
             )
             
             session.add(new_page)
+            read_cache.invalidate_pages_after_commit(session, project_id)
             session.commit()
             return True
             
@@ -440,15 +533,26 @@ class DatabaseRepository:
         """Получение информации о странице сценария"""
         session = self.Session()
         try:
-            page = session.query(Page).filter(Page.id == page_id).first()
+            key = read_cache.page_key(page_id)
+            cached, version = read_cache.lookup(session, key)
+            if cached is not None:
+                return cached
+            
+            page = session.get(Page, page_id)
             
             if page:
-                return {
+                number = page.number
+                if ordering.is_sparse():
+                    number = session.execute(
+                        ordering.display_number_query(Page, page.project_id, page.number)
+                    ).scalar()
+                return read_cache.store(key, {
                     'page_id': page.id,
-                    'number': page.number,
+                    'number': number,
                     'text': page.text,
-                    'project_id': page.project_id
-                }
+                    'project_id': page.project_id,
+                    'revision': page.revision
+                }, version)
             return None
             
         except Exception as e:
@@ -457,8 +561,24 @@ class DatabaseRepository:
         finally:
             session.close()
 
+    def read_project_pages(self, project_id: int) -> List[Dict]:
+        """Получение всех страниц проекта по порядку"""
+        session = self.Session()
+        try:
+            pages = session.query(Page).filter(Page.project_id == project_id).order_by(Page.number).all()
+            return [
+                {'page_id': page.id, 'number': i + 1 if ordering.is_sparse() else page.number, 'text': page.text}
+                for i, page in enumerate(pages)
+            ]
+        finally:
+            session.close()
+
     def update_page_text(self, page_id: int, text: str) -> bool:
         """Изменение текста страницы сценария"""
+        return self.update_page(page_id, text=text)
+
+    def update_page(self, page_id: int, text: Optional[str] = None, number: Optional[int] = None) -> bool:
+        """Изменение текста и номера страницы сценария одной транзакцией"""
         session = self.Session()
         try:
             page = session.query(Page).filter(Page.id == page_id).first()
@@ -466,13 +586,21 @@ class DatabaseRepository:
             if not page:
                 return False
             
-            page.text = text
+            if text is not None:
+                page.text = text
+                page.revision = Page.revision + 1
+            if number is not None:
+                if ordering.is_sparse():
+                    # number is a 1-based position, only this page's key changes
+                    number = ordering.place_key(session, Page, page.project_id, page.id, number)
+                page.number = number
+            read_cache.invalidate_pages_after_commit(session, page.project_id)
             session.commit()
             return True
             
         except Exception as e:
             session.rollback()
-            print(f"Error updating page text: {e}")
+            print(f"Error updating page: {e}")
             return False
         finally:
             session.close()
@@ -490,26 +618,28 @@ class DatabaseRepository:
             project_id = page.project_id
             deleted_number = page.number
 
-            # Delete the page
+            # Delete the page (frames linked to it lose connected_page)
             session.delete(page)
-            session.commit()
-
-            # Decrement numbers of pages in the same project with number > deleted_number
-            try:
-                pages_to_update = session.query(Page).filter(
-                    Page.project_id == project_id,
-                    Page.number > deleted_number
-                ).order_by(Page.number.asc()).all()
-
-                for p in pages_to_update:
-                    p.number = p.number - 1
-
-                if pages_to_update:
-                    session.commit()
-            except Exception:
-                # If renumbering fails, rollback but don't re-create the deleted page
-                session.rollback()
+            session.flush()
+            read_cache.invalidate_pages_after_commit(session, project_id)
+            read_cache.invalidate_frames_after_commit(session, project_id)
+
+            # Sparse ordering keys: the remaining pages keep their keys
+            if not ordering.is_sparse():
+                # Сдвигаем номера последующих страниц в два шага: сначала за пределы текущего
+                # диапазона, затем на место, чтобы не нарушить UNIQUE(project_id, number) посреди UPDATE.
+                # Ошибка откатывает и удаление страницы
+                shift = ordering.next_key(
+                    session.query(func.max(Page.number)).filter(Page.project_id == project_id).scalar()
+                )
+                session.query(Page).filter(
+                    Page.project_id == project_id, Page.number > deleted_number
+                ).update({Page.number: Page.number + shift}, synchronize_session=False)
+                session.query(Page).filter(
+                    Page.project_id == project_id, Page.number > shift
+                ).update({Page.number: Page.number - shift - 1}, synchronize_session=False)
 
+            session.commit()
             return True
             
         except Exception as e:
@@ -519,26 +649,33 @@ class DatabaseRepository:
         finally:
             session.close()
 
-    def update_page_number(self, page_id: int, new_page_number: int) -> bool:
-        """Изменение номера страницы сценария"""
+    def delete_project_pages(self, project_id: int) -> int:
+        """Удаление всех страниц проекта одним запросом (возвращает число удалённых страниц или -1)"""
         session = self.Session()
         try:
-            page = session.query(Page).filter(Page.id == page_id).first()
-            
-            if not page:
-                return False
-            
-            page.number = new_page_number
+            # Кадры проекта теряют связь со страницами, как при удалении страницы по одной
+            session.query(Frame).filter(
+                Frame.project_id == project_id,
+                Frame.connected_page.isnot(None)
+            ).update({Frame.connected_page: None}, synchronize_session=False)
+            
+            deleted = session.query(Page).filter(Page.project_id == project_id).delete(synchronize_session=False)
+            read_cache.invalidate_pages_after_commit(session, project_id)
+            read_cache.invalidate_frames_after_commit(session, project_id)
             session.commit()
-            return True
+            return deleted
             
         except Exception as e:
             session.rollback()
-            print(f"Error updating page number: {e}")
-            return False
+            print(f"Error deleting project pages: {e}")
+            return -1
         finally:
             session.close()
 
+    def update_page_number(self, page_id: int, new_page_number: int) -> bool:
+        """Изменение номера страницы сценария"""
+        return self.update_page(page_id, number=new_page_number)
+
 
 
 
@@ -0,0 +1,206 @@
+from sqlalchemy import Text, case, cast, func, literal, literal_column, select, union_all
+
+from database import ordering
+from database.models import Page, Frame
+
+import bisect
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Полнотекстовый поиск по тексту страниц и описаниям кадров проекта.
+# В PostgreSQL запрос идёт по GIN-индексам над to_tsvector (миграция 0007_search_index):
+# выражение индекса и выражение запроса должны совпадать, поэтому конфигурация задана
+# константой, а не переменной окружения. На других СУБД (SQLite в тестах) документы проекта
+# индексируются в памяти на время запроса.
+SEARCH_CONFIG = 'russian'
+SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "20"))
+SEARCH_MAX_LIMIT = 100
+# Фрагмент с найденными словами: до SNIPPET_WORDS слов, найденные слова в <b>...</b>
+SNIPPET_WORDS = 20
+
+KINDS = ('page', 'frame')
+
+_CONFIG = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+_HEADLINE_OPTIONS = f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=1"
+
+
+def document(column):
+    """Выражение tsvector для столбца - то же, что в GIN-индексе"""
+    return func.to_tsvector(_CONFIG, func.coalesce(column, literal_column("''")))
+
+
+def postgres_query(project_id: int, query: str, limit: int, kinds: Iterable[str] = KINDS):
+    """
+    Запрос поиска для PostgreSQL
+
+    Документы отбираются по индексу (@@), сортируются по ts_rank_cd, и только для попавших
+    в limit строится фрагмент ts_headline (теги разметки страницы из него убираются).
+    """
+    tsquery = func.websearch_to_tsquery(_CONFIG, query)
+    parts = []
+    for kind, model, column in (('page', Page, Page.text), ('frame', Frame, Frame.description)):
+        if kind not in kinds:
+            continue
+        doc = document(column)
+        parts.append(
+            select(
+                cast(literal(kind), Text).label('kind'),
+                model.id.label('id'),
+                model.number.label('number'),
+                column.label('body'),
+                func.ts_rank_cd(doc, tsquery).label('rank'),
+            ).where(model.project_id == project_id, doc.op('@@')(tsquery))
+        )
+    hits = (parts[0] if len(parts) == 1 else union_all(*parts)).subquery()
+    top = select(hits).order_by(hits.c.rank.desc(), hits.c.kind, hits.c.number).limit(limit).subquery()
+
+    number = top.c.number
+    if ordering.is_sparse():
+        number = case(
+            (top.c.kind == 'page',
+             ordering.display_number_query(Page, project_id, top.c.number).scalar_subquery()),
+            else_=ordering.display_number_query(Frame, project_id, top.c.number).scalar_subquery()
+        )
+    plain = func.regexp_replace(func.coalesce(top.c.body, ''), '<[^>]*>', ' ', 'g')
+    return select(
+        top.c.kind, top.c.id, number.label('number'), top.c.rank,
+        func.ts_headline(_CONFIG, plain, tsquery, _HEADLINE_OPTIONS).label('snippet'),
+    ).order_by(top.c.rank.desc(), top.c.kind, top.c.number)
+
+
+_TAG = re.compile(r'<[^>]*>')
+_ENTITY = re.compile(r'&#?\w+;')
+_WORD = re.compile(r'\w+')
+
+
+def plain_text(text: Optional[str]) -> str:
+    """Текст без тегов разметки"""
+    return _TAG.sub(' ', text or '')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Слова текста в нижнем регистре (теги и HTML-сущности пропускаются)"""
+    return [word.lower() for word in _WORD.findall(_ENTITY.sub(' ', plain_text(text)))]
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс в памяти: замена GIN-индекса на СУБД без tsvector
+
+    Стемминга нет, поэтому слово запроса совпадает со словами, которые с него начинаются
+    ("кадр" находит "кадра" и "кадры"). Документ подходит, если в нём есть все слова запроса.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Tuple[str, int], int]] = {}
+        self._terms: List[str] = []
+        self._sorted = True
+        self._docs: Dict[Tuple[str, int], Tuple[int, str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, kind: str, doc_id: int, number: int, text: Optional[str]) -> None:
+        """Добавление документа (страницы или кадра)"""
+        key = (kind, doc_id)
+        words = tokenize(text)
+        self._docs[key] = (number, text or '', len(words))
+        for term, count in Counter(words).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms.append(term)
+                self._sorted = False
+            postings[key] = count
+
+    def _expand(self, word: str) -> List[str]:
+        if not self._sorted:
+            self._terms.sort()
+            self._sorted = True
+        start = bisect.bisect_left(self._terms, word)
+        end = bisect.bisect_left(self._terms, word + '\uffff')
+        return self._terms[start:end]
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT, kinds: Iterable[str] = KINDS) -> List[Dict]:
+        """
+        Поиск документов со всеми словами запроса
+
+        Returns:
+            [{'kind', 'id', 'number', 'rank', 'snippet'}] по убыванию rank
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or not self._docs:
+            return []
+        total = len(self._docs)
+        scores: Optional[Dict[Tuple[str, int], float]] = None
+        for word in words:
+            matched: Dict[Tuple[str, int], float] = {}
+            terms = self._expand(word)
+            df = len({key for term in terms for key in self._postings[term]})
+            idf = math.log(1 + total / max(df, 1))
+            for term in terms:
+                for key, count in self._postings[term].items():
+                    matched[key] = matched.get(key, 0.0) + count * idf
+            if scores is None:
+                scores = matched
+            else:
+                scores = {key: score + matched[key] for key, score in scores.items() if key in matched}
+            if not scores:
+                return []
+
+        kinds = set(kinds)
+        ranked = sorted(
+            ((score / (1 + math.log(1 + self._docs[key][2])), key) for key, score in scores.items()
+             if key[0] in kinds),
+            key=lambda item: (-item[0], item[1][0], self._docs[item[1]][0])
+        )[:limit]
+        return [
+            {
+                'kind': kind,
+                'id': doc_id,
+                'number': self._docs[(kind, doc_id)][0],
+                'rank': round(rank, 6),
+                'snippet': snippet(self._docs[(kind, doc_id)][1], words),
+            }
+            for rank, (kind, doc_id) in ranked
+        ]
+
+
+def snippet(text: str, words: List[str], size: int = SNIPPET_WORDS) -> str:
+    """Фрагмент текста вокруг первого найденного слова, найденные слова выделены <b>...</b>"""
+    plain = plain_text(text)
+    tokens = list(_WORD.finditer(plain))
+    if not tokens:
+        return ''
+    hits = [i for i, token in enumerate(tokens) if token.group().lower().startswith(tuple(words))]
+    first = hits[0] if hits else 0
+    start = max(0, min(first - size // 4, len(tokens) - size))
+    window = tokens[start:start + size]
+    parts = []
+    position = window[0].start()
+    for token in window:
+        parts.append(plain[position:token.start()])
+        if token.group().lower().startswith(tuple(words)):
+            parts.append(f"<b>{token.group()}</b>")
+        else:
+            parts.append(token.group())
+        position = token.end()
+    return ' '.join(''.join(parts).split())
+
+
+def build_index(pages: Iterable[Tuple[int, int, Optional[str]]],
+                frames: Iterable[Tuple[int, int, Optional[str]]]) -> InvertedIndex:
+    """
+    Индекс документов проекта
+
+    Args:
+        pages, frames: строки (id, порядковый номер, текст) в порядке номеров
+    """
+    index = InvertedIndex()
+    for kind, rows in (('page', pages), ('frame', frames)):
+        for position, (doc_id, number, text) in enumerate(rows, start=1):
+            index.add(kind, doc_id, position if ordering.is_sparse() else number, text)
+    return index
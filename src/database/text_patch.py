@@ -0,0 +1,48 @@
+from typing import Iterable, Tuple
+
+# Правка текста страницы: (начало, конец, вставляемый текст). Позиции считаются в единицах
+# UTF-16, как у строк в браузере, и относятся к исходному тексту (до применения правок).
+TextEdit = Tuple[int, int, str]
+
+_UNIT = 2  # байт на единицу UTF-16
+
+
+class PatchError(ValueError):
+    """Правки не подходят к исходному тексту"""
+
+
+def utf16_length(text: str) -> int:
+    """Длина строки в единицах UTF-16"""
+    return len(text.encode('utf-16-le')) // _UNIT
+
+
+def apply_edits(text: str, edits: Iterable[TextEdit]) -> str:
+    """
+    Применение правок к тексту страницы
+
+    Args:
+        text: исходный текст
+        edits: правки по возрастанию позиций, без пересечений
+
+    Returns:
+        text: текст после правок
+
+    Raises:
+        PatchError: позиция за пределами текста, правки пересекаются или разрезают
+                    суррогатную пару
+    """
+    source = (text or '').encode('utf-16-le')
+    length = len(source) // _UNIT
+    parts = []
+    position = 0
+    for start, end, insert in edits:
+        if not position <= start <= end <= length:
+            raise PatchError(f"Правка [{start}, {end}) не подходит к тексту длиной {length}")
+        parts.append(source[position * _UNIT:start * _UNIT])
+        parts.append((insert or '').encode('utf-16-le', 'surrogatepass'))
+        position = end
+    parts.append(source[position * _UNIT:])
+    try:
+        return b''.join(parts).decode('utf-16-le')
+    except UnicodeDecodeError as e:
+        raise PatchError(f"Правка разрезает символ: {e}")
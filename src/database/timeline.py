@@ -0,0 +1,175 @@
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from database.models import Frame
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Режим хранения таймлайна кадров:
+#   stored  - у каждого кадра хранятся абсолютные start_time/end_time, перестановка и удаление
+#             переписывают времена последующих кадров
+#   derived - хранится только длительность кадра (duration), абсолютные времена вычисляются
+#             префиксными суммами по кэшированному дереву Фенвика
+TIMELINE_MODE = os.getenv("TIMELINE_MODE", "stored").strip().lower()
+# Сколько секунд кэш таймлайна проекта считается актуальным (изменения из других воркеров
+# станут видны не позже этого срока)
+TIMELINE_CACHE_TTL = float(os.getenv("TIMELINE_CACHE_TTL", "30"))
+
+
+def is_derived() -> bool:
+    """Включён ли режим вычисляемого таймлайна"""
+    return TIMELINE_MODE == "derived"
+
+
+class FenwickTree:
+    """Дерево Фенвика: изменение элемента и префиксная сумма за O(log N)"""
+
+    def __init__(self, values: List[int]):
+        self.size = len(values)
+        self.tree = [0] * (self.size + 1)
+        for i, value in enumerate(values, start=1):
+            self.tree[i] += value
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, index: int, delta: int):
+        """Прибавление delta к элементу index (с 0)"""
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count: int) -> int:
+        """Сумма первых count элементов"""
+        total = 0
+        i = count
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class ProjectTimeline:
+    """Порядок и длительности кадров одного проекта"""
+
+    def __init__(self, frames: List[Tuple[int, int]]):
+        self.frame_ids = [frame_id for frame_id, _ in frames]
+        self.durations = [max(0, duration or 0) for _, duration in frames]
+        self.positions = {frame_id: i for i, frame_id in enumerate(self.frame_ids)}
+        self.tree = FenwickTree(self.durations)
+        self.loaded_at = time.monotonic()
+
+    def frame_times(self, frame_id: int) -> Optional[Tuple[int, int]]:
+        position = self.positions.get(frame_id)
+        if position is None:
+            return None
+        start = self.tree.prefix_sum(position)
+        return start, start + self.durations[position]
+
+    def set_duration(self, frame_id: int, duration: int) -> bool:
+        position = self.positions.get(frame_id)
+        if position is None:
+            return False
+        self.tree.add(position, duration - self.durations[position])
+        self.durations[position] = duration
+        return True
+
+
+class TimelineCache:
+    """Кэш таймлайнов проектов текущего процесса"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timelines: Dict[int, ProjectTimeline] = {}
+
+    def get(self, project_id: int, loader: Callable[[], List[Tuple[int, int]]]) -> ProjectTimeline:
+        with self._lock:
+            timeline = self._timelines.get(project_id)
+            if timeline is not None and time.monotonic() - timeline.loaded_at < TIMELINE_CACHE_TTL:
+                return timeline
+        timeline = ProjectTimeline(loader())
+        with self._lock:
+            self._timelines[project_id] = timeline
+        return timeline
+
+    def set_duration(self, project_id: int, frame_id: int, duration: int):
+        with self._lock:
+            timeline = self._timelines.get(project_id)
+            if timeline is not None and not timeline.set_duration(frame_id, duration):
+                del self._timelines[project_id]
+
+    def invalidate(self, project_id: int):
+        with self._lock:
+            self._timelines.pop(project_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._timelines.clear()
+
+
+timeline_cache = TimelineCache()
+
+
+def load_frame_durations(session: Session, project_id: int) -> List[Tuple[int, int]]:
+    """Пары (id кадра, длительность) проекта в порядке кадров"""
+    return [tuple(row) for row in session.execute(
+        select(Frame.id, Frame.duration).where(Frame.project_id == project_id).order_by(Frame.number)
+    )]
+
+
+def frame_times(session: Session, project_id: int, frame_id: int) -> Optional[Tuple[int, int]]:
+    """
+    Абсолютные start_time/end_time кадра по кэшированному таймлайну проекта
+
+    Args:
+        session: синхронная сессия SQLAlchemy
+        project_id: id проекта
+        frame_id: id кадра
+
+    Returns:
+        (start_time, end_time) или None, если кадра нет в проекте
+    """
+    if session.info.get('timeline_cache_ops'):
+        # В транзакции есть незафиксированные изменения таймлайна - общий кэш для неё не годится
+        return ProjectTimeline(load_frame_durations(session, project_id)).frame_times(frame_id)
+
+    timeline = timeline_cache.get(project_id, lambda: load_frame_durations(session, project_id))
+    times = timeline.frame_times(frame_id)
+    if times is None:
+        # Кадр мог появиться после загрузки кэша (например, в другом воркере)
+        timeline_cache.invalidate(project_id)
+        timeline = timeline_cache.get(project_id, lambda: load_frame_durations(session, project_id))
+        times = timeline.frame_times(frame_id)
+    return times
+
+
+# Изменения кэша применяются только после фиксации транзакции, в которой они сделаны:
+# при откате единицы работы кэш остаётся согласованным с БД
+
+def _pending(session) -> List[Callable[[], None]]:
+    return session.info.setdefault('timeline_cache_ops', [])
+
+
+def invalidate_after_commit(session, project_id: int):
+    """Сброс кэша таймлайна проекта после фиксации текущей транзакции (порядок/состав кадров изменился)"""
+    _pending(session).append(lambda: timeline_cache.invalidate(project_id))
+
+
+def set_duration_after_commit(session, project_id: int, frame_id: int, duration: int):
+    """Точечное обновление кэша после фиксации текущей транзакции (изменилась длительность кадра)"""
+    _pending(session).append(lambda: timeline_cache.set_duration(project_id, frame_id, duration))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    for operation in session.info.pop('timeline_cache_ops', []):
+        operation()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop('timeline_cache_ops', None)
@@ -0,0 +1,142 @@
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from database.async_repository import AsyncDatabaseRepository
+from database.base import SessionLocal, get_async_sessionmaker
+
+
+# Единица работы, внутри которой сейчас выполняется синхронный код моделей
+_current_uow: ContextVar[Optional["UnitOfWork"]] = ContextVar("current_uow", default=None)
+
+
+class _BoundSession:
+    """
+    Синхронная сессия единицы работы для репозитория и моделей.
+
+    commit() только сбрасывает изменения в БД (flush), close() ничего не делает:
+    транзакцию фиксирует или откатывает сама единица работы в конце запроса.
+    """
+
+    def __init__(self, uow: "UnitOfWork", session: Session):
+        self._uow = uow
+        self._session = session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    def commit(self):
+        self._session.flush()
+
+    def rollback(self):
+        self._uow.failed = True
+        self._session.rollback()
+
+    def close(self):
+        pass
+
+
+class _BoundAsyncSession:
+    """То же для AsyncDatabaseRepository: используется как `async with self.Session() as session`"""
+
+    def __init__(self, uow: "UnitOfWork"):
+        self._uow = uow
+        self._session = uow.session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def commit(self):
+        await self._session.flush()
+
+    async def rollback(self):
+        self._uow.failed = True
+        await self._session.rollback()
+
+    async def close(self):
+        pass
+
+
+class UnitOfWork:
+    """
+    Одна сессия, одно соединение и одна транзакция на весь HTTP-запрос.
+
+    Асинхронный репозиторий доступен как `uow.repo`, синхронные методы моделей
+    запускаются через `await uow.run_sync(...)` на том же соединении.
+    """
+
+    def __init__(self, session_factory=None):
+        self.session = (session_factory or get_async_sessionmaker())()
+        self.failed = False
+        self.repo = AsyncDatabaseRepository(lambda: _BoundAsyncSession(self))
+
+    async def run_sync(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Выполнение синхронного метода модели/репозитория внутри единицы работы
+
+        Args:
+            fn: вызываемый объект, открывающий сессии через get_session()
+            args, kwargs: аргументы вызова
+
+        Returns:
+            результат fn
+        """
+        def call(sync_session: Session):
+            token = _current_uow.set(self)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current_uow.reset(token)
+
+        return await self.session.run_sync(call)
+
+    async def commit(self):
+        if self.failed:
+            await self.rollback()
+            return
+        await self.session.commit()
+
+    async def rollback(self):
+        await self.session.rollback()
+
+    async def close(self):
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                await self.commit()
+            else:
+                await self.rollback()
+        finally:
+            await self.close()
+        return False
+
+
+def get_session():
+    """Сессия текущей единицы работы или новая самостоятельная сессия вне запроса"""
+    uow = _current_uow.get()
+    if uow is not None:
+        return _BoundSession(uow, uow.session.sync_session)
+    return SessionLocal()
+
+
+async def get_uow():
+    """
+    Зависимость FastAPI: единица работы на запрос.
+
+    Подключается как Depends(get_uow, scope="function"), чтобы транзакция
+    фиксировалась до отправки ответа клиенту.
+    """
+    async with UnitOfWork() as uow:
+        yield uow
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class DropAdminRequest(BaseModel):
@@ -13,10 +13,13 @@ class DeleteAdminProjectRequest(BaseModel):
 class UserInfo(BaseModel):
     login: str
     email: str | None = None
+    role: str | None = None
 
 
 class LoadUsersAccountsResponse(BaseModel):
     users: List[UserInfo]
+    # Курсор следующей страницы (after=next_after), None - страница последняя
+    next_after: Optional[int] = None
 
 
 class DeleteAccountRequest(BaseModel):
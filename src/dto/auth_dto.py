@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr
+from typing import Optional
 
 
 class LoginRequest(BaseModel):
@@ -7,7 +8,7 @@ class LoginRequest(BaseModel):
 
 
 class LoginResponse(BaseModel):
-    access_token: int
+    access_token: str
 
 
 class RegisterRequest(BaseModel):
@@ -16,4 +17,4 @@ class RegisterRequest(BaseModel):
 
 
 class LogoutRequest(BaseModel):
-    user_id: int
+    user_id: Optional[int] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict
+from typing import Dict, List
 
 
 class PageInfo(BaseModel):
@@ -20,12 +20,31 @@ class RedoPageRequest(BaseModel):
     text: str
 
 
+class RedoPageResponse(BaseModel):
+    success: bool
+    revision: int
+
+
+class TextEditInfo(BaseModel):
+    # Позиции в единицах UTF-16 относительно текста ревизии base_revision
+    start: int = Field(..., ge=0)
+    end: int = Field(..., ge=0)
+    text: str = ""
+
+
+class PatchPageRequest(BaseModel):
+    page_id: int = Field(..., gt=0)
+    base_revision: int = Field(..., ge=0)
+    edits: List[TextEditInfo]
+
+
 class NewPageResponse(BaseModel):
     page_id: int
 
 
 class LoadPageResponse(BaseModel):
     text: str
+    revision: int = 0
 
 
 class NewPageRequest(BaseModel):
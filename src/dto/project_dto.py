@@ -1,6 +1,9 @@
 # project_dto.py - полностью переписываем файл
 from pydantic import BaseModel
-from typing import List
+from typing import Dict, List
+
+from dto.frame_dto import FrameInfo
+from dto.page_dto import PageInfo
 
 
 class ProjectInfo(BaseModel):
@@ -54,4 +57,30 @@ class ConnectFramePageRequest(BaseModel):
 
 class DisconnectFramePageRequest(BaseModel):
     """Запрос на разрыв связи кадра и страницы"""
-    frame_id: int
\ No newline at end of file
+    frame_id: int
+
+
+class ProjectSnapshotResponse(BaseModel):
+    """Снимок проекта: кадры, страницы и связи кадров со страницами"""
+    project_id: int
+    project_name: str
+    frames: List[FrameInfo]
+    pages: Dict[str, PageInfo]
+    # id кадра -> id связанной страницы
+    links: Dict[str, int]
+
+
+class SearchHit(BaseModel):
+    """Найденная страница или кадр"""
+    kind: str  # page или frame
+    id: int
+    number: int
+    rank: float
+    # Фрагмент текста без разметки, найденные слова выделены <b>...</b>
+    snippet: str
+
+
+class ProjectSearchResponse(BaseModel):
+    """Результаты поиска по проекту, по убыванию релевантности"""
+    query: str
+    results: List[SearchHit]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class ProjectInfo(BaseModel):
@@ -9,6 +9,7 @@ class ProjectInfo(BaseModel):
 
 class LoadUserInfoResponse(BaseModel):
     projects: List[ProjectInfo]
+    next_after: Optional[int] = None
 
 
 class CreateProjectRequest(BaseModel):
@@ -1,15 +1,17 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import os
+from sqlalchemy import Integer, and_, bindparam, case, column, func, select, update, values
+from sqlalchemy.orm import aliased
+from database import blob_store, image_paths, media, ordering, read_cache, timeline
 from database.repository import DatabaseRepository
-from database.base import engine
+from database.unit_of_work import get_session
 from database.models import Frame
-from sqlalchemy.orm import sessionmaker
 
 
 class FrameModel:
     def __init__(self):
         self.db = DatabaseRepository()
-        self.Session = sessionmaker(bind=engine)
+        self.Session = get_session
     
     def new_frame(self, username: str, new_frame_data: Dict) -> Optional[int]:
         """
@@ -25,7 +27,7 @@ class FrameModel:
         project_id = new_frame_data.get('project_id')
         start_time = new_frame_data.get('start_time')
         end_time = new_frame_data.get('end_time')
-        pic_path = new_frame_data.get('pic_path', '')
+        pic_path = media.canonical_path(new_frame_data.get('pic_path', ''))
         description = new_frame_data.get('description')
         number = new_frame_data.get('number')
         
@@ -46,7 +48,7 @@ class FrameModel:
                 max_number = session.query(Frame.number).filter(
                     Frame.project_id == project_id
                 ).order_by(Frame.number.desc()).first()
-                new_number = 1 if not max_number else max_number[0] + 1
+                new_number = ordering.next_key(max_number[0] if max_number else None)
             else:
                 new_number = number
             
@@ -56,10 +58,15 @@ class FrameModel:
                 start_time=start_time,
                 end_time=end_time,
                 pic_path=pic_path,
-                number=new_number
+                number=new_number,
+                duration=max(0, end_time - start_time)
             )
             
             session.add(new_frame)
+            # Кадр с уже сохранённым изображением (копия) ссылается на тот же файл
+            blob_store.add_ref(session, pic_path)
+            timeline.invalidate_after_commit(session, project_id)
+            read_cache.invalidate_frames_after_commit(session, project_id)
             session.commit()
             session.refresh(new_frame)
             return new_frame.id
@@ -99,6 +106,14 @@ class FrameModel:
         pic_path = new_frame_data.get('pic_path')
         description = new_frame_data.get('description')
         
+        if timeline.is_derived() and (start_time is not None or end_time is not None):
+            # Времена не хранятся - меняются длительности кадров
+            if not self._edit_frame_duration(frame_id, start_time, end_time):
+                return False
+            if pic_path is None and description is None:
+                return True
+            start_time = end_time = None
+        
         return self.db.update_frame_info(
             frame_id=frame_id,
             start_time=start_time,
@@ -107,6 +122,140 @@ class FrameModel:
             description=description
         )
     
+    def _edit_frame_duration(self, frame_id: int, start_time: Optional[int], end_time: Optional[int]) -> bool:
+        """
+        Изменение времени кадра в режиме TIMELINE_MODE=derived
+        
+        Новый конец меняет длительность самого кадра, новое начало сдвигает границу
+        с предыдущим кадром. Последующие кадры сдвигаются автоматически.
+        
+        Args:
+            frame_id: id кадра
+            start_time: новое время начала или None
+            end_time: новое время конца или None
+        
+        Returns:
+            success: bool - успешность операции
+        """
+        session = self.Session()
+        try:
+            frame = session.get(Frame, frame_id)
+            if not frame:
+                return False
+            # Границы читаются из БД в этой транзакции: кэш таймлайна может отставать
+            # от изменений других воркеров, а записанные по нему длительности останутся в БД
+            current_start = session.query(func.coalesce(func.sum(Frame.duration), 0)).filter(
+                Frame.project_id == frame.project_id, Frame.number < frame.number
+            ).scalar()
+            current_end = current_start + frame.duration
+            
+            new_start = current_start
+            if start_time is not None and start_time != current_start:
+                previous = session.query(Frame).filter(
+                    Frame.project_id == frame.project_id, Frame.number < frame.number
+                ).order_by(Frame.number.desc()).first()
+                # Первый кадр всегда начинается с 00:00
+                if previous is not None:
+                    previous_duration = previous.duration + start_time - current_start
+                    if previous_duration < 0:
+                        return False
+                    previous.duration = previous_duration
+                    timeline.set_duration_after_commit(session, frame.project_id, previous.id, previous_duration)
+                    new_start = start_time
+            
+            new_end = end_time if end_time is not None else current_end
+            if new_end < new_start:
+                return False
+            frame.duration = new_end - new_start
+            timeline.set_duration_after_commit(session, frame.project_id, frame_id, frame.duration)
+            read_cache.invalidate_frames_after_commit(session, frame.project_id)
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            print(f"Error updating frame duration: {e}")
+            return False
+        finally:
+            session.close()
+    
+    def batch_update_times(self, updates: List[Dict]) -> Optional[Dict]:
+        """
+        Массовое обновление времён кадров одной транзакцией
+        
+        Все кадры проверяются одним SELECT, корректные изменения применяются одним UPDATE.
+        В режиме TIMELINE_MODE=derived сохраняется только длительность end_time - start_time,
+        в режиме stored - времена вместе с длительностью.
+        
+        Args:
+            updates: список словарей {frame_id: int, start_time: int, end_time: int}
+        
+        Returns:
+            result: словарь {updated_count: int, errors: список строк} или None в случае ошибки БД
+        """
+        errors = []
+        # Для повторяющегося frame_id действует последнее изменение
+        valid = {}
+        for item in updates:
+            frame_id = item['frame_id']
+            if item['start_time'] >= item['end_time']:
+                errors.append(f"Frame {frame_id}: start_time >= end_time")
+            elif item['start_time'] < 0:
+                errors.append(f"Frame {frame_id}: start_time < 0")
+            else:
+                valid[frame_id] = item
+        if not valid:
+            return {'updated_count': 0, 'errors': errors}
+        
+        session = self.Session()
+        try:
+            found = dict(session.query(Frame.id, Frame.project_id).filter(Frame.id.in_(list(valid))).all())
+            for frame_id in valid:
+                if frame_id not in found:
+                    errors.append(f"Frame {frame_id}: not found")
+            rows = [item for frame_id, item in valid.items() if frame_id in found]
+            if not rows:
+                return {'updated_count': 0, 'errors': errors}
+            
+            if timeline.is_derived():
+                params = [{'frame_id': r['frame_id'], 'duration': r['end_time'] - r['start_time']} for r in rows]
+                columns = ('duration',)
+            else:
+                params = [{'frame_id': r['frame_id'], 'start_time': r['start_time'], 'end_time': r['end_time'],
+                           'duration': r['end_time'] - r['start_time']} for r in rows]
+                columns = ('start_time', 'end_time', 'duration')
+            
+            if session.get_bind().dialect.name == 'postgresql':
+                # UPDATE ... FROM (VALUES ...) - один оператор на весь пакет
+                new_values = values(
+                    column('frame_id', Integer), *(column(name, Integer) for name in columns),
+                    name='new_values'
+                ).data([tuple(p[key] for key in ('frame_id',) + columns) for p in params])
+                session.execute(
+                    update(Frame).where(Frame.id == new_values.c.frame_id)
+                    .values({name: new_values.c[name] for name in columns}),
+                    execution_options={'synchronize_session': False}
+                )
+            else:
+                frame_table = Frame.__table__
+                session.execute(
+                    update(frame_table).where(frame_table.c.id == bindparam('frame_id'))
+                    .values({name: bindparam(name) for name in columns}),
+                    params
+                )
+            
+            for project_id in {found[r['frame_id']] for r in rows}:
+                timeline.invalidate_after_commit(session, project_id)
+                read_cache.invalidate_frames_after_commit(session, project_id)
+            session.commit()
+            session.expire_all()
+            return {'updated_count': len(rows), 'errors': errors}
+        except Exception as e:
+            session.rollback()
+            print(f"Error updating frame times: {e}")
+            return None
+        finally:
+            session.close()
+    
     def update_frame_number(self, frame_id: int, number: int) -> bool:
         """
         Обновление порядкового номера кадра
@@ -137,78 +286,161 @@ class FrameModel:
         """
         session = self.Session()
         try:
-            print(f"reorder_frames called: project_id={project_id}, frame_id={frame_id}, new_number={new_number}")
-            
-            # Получаем все кадры проекта, отсортированные по number
-            frames = session.query(Frame).filter(Frame.project_id == project_id).order_by(Frame.number).all()
-            print(f"Found {len(frames)} frames in project {project_id}")
-            
-            # Находим индекс перемещаемого кадра
-            frame_index = None
-            for i, frame in enumerate(frames):
-                if frame.id == frame_id:
-                    frame_index = i
-                    break
-            
-            if frame_index is None:
+            moved = session.query(Frame.number).filter(
+                Frame.id == frame_id, Frame.project_id == project_id
+            ).first()
+            if not moved:
                 print(f"Frame {frame_id} not found in project {project_id}")
                 return False
-            
-            # Сохраняем длительности слотов (позиции) в текущем порядке — они привязаны к таймлайну,
-            # а не к самим кадрам. При перестановке слоты остаются прежними, кадры займут их.
-            slot_durations = []
-            for fr in frames:
-                try:
-                    dur = max(0, (fr.end_time or 0) - (fr.start_time or 0))
-                except Exception:
-                    dur = 0
-                slot_durations.append(int(dur))
+            old_number = moved[0]
 
-            # Удаляем кадр из списка
-            moved_frame = frames.pop(frame_index)
-            
-            # Вставляем на новую позицию (new_number - 1, поскольку number начинается с 1)
-            new_index = new_number - 1
-            if new_index < 0:
-                new_index = 0
-            elif new_index > len(frames):
-                new_index = len(frames)
-            
-            frames.insert(new_index, moved_frame)
-            
-            # Сначала устанавливаем временные отрицательные номера, чтобы избежать UNIQUE constraint
-            for i, frame in enumerate(frames):
-                frame.number = -(i + 1)
-            session.flush()  # Применяем изменения в транзакции
-            
-            # Теперь устанавливаем финальные положительные номера
-            for i, frame in enumerate(frames):
-                frame.number = i + 1
+            timeline.invalidate_after_commit(session, project_id)
+            read_cache.invalidate_frames_after_commit(session, project_id)
+            if ordering.is_sparse():
+                success = self._move_frame_key(session, project_id, frame_id, old_number, new_number)
+                session.commit()
+                session.expire_all()
+                return success
+
+            max_number = session.query(func.max(Frame.number)).filter(
+                Frame.project_id == project_id
+            ).scalar() or 0
+            new_number = min(max(new_number, 1), max_number)
+            if new_number == old_number:
+                return True
+
+            # Затрагиваются только кадры между старой и новой позицией
+            low, high = min(old_number, new_number), max(old_number, new_number)
+            shift = 1 if new_number < old_number else -1
+            in_range = and_(Frame.project_id == project_id, Frame.number.between(low, high))
+
+            # Уводим диапазон за пределы текущих номеров, чтобы не нарушить UNIQUE(project_id, number)
+            session.execute(
+                update(Frame).where(in_range).values(number=Frame.number + max_number),
+                execution_options={'synchronize_session': False}
+            )
 
-            # Пересчитываем start_time/end_time для всех кадров, используя сохранённые длительности слотов.
-            # Длительности позиций (slot_durations) применяются к новым кадрам в порядке их появления.
-            current_start = 0
-            for i, frame in enumerate(frames):
-                dur = 0
-                if i < len(slot_durations):
-                    dur = int(slot_durations[i])
-                frame.start_time = int(current_start)
-                frame.end_time = int(current_start + dur)
-                current_start = frame.end_time
+            target = case(
+                (Frame.number == old_number + max_number, new_number),
+                else_=Frame.number - max_number + shift
+            )
+            if timeline.is_derived():
+                # Времена вычисляются по длительностям, кадр переносит свою длительность с собой
+                session.execute(
+                    update(Frame)
+                    .where(Frame.project_id == project_id,
+                           Frame.number.between(low + max_number, high + max_number))
+                    .values(number=target),
+                    execution_options={'synchronize_session': False}
+                )
+                session.commit()
+                session.expire_all()
+                return True
 
-            # Устанавливаем start_time первого кадра на 00:00
-            if frames:
-                frames[0].start_time = 0
+            # Возвращаем кадры на новые номера. Длительности слотов привязаны к таймлайну,
+            # поэтому кадр получает start_time/end_time слота, который он занял
+            slot = aliased(Frame)
+            session.execute(
+                update(Frame)
+                .where(
+                    Frame.project_id == project_id,
+                    Frame.number.between(low + max_number, high + max_number),
+                    slot.project_id == project_id,
+                    slot.number == target + max_number
+                )
+                .values(number=target, start_time=slot.start_time, end_time=slot.end_time,
+                        duration=slot.end_time - slot.start_time),
+                execution_options={'synchronize_session': False}
+            )
 
             session.commit()
-            print(f"reorder_frames: successfully reordered frames and updated times")
+            session.expire_all()
             return True
             
         except Exception as e:
             session.rollback()
-            import traceback
             print(f"Error reordering frames: {e}")
-            traceback.print_exc()
+            return False
+        finally:
+            session.close()
+    
+    def _move_frame_key(self, session, project_id: int, frame_id: int, old_key: int, new_number: int) -> bool:
+        """
+        Перемещение кадра в режиме ORDERING_MODE=sparse: меняется только ключ перемещаемого кадра
+        
+        Args:
+            session: сессия текущей операции
+            project_id: id проекта
+            frame_id: id перемещаемого кадра
+            old_key: текущий ключ кадра
+            new_number: новая позиция кадра
+        
+        Returns:
+            success: bool - успешность операции
+        """
+        new_key = ordering.place_key(session, Frame, project_id, frame_id, new_number)
+        # place_key мог перестроить ключи проекта
+        old_key = session.query(Frame.number).filter(Frame.id == frame_id).scalar()
+        low, high = min(old_key, new_key), max(old_key, new_key)
+        passed = session.query(func.count(Frame.id)).filter(
+            Frame.project_id == project_id, Frame.id != frame_id, Frame.number.between(low, high)
+        ).scalar()
+        if not passed:
+            return True
+
+        if not timeline.is_derived():
+            self._shift_frame_slots(session, project_id, frame_id, low, high, new_key > old_key)
+        session.execute(
+            update(Frame).where(Frame.id == frame_id).values(number=new_key),
+            execution_options={'synchronize_session': False}
+        )
+        return True
+
+    def _shift_frame_slots(self, session, project_id: int, frame_id: int, low: int, high: int,
+                           moving_later: bool) -> None:
+        """Сдвиг кадров между low и high на один слот таймлайна при перемещении кадра frame_id"""
+        # Кадры между старым и новым местом сдвигаются на один слот таймлайна,
+        # перемещаемый кадр занимает крайний слот диапазона
+        ranked = select(
+            Frame.id, Frame.start_time, Frame.end_time,
+            func.row_number().over(order_by=Frame.number).label('rn'),
+            func.count().over().label('cnt')
+        ).where(Frame.project_id == project_id, Frame.number.between(low, high)).subquery()
+        me, slot = ranked.alias('me'), ranked.alias('slot')
+        target = case(
+            (me.c.id == frame_id, me.c.cnt if moving_later else 1),
+            else_=me.c.rn + (-1 if moving_later else 1)
+        )
+        session.execute(
+            update(Frame)
+            .where(Frame.id == me.c.id, slot.c.rn == target)
+            .values(start_time=slot.c.start_time, end_time=slot.c.end_time,
+                    duration=slot.c.end_time - slot.c.start_time),
+            execution_options={'synchronize_session': False}
+        )
+
+    def rebalance_order(self, project_id: int, force: bool = False) -> bool:
+        """
+        Перестройка ключей порядка кадров проекта (ORDERING_MODE=sparse), когда промежутки
+        между соседними кадрами стали слишком малы. Вызывается в фоне после перемещений.
+        
+        Args:
+            project_id: id проекта
+            force: перестроить независимо от размера промежутков
+        
+        Returns:
+            success: bool - успешность операции
+        """
+        session = self.Session()
+        try:
+            if force or ordering.needs_rebalance(session, Frame, project_id):
+                ordering.rebalance(session, Frame, project_id)
+                read_cache.invalidate_frames_after_commit(session, project_id)
+                session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            print(f"Error rebalancing frame order: {e}")
             return False
         finally:
             session.close()
@@ -258,10 +490,30 @@ class FrameModel:
             project_id = frame.project_id
             deleted_number = frame.number
             
-            # Удаляем кадр
+            duration = max(0, (frame.end_time or 0) - (frame.start_time or 0))
+            
+            # Снимаем ссылку на изображение кадра и удаляем кадр
+            blob_store.release(session, [frame.pic_path])
+            image_paths.invalidate_after_commit(session, frame_id)
             session.delete(frame)
+            timeline.invalidate_after_commit(session, project_id)
+            read_cache.invalidate_frames_after_commit(session, project_id)
             session.commit()
             
+            if ordering.is_sparse():
+                # Номера последующих кадров не меняются, их время сдвигается на длительность удалённого
+                if duration and not timeline.is_derived():
+                    session.execute(
+                        update(Frame)
+                        .where(Frame.project_id == project_id, Frame.number > deleted_number)
+                        .values(start_time=Frame.start_time - duration, end_time=Frame.end_time - duration),
+                        execution_options={'synchronize_session': False}
+                    )
+                    read_cache.invalidate_frames_after_commit(session, project_id)
+                    session.commit()
+                    session.expire_all()
+                return True
+            
             # Пересчитываем номера и времена для оставшихся кадров
             frames = session.query(Frame).filter(Frame.project_id == project_id).order_by(Frame.number).all()
             
@@ -270,17 +522,20 @@ class FrameModel:
                 f.number = i + 1
             
             # Пересчитываем времена, сохраняя длительности
-            current_start = 0
-            for f in frames:
-                dur = max(0, (f.end_time or 0) - (f.start_time or 0))
-                f.start_time = current_start
-                f.end_time = current_start + dur
-                current_start = f.end_time
-            
-            # Устанавливаем start_time первого кадра на 00:00
-            if frames:
-                frames[0].start_time = 0
+            if not timeline.is_derived():
+                current_start = 0
+                for f in frames:
+                    dur = max(0, (f.end_time or 0) - (f.start_time or 0))
+                    f.start_time = current_start
+                    f.end_time = current_start + dur
+                    f.duration = dur
+                    current_start = f.end_time
+                
+                # Устанавливаем start_time первого кадра на 00:00
+                if frames:
+                    frames[0].start_time = 0
             
+            read_cache.invalidate_frames_after_commit(session, project_id)
             session.commit()
             return True
         except Exception as e:
@@ -290,6 +545,37 @@ class FrameModel:
         finally:
             session.close()
     
+    @staticmethod
+    def format_project_frames(frames: list) -> list:
+        """
+        Кадры проекта в виде для клиента
+        
+        Args:
+            frames: кортежи (id, description, start_time, end_time, duration, pic_path,
+                    connected_page, number) в порядке кадров
+        
+        Returns:
+            frames: список словарей с информацией о кадрах
+        """
+        result = []
+        elapsed = 0
+        for i, (frame_id, description, start_time, end_time, duration,
+                pic_path, connected_page, number) in enumerate(frames):
+            if timeline.is_derived():
+                # Префиксная сумма длительностей в порядке кадров
+                start_time, end_time = elapsed, elapsed + (duration or 0)
+                elapsed = end_time
+            result.append({
+                'frame_id': frame_id,
+                'description': description or '',
+                'start_time': start_time,
+                'end_time': end_time,
+                'pic_path': pic_path,
+                'connected': str(connected_page) if connected_page else '',
+                'number': i + 1 if ordering.is_sparse() else number
+            })
+        return result
+    
     def get_project_frames(self, project_id: int) -> list:
         """
         Получение всех кадров проекта
@@ -302,6 +588,11 @@ class FrameModel:
         """
         session = self.Session()
         try:
+            key = read_cache.project_frames_key(project_id)
+            cached, version = read_cache.lookup(session, key)
+            if cached is not None:
+                return cached
+            
             from database.models import Project
             # Проверяем существование проекта
             project = session.query(Project).filter(Project.id == project_id).first()
@@ -310,19 +601,11 @@ class FrameModel:
             
             frames = session.query(Frame).filter(Frame.project_id == project_id).order_by(Frame.number).all()
             
-            result = []
-            for frame in frames:
-                result.append({
-                    'frame_id': frame.id,
-                    'description': frame.description or '',
-                    'start_time': frame.start_time,
-                    'end_time': frame.end_time,
-                    'pic_path': frame.pic_path,
-                    'connected': str(frame.connected_page) if frame.connected_page else '',
-                    'number': frame.number
-                })
-            
-            return result
+            return read_cache.store(key, self.format_project_frames([
+                (frame.id, frame.description, frame.start_time, frame.end_time, frame.duration,
+                 frame.pic_path, frame.connected_page, frame.number)
+                for frame in frames
+            ]), version)
         except Exception as e:
             print(f"Error getting project frames: {e}")
             return []
@@ -340,46 +623,35 @@ class FrameModel:
             pic_path: путь к изображению кадра
         """
         pic_path = self.db.read_pic_path(frame_id)
-        if pic_path and os.path.exists(pic_path):
+        if pic_path and os.path.exists(media.absolute_path(pic_path)):
             return pic_path
         return None
     
-    def upload_frame_pic(self, frame_id: int, frame_path: str, frame_pic) -> bool:
+    def upload_frame_pic(self, frame_id: int, frame_pic, extension: str) -> Optional[str]:
         """
         Загрузка/обновление изображения кадра
         
         Args:
             frame_id: id редактируемого кадра
-            frame_path: путь к новому файлу
-            frame_pic: файл изображения кадра
+            frame_pic: полученный файл изображения (core.uploads.ReceivedUpload)
+            extension: расширение исходного файла
         
         Returns:
-            success: bool - успешность операции
+            pic_path: путь к изображению в хранилище или None в случае ошибки
         """
         try:
-            # Сохраняем изображение на сервере
-            # Предполагаем, что frame_pic - это объект файла или байты
-            if hasattr(frame_pic, 'read'):
-                # Если это файловый объект
-                with open(frame_path, 'wb') as f:
-                    f.write(frame_pic.read())
-            elif isinstance(frame_pic, bytes):
-                # Если это байты
-                with open(frame_path, 'wb') as f:
-                    f.write(frame_pic)
-            else:
-                # Если это путь к файлу
-                if os.path.exists(frame_pic):
-                    import shutil
-                    shutil.copy(frame_pic, frame_path)
-                else:
-                    return False
+            # Одинаковое содержимое хранится один раз - повторная загрузка только увеличивает счётчик ссылок
+            pic_path = self.db.store_image(frame_pic.sha256, frame_pic.size, extension)
+            if not pic_path:
+                return None
             
-            # Обновляем информацию о кадре в БД
-            return self.db.update_frame_info(frame_id, pic_path=frame_path)
+            # Обновляем информацию о кадре в БД (ссылка на старое изображение снимается)
+            if not self.db.change_pic(frame_id, pic_path):
+                return None
+            return pic_path
         except Exception as e:
             print(f"Error uploading frame picture: {e}")
-            return False
+            return None
     
     def delete_frame_pic(self, frame_id: int) -> bool:
         """
@@ -395,20 +667,13 @@ class FrameModel:
         if not frame_info:
             return False
         
-        pic_path = frame_info.get('pic_path')
-        if pic_path and os.path.exists(pic_path):
-            try:
-                # Удаляем файл изображения
-                os.remove(pic_path)
-                # В БД поле pic_path NOT NULL, поэтому не обновляем его
-                # Файл удален, но путь в БД остается (как указатель на несуществующий файл)
-                return True
-            except Exception as e:
-                print(f"Error deleting frame picture: {e}")
-                return False
+        if not frame_info.get('pic_path'):
+            # Изображения нет, считаем операцию успешной
+            return True
         
-        # Если файла нет, считаем операцию успешной
-        return True
+        # Файл может быть общим для нескольких кадров: снимаем ссылку, а файл удаляется,
+        # когда ссылок не остаётся. В БД поле pic_path NOT NULL, поэтому путь очищается
+        return self.db.change_pic(frame_id, '')
     
     def update_frame_image_path(self, frame_id: int, pic_path: str) -> bool:
         """
@@ -426,7 +691,9 @@ class FrameModel:
             frame = session.query(Frame).filter(Frame.id == frame_id).first()
             if not frame:
                 return False
-            frame.pic_path = pic_path
+            frame.pic_path = media.canonical_path(pic_path)
+            image_paths.invalidate_after_commit(session, frame_id)
+            read_cache.invalidate_frames_after_commit(session, frame.project_id)
             session.commit()
             return True
         except Exception as e:
@@ -1,5 +1,6 @@
 from typing import Optional, Dict
 import os
+from database import media
 from database.repository import DatabaseRepository
 
 
@@ -22,45 +23,32 @@ class GraphicEditorModel:
             return None
         
         pic_path = frame_info.get('pic_path')
-        if pic_path and os.path.exists(pic_path):
+        if pic_path and os.path.exists(media.absolute_path(pic_path)):
             return pic_path
         return None
     
-    def upload_pic(self, frame_id: int, frame_path: str, frame_pic) -> bool:
+    def upload_pic(self, frame_id: int, frame_pic, extension: str) -> Optional[str]:
         """
         Загрузка/обновление изображения кадра
         
         Args:
             frame_id: id редактируемого кадра
-            frame_path: путь к новому файлу
-            frame_pic: файл изображения кадра
+            frame_pic: полученный файл изображения (core.uploads.ReceivedUpload)
+            extension: расширение исходного файла
         
         Returns:
-            success: bool - успешность операции
+            pic_path: путь к изображению в хранилище или None в случае ошибки
         """
         try:
-            # Сохраняем изображение на сервере
-            # Предполагаем, что frame_pic - это объект файла или байты
-            if hasattr(frame_pic, 'read'):
-                # Если это файловый объект
-                with open(frame_path, 'wb') as f:
-                    f.write(frame_pic.read())
-            elif isinstance(frame_pic, bytes):
-                # Если это байты
-                with open(frame_path, 'wb') as f:
-                    f.write(frame_pic)
-            else:
-                # Если это путь к файлу
-                if os.path.exists(frame_pic):
-                    import shutil
-                    # Создаем директорию, если её нет
-                    os.makedirs(os.path.dirname(frame_path), exist_ok=True)
-                    shutil.copy(frame_pic, frame_path)
-                else:
-                    return False
+            # Одинаковое содержимое хранится один раз - повторная загрузка только увеличивает счётчик ссылок
+            pic_path = self.db.store_image(frame_pic.sha256, frame_pic.size, extension)
+            if not pic_path:
+                return None
             
-            # Обновляем информацию о кадре в БД
-            return self.db.update_frame_info(frame_id, pic_path=frame_path)
+            # Обновляем информацию о кадре в БД (ссылка на старое изображение снимается)
+            if not self.db.change_pic(frame_id, pic_path):
+                return None
+            return pic_path
         except Exception as e:
             print(f"Error uploading picture: {e}")
-            return False
\ No newline at end of file
+            return None
\ No newline at end of file
@@ -1,14 +1,14 @@
 from typing import Optional, Dict
+from database import ordering, read_cache
 from database.repository import DatabaseRepository
-from database.base import engine
+from database.unit_of_work import get_session
 from database.models import Page, Project
-from sqlalchemy.orm import sessionmaker
 
 
 class PageModel:
     def __init__(self):
         self.db = DatabaseRepository()
-        self.Session = sessionmaker(bind=engine)
+        self.Session = get_session
     
     def new_page(self, project_id: int, number: Optional[int] = None, text: Optional[str] = None) -> Optional[int]:
         """
@@ -34,7 +34,7 @@ class PageModel:
                 max_number = session.query(Page.number).filter(
                     Page.project_id == project_id
                 ).order_by(Page.number.desc()).first()
-                number = 1 if not max_number else max_number[0] + 1
+                number = ordering.next_key(max_number[0] if max_number else None)
             
             new_page = Page(
                 project_id=project_id,
@@ -43,6 +43,7 @@ class PageModel:
             )
             
             session.add(new_page)
+            read_cache.invalidate_pages_after_commit(session, project_id)
             session.commit()
             session.refresh(new_page)
             return new_page.id
@@ -80,17 +81,11 @@ class PageModel:
         text = new_page_data.get('text')
         page_number = new_page_data.get('number')
         
-        success = True
+        if text is None and page_number is None:
+            return True
         
-        # Обновляем текст страницы, если передан
-        if text is not None:
-            success = self.db.update_page_text(page_id, text) and success
-        
-        # Обновляем номер страницы, если передан
-        if page_number is not None:
-            success = self.db.update_page_number(page_id, page_number) and success
-        
-        return success
+        # Текст и номер меняются одной транзакцией
+        return self.db.update_page(page_id, text=text, number=page_number)
     
     def delete_page(self, page_id: int) -> bool:
         """
@@ -1,15 +1,15 @@
 from typing import Optional
+from database import read_cache
 from database.repository import DatabaseRepository
-from database.base import engine
+from database.unit_of_work import get_session
 from database.models import Page, Frame
-from sqlalchemy.orm import sessionmaker
 import os
 
 
 class ProjectModel:
     def __init__(self):
         self.db = DatabaseRepository()
-        self.Session = sessionmaker(bind=engine)
+        self.Session = get_session
     
     def new_project(self, username: str, project_name: str) -> Optional[int]:
         """
@@ -91,23 +91,8 @@ class ProjectModel:
         Returns:
             success: bool - успешность операции
         """
-        session = self.Session()
-        try:
-            # Находим все страницы проекта
-            pages = session.query(Page).filter(Page.project_id == project_id).all()
-            
-            # Удаляем каждую страницу
-            for page in pages:
-                success = self.db.delete_page(page.id)
-                if not success:
-                    return False
-            
-            return True
-        except Exception as e:
-            print(f"Error deleting script: {e}")
-            return False
-        finally:
-            session.close()
+        # Страницы удаляются одним запросом: перенумеровывать оставшиеся не нужно
+        return self.db.delete_project_pages(project_id) >= 0
     
     def delete_frames(self, project_id: int) -> bool:
         """
@@ -119,23 +104,8 @@ class ProjectModel:
         Returns:
             success: bool - успешность операции
         """
-        session = self.Session()
-        try:
-            # Находим все кадры проекта
-            frames = session.query(Frame).filter(Frame.project_id == project_id).all()
-            
-            # Удаляем каждый кадр (метод delete_frame уже удаляет изображения)
-            for frame in frames:
-                success = self.db.delete_frame(frame.id)
-                if not success:
-                    return False
-            
-            return True
-        except Exception as e:
-            print(f"Error deleting frames: {e}")
-            return False
-        finally:
-            session.close()
+        # Кадры удаляются одним запросом, ссылки на их изображения снимаются в той же транзакции
+        return self.db.delete_project_frames(project_id) >= 0
     
     def connect_fp(self, frame_id: int, page_id: int) -> bool:
         """
@@ -173,6 +143,7 @@ class ProjectModel:
                 return False
             
             frame.connected_page = page_id
+            read_cache.invalidate_frames_after_commit(session, frame.project_id)
             session.commit()
             return True
         except Exception as e:
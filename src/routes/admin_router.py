@@ -1,47 +1,47 @@
-from fastapi import APIRouter, HTTPException, status, Request, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, status, Request, Depends, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from dto.admin_dto import (
     DropAdminRequest, DeleteAdminProjectRequest, LoadUsersAccountsResponse,
     UserInfo, DeleteAccountRequest, UpgradeAccountRequest
 )
 from user_models.admin_model import AdminModel
+from user_models import sessions
+from user_models.sessions import SessionInfo
 from project_data_models.project_model import ProjectModel
-from database.repository import DatabaseRepository
-from database.base import engine
-from database.models import User
-from sqlalchemy.orm import sessionmaker
+from core import io_pool
+from core.auth import require_session
+from database import blob_store, orphan_gc, read_cache
+from database.async_repository import AsyncDatabaseRepository
+from database.base import get_pool_metrics
+from database.unit_of_work import UnitOfWork, get_uow
+from typing import Optional
+import json
 import os
 
 router = APIRouter()
 admin_model = AdminModel()
 project_model = ProjectModel()
-db_repo = DatabaseRepository()
-Session = sessionmaker(bind=engine)
 
 
-def require_admin(request: Request):
-    """Dependency: allow only users with role 'admin'."""
-    login = request.cookies.get('pt_login')
-    if not login:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Не авторизован")
-    user_info = db_repo.read_user_info(login)
-    if not user_info or user_info.get('role') != 'admin':
+async def require_admin(session: SessionInfo = Depends(require_session)):
+    """Dependency: allow only users with role 'admin' (role is taken from the session)."""
+    if session.role != 'admin':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Доступ запрещён")
-    return login
+    return session.login
 
 @router.delete("/api/admin/dropAdmin")
-async def drop_admin(request: DropAdminRequest, admin_login: str = Depends(require_admin)):
+async def drop_admin(request: DropAdminRequest, admin_login: str = Depends(require_admin), uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Снятие роли администратора"""
     try:
         # Проверяем существование пользователя
-        if not db_repo.user_exist(request.login):
+        if not await uow.repo.user_exist(request.login):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
             )
         
         # Получаем информацию о пользователе
-        user_info = db_repo.read_user_info(request.login)
+        user_info = await uow.repo.read_user_info(request.login)
         if user_info and user_info.get('role') != 'admin':
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -49,20 +49,22 @@ async def drop_admin(request: DropAdminRequest, admin_login: str = Depends(requi
             )
         
         # Получаем ID пользователя
-        user_id = db_repo.get_user_id_by_login(request.login)
+        user_id = await uow.repo.get_user_id_by_login(request.login)
         if not user_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
             )
         
-        success = admin_model.remove_admin_role(user_id)
+        success = await uow.run_sync(admin_model.remove_admin_role, user_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при снятии роли администратора"
             )
         
+        # Открытые сессии пользователя теряют права администратора, как только роль зафиксирована
+        sessions.update_role_after_commit(uow.session, request.login, 'user')
         return {"success": True}
     except HTTPException:
         raise
@@ -74,18 +76,18 @@ async def drop_admin(request: DropAdminRequest, admin_login: str = Depends(requi
 
 
 @router.delete("/api/admin/project/deleteProject")
-async def admin_delete_project(request: DeleteAdminProjectRequest, admin_login: str = Depends(require_admin)):
+async def admin_delete_project(request: DeleteAdminProjectRequest, admin_login: str = Depends(require_admin), uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление админом проекта"""
     try:
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(request.project_id)
+        project_info = await uow.repo.read_project_info(request.project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Проект не найден"
             )
         
-        success = project_model.delete_project(request.project_id)
+        success = await uow.run_sync(project_model.delete_project, request.project_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -103,23 +105,31 @@ async def admin_delete_project(request: DeleteAdminProjectRequest, admin_login:
 
 
 @router.get("/api/admin/user/loadUsersAccounts", response_model=LoadUsersAccountsResponse)
-async def load_users_accounts(admin_login: str = Depends(require_admin)):
-    """Загрузка аккаунтов всех пользователей веб-приложения"""
+async def load_users_accounts(
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[int] = Query(None, ge=0),
+    login_prefix: Optional[str] = Query(None, max_length=50),
+    role: Optional[str] = Query(None, max_length=20),
+    admin_login: str = Depends(require_admin),
+    uow: UnitOfWork = Depends(get_uow, scope="function")
+):
+    """Загрузка страницы аккаунтов пользователей веб-приложения (следующая страница - after=next_after)"""
     try:
-        session = Session()
-        try:
-            users = session.query(User).all()
-            
-            if not users:
-                raise HTTPException(
-                    status_code=status.HTTP_204_NO_CONTENT,
-                    detail="Пользователи не найдены"
-                )
-            
-            user_list = [UserInfo(login=user.login, email=user.email if hasattr(user, 'email') else None) for user in users]
-            return LoadUsersAccountsResponse(users=user_list)
-        finally:
-            session.close()
+        users = await uow.repo.read_users_page(limit + 1, after_id=after, login_prefix=login_prefix, role=role)
+        
+        if not users and after is None and not login_prefix and not role:
+            raise HTTPException(
+                status_code=status.HTTP_204_NO_CONTENT,
+                detail="Пользователи не найдены"
+            )
+        
+        next_after = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_after = users[-1]['user_id']
+        
+        user_list = [UserInfo(login=user['username'], role=user['role']) for user in users]
+        return LoadUsersAccountsResponse(users=user_list, next_after=next_after)
     except HTTPException:
         raise
     except Exception as e:
@@ -129,12 +139,32 @@ async def load_users_accounts(admin_login: str = Depends(require_admin)):
         )
 
 
+@router.get("/api/admin/user/exportUsersAccounts")
+async def export_users_accounts(
+    login_prefix: Optional[str] = Query(None, max_length=50),
+    role: Optional[str] = Query(None, max_length=20),
+    admin_login: str = Depends(require_admin)
+):
+    """
+    Выгрузка аккаунтов пользователей в NDJSON (одна строка JSON на пользователя)
+
+    Строки отдаются по мере чтения серверным курсором, поэтому память не растёт с числом
+    пользователей. Выгрузка идёт в своей сессии: сессия запроса закрывается до начала ответа.
+    """
+    async def lines():
+        async for user in AsyncDatabaseRepository().stream_users(login_prefix=login_prefix, role=role):
+            yield json.dumps({'login': user['username'], 'role': user['role']}, ensure_ascii=False) + "\n"
+    
+    # Ошибки чтения возникают уже во время отдачи ответа, когда статус отправлен
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.delete("/api/admin/user/deleteAccount")
-async def admin_delete_account(request: DeleteAccountRequest, admin_login: str = Depends(require_admin)):
+async def admin_delete_account(request: DeleteAccountRequest, admin_login: str = Depends(require_admin), uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление админом пользователя"""
     try:
         # Проверяем существование пользователя
-        if not db_repo.user_exist(request.login):
+        if not await uow.repo.user_exist(request.login):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
@@ -143,13 +173,14 @@ async def admin_delete_account(request: DeleteAccountRequest, admin_login: str =
         # TODO: Добавить проверку, что нельзя удалить самого себя
         # Для этого нужно получать текущего пользователя из токена
         
-        success = admin_model.delete_user(request.login)
+        success = await uow.run_sync(admin_model.delete_user, request.login)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при удалении пользователя"
             )
         
+        sessions.revoke_user_after_commit(uow.session, request.login)
         return {"success": True}
     except HTTPException:
         raise
@@ -161,18 +192,18 @@ async def admin_delete_account(request: DeleteAccountRequest, admin_login: str =
 
 
 @router.post("/api/admin/user/upgradeAccount")
-async def upgrade_account(request: UpgradeAccountRequest, admin_login: str = Depends(require_admin)):
+async def upgrade_account(request: UpgradeAccountRequest, admin_login: str = Depends(require_admin), uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Повышение пользователя до администратора"""
     try:
         # Проверяем существование пользователя
-        if not db_repo.user_exist(request.login):
+        if not await uow.repo.user_exist(request.login):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
             )
         
         # Проверяем, не является ли пользователь уже администратором
-        user_info = db_repo.read_user_info(request.login)
+        user_info = await uow.repo.read_user_info(request.login)
         if user_info and user_info.get('role') == 'admin':
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -180,20 +211,21 @@ async def upgrade_account(request: UpgradeAccountRequest, admin_login: str = Dep
             )
         
         # Получаем ID пользователя
-        user_id = db_repo.get_user_id_by_login(request.login)
+        user_id = await uow.repo.get_user_id_by_login(request.login)
         if not user_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
             )
         
-        success = admin_model.give_admin_role(user_id)
+        success = await uow.run_sync(admin_model.give_admin_role, user_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при повышении до администратора"
             )
         
+        sessions.update_role_after_commit(uow.session, request.login, 'admin')
         return {"success": True}
     except HTTPException:
         raise
@@ -204,6 +236,67 @@ async def upgrade_account(request: UpgradeAccountRequest, admin_login: str = Dep
         )
 
 
+@router.get("/api/admin/dbPoolMetrics")
+async def load_db_pool_metrics(admin_login: str = Depends(require_admin)):
+    """Метрики пула соединений с БД текущего процесса"""
+    try:
+        return get_pool_metrics()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
+@router.get("/api/admin/readCacheMetrics")
+async def load_read_cache_metrics(admin_login: str = Depends(require_admin)):
+    """Счётчики кэша чтения проектов, кадров и страниц текущего процесса"""
+    try:
+        return read_cache.get_stats()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
+@router.get("/api/admin/ioPoolMetrics")
+async def load_io_pool_metrics(admin_login: str = Depends(require_admin)):
+    """Метрики пула файловых операций текущего процесса"""
+    try:
+        return io_pool.get_metrics()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
+@router.get("/api/admin/sessionMetrics")
+async def load_session_metrics(admin_login: str = Depends(require_admin)):
+    """Счётчики хранилища сессий текущего процесса"""
+    try:
+        return sessions.get_stats()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
+@router.post("/api/admin/collectOrphans")
+async def collect_orphans(admin_login: str = Depends(require_admin)):
+    """Проход сборщика неиспользуемых файлов загрузок и состояние очереди удаления"""
+    try:
+        result = await io_pool.run(orphan_gc.collect_now)
+        return {**result, 'removals': blob_store.removal_stats()}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
 @router.get("/admin_test")
 async def load_start_page():
     current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -221,19 +314,9 @@ async def load_start_page():
 
 
 @router.get("/admin/admin.html")
-async def load_admin_page(request: Request):
+async def load_admin_page(admin_login: str = Depends(require_admin)):
     """Serve admin page only to users with role 'admin'."""
     try:
-        # Try to read login from cookies (set by client on login)
-        login = request.cookies.get('pt_login')
-        if not login:
-            # No login cookie — deny
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Не авторизован")
-
-        user_info = db_repo.read_user_info(login)
-        if not user_info or user_info.get('role') != 'admin':
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Доступ запрещён")
-
         current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         file_path = os.path.join(current_dir, "private", "admin", "admin.html")
         return FileResponse(path=file_path)
@@ -1,21 +1,26 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Request, Response
 from fastapi.responses import FileResponse
 from dto.auth_dto import LoginRequest, LoginResponse, RegisterRequest, LogoutRequest
 from user_models.auth_model import AuthModel
+from core.auth import clear_session_cookie, session_token, set_session_cookie
+from database.async_repository import AsyncDatabaseRepository
 import os
 
 router = APIRouter()
 auth_model = AuthModel()
+# Вход и регистрация идут мимо единицы работы запроса: каждый запрос к БД - своя короткая
+# транзакция, и соединение из пула не занято, пока в пуле потоков считается хэш пароля
+auth_repo = AsyncDatabaseRepository()
 
 
 @router.post("/api/auth/login", response_model=LoginResponse)
-async def login(request: LoginRequest):
+async def login(request: LoginRequest, response: Response):
     """Вход пользователя в свой аккаунт"""
     try:
-        result = auth_model.login(request.login, request.password)
+        result = await auth_model.login_async(auth_repo, request.login, request.password)
         
-        # Если результат < 1000, это код ошибки
-        if result < 1000:
+        # Число - код ошибки, строка - токен сессии
+        if isinstance(result, int):
             if result == 1:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -27,6 +32,7 @@ async def login(request: LoginRequest):
                     detail="Неверный логин или пароль"
                 )
         
+        set_session_cookie(response, result)
         return LoginResponse(access_token=result)
     except HTTPException:
         raise
@@ -38,10 +44,10 @@ async def login(request: LoginRequest):
 
 
 @router.post("/api/auth/register", status_code=status.HTTP_201_CREATED)
-async def register(request: RegisterRequest):
+async def register(request: RegisterRequest, response: Response):
     """Регистрация пользователя"""
     try:
-        result = auth_model.register(request.login, request.password)
+        result = await auth_model.register_async(auth_repo, request.login, request.password)
         
         if result is None:
             raise HTTPException(
@@ -49,6 +55,7 @@ async def register(request: RegisterRequest):
                 detail="Пользователь с таким логином или email уже существует"
             )
         
+        set_session_cookie(response, result)
         return {"message": "Пользователь создан", "access_token": result}
     except HTTPException:
         raise
@@ -60,10 +67,11 @@ async def register(request: RegisterRequest):
 
 
 @router.post("/api/auth/logout")
-async def logout(request: LogoutRequest):
+async def logout(request: LogoutRequest, http_request: Request, response: Response):
     """Выход пользователя из своего аккаунта"""
-    # В текущей реализации токены не хранятся на сервере,
-    # поэтому logout просто возвращает успех
+    # Сессия отзывается сразу; повторный выход тоже успешен
+    auth_model.logout(session_token(http_request))
+    clear_session_cookie(response)
     return {"success": True, "message": "Выход выполнен успешно"}
 
 
@@ -1,6 +1,5 @@
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
-import shutil
+from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from dto.frame_dto import (
     DragAndDropFrameRequest, DeleteImageRequest, FrameInfo, LoadFramesResponse,
     RedoStartTimeRequest, RedoEndTimeRequest, NewFrameRequest, NewFrameResponse,
@@ -9,22 +8,27 @@ from dto.frame_dto import (
 )
 from project_data_models.frame_model import FrameModel
 from project_data_models.project_model import ProjectModel
-from database.repository import DatabaseRepository
+from database import blob_store, image_paths, media, ordering
+from database.unit_of_work import UnitOfWork, get_uow
+from core import archive, http_cache, images, io_pool
+from core.uploads import place_upload, receive_image_form, remove_upload
+import asyncio
+import hashlib
 import os
 import uuid
+from typing import List, Optional
 
 router = APIRouter()
 frame_model = FrameModel()
 project_model = ProjectModel()
-db_repo = DatabaseRepository()
 
 
 @router.post("/api/frame/dragAndDropFrame")
-async def drag_and_drop_frame(request: DragAndDropFrameRequest):
+async def drag_and_drop_frame(request: DragAndDropFrameRequest, background_tasks: BackgroundTasks, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Перетаскивание кадра в списке кадров"""
     try:
         # Получаем информацию о кадре
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -36,12 +40,16 @@ async def drag_and_drop_frame(request: DragAndDropFrameRequest):
         # Для простоты, добавим метод в model
         
         # Реализуем логику изменения номера кадра и пересчета номеров других кадров
-        success = frame_model.reorder_frames_by_frame_id(request.frame_id, request.frame_number)
+        success = await uow.run_sync(frame_model.reorder_frames_by_frame_id, request.frame_id, request.frame_number)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при изменении порядка кадров"
             )
+
+        if ordering.is_sparse():
+            # Перестройка ключей порядка в фоне, если промежутки между кадрами почти исчерпаны
+            background_tasks.add_task(frame_model.rebalance_order, frame_info['project_id'])
         
         return {"success": True}
     except HTTPException:
@@ -54,11 +62,11 @@ async def drag_and_drop_frame(request: DragAndDropFrameRequest):
 
 
 @router.post("/api/frame/updateNumber")
-async def update_frame_number(request: DragAndDropFrameRequest):
+async def update_frame_number(request: DragAndDropFrameRequest, background_tasks: BackgroundTasks, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Обновление порядкового номера одного кадра (использует reorder для избежания конфликта unique constraint)"""
     try:
         print(f"update_frame_number called: {request.frame_id} -> {request.frame_number}")
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -66,13 +74,17 @@ async def update_frame_number(request: DragAndDropFrameRequest):
             )
 
         # Используем reorder_frames_by_frame_id для корректного обновления с учётом UNIQUE constraint
-        success = frame_model.reorder_frames_by_frame_id(request.frame_id, request.frame_number)
+        success = await uow.run_sync(frame_model.reorder_frames_by_frame_id, request.frame_id, request.frame_number)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при обновлении номера кадра"
             )
 
+        if ordering.is_sparse():
+            # Перестройка ключей порядка в фоне, если промежутки между кадрами почти исчерпаны
+            background_tasks.add_task(frame_model.rebalance_order, frame_info['project_id'])
+        
         return {"success": True}
     except HTTPException:
         raise
@@ -84,18 +96,18 @@ async def update_frame_number(request: DragAndDropFrameRequest):
 
 
 @router.get("/api/frame/{project_id}/loadFrames", response_model=LoadFramesResponse)
-async def load_frames(project_id: int):
+async def load_frames(project_id: int, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Загрузка кадров проекта пользователя"""
     try:
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(project_id)
+        project_info = await uow.repo.read_project_info(project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Проект не найден"
             )
         
-        frames = frame_model.get_project_frames(project_id)
+        frames = await uow.run_sync(frame_model.get_project_frames, project_id)
         
         if not frames:
             raise HTTPException(
@@ -115,10 +127,10 @@ async def load_frames(project_id: int):
 
 
 @router.post("/api/frame/redoStartTime")
-async def redo_start_time(request: RedoStartTimeRequest):
+async def redo_start_time(request: RedoStartTimeRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Изменение начала времени кадра"""
     try:
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -132,7 +144,7 @@ async def redo_start_time(request: RedoStartTimeRequest):
                 detail="Новое время начала позже времени конца кадра"
             )
         
-        success = frame_model.edit_frame_info(request.frame_id, {'start_time': request.start_time})
+        success = await uow.run_sync(frame_model.edit_frame_info, request.frame_id, {'start_time': request.start_time})
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -150,10 +162,10 @@ async def redo_start_time(request: RedoStartTimeRequest):
 
 
 @router.post("/api/frame/redoEndTime")
-async def redo_end_time(request: RedoEndTimeRequest):
+async def redo_end_time(request: RedoEndTimeRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Изменение конца времени кадра"""
     try:
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -167,7 +179,7 @@ async def redo_end_time(request: RedoEndTimeRequest):
                 detail="Новое время конца раньше времени начала кадра"
             )
         
-        success = frame_model.edit_frame_info(request.frame_id, {'end_time': request.end_time})
+        success = await uow.run_sync(frame_model.edit_frame_info, request.frame_id, {'end_time': request.end_time})
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -189,10 +201,10 @@ async def redo_end_time(request: RedoEndTimeRequest):
 
 # New: get frame info by frame_id (used by GraphicEditor to determine parent project)
 @router.get("/api/frame/{frame_id}/info")
-async def get_frame_info(frame_id: int):
+async def get_frame_info(frame_id: int, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Возвращает информацию о кадре по его идентификатору"""
     try:
-        frame_info = frame_model.get_frame_info(frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -209,7 +221,7 @@ async def get_frame_info(frame_id: int):
 
 # Original implementation continues below
 @router.post("/api/frame/newFrame", status_code=status.HTTP_201_CREATED, response_model=NewFrameResponse)
-async def new_frame(request: NewFrameRequest):
+async def new_frame(request: NewFrameRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Создание кадра в раскадровке"""
     try:
         # Debug: log incoming request
@@ -226,7 +238,7 @@ async def new_frame(request: NewFrameRequest):
             )
         
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(request.project_id)
+        project_info = await uow.repo.read_project_info(request.project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -243,7 +255,7 @@ async def new_frame(request: NewFrameRequest):
             'connected': request.connected
         }
         
-        frame_id = frame_model.new_frame("", frame_data)  # username не используется в new_frame
+        frame_id = await uow.run_sync(frame_model.new_frame, "", frame_data)  # username не используется в new_frame
         
         if frame_id is None:
             raise HTTPException(
@@ -253,7 +265,7 @@ async def new_frame(request: NewFrameRequest):
         
         # Если указан connected (page_id), связываем кадр со страницей
         if request.connected is not None:
-            project_model.connect_fp(frame_id, request.connected)
+            await uow.run_sync(project_model.connect_fp, frame_id, request.connected)
         
         return NewFrameResponse(frame_id=frame_id)
     except HTTPException:
@@ -268,17 +280,17 @@ async def new_frame(request: NewFrameRequest):
 
 
 @router.delete("/api/frame/deleteFrame")
-async def delete_frame(request: DeleteFrameRequest):
+async def delete_frame(request: DeleteFrameRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление кадра из раскадровки"""
     try:
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Кадр не найден"
             )
         
-        success = frame_model.delete_frame(request.frame_id)
+        success = await uow.run_sync(frame_model.delete_frame, request.frame_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -296,7 +308,7 @@ async def delete_frame(request: DeleteFrameRequest):
 
 
 @router.post("/api/frame/redoDescription")
-async def redo_description(request: RedoDescriptionRequest):
+async def redo_description(request: RedoDescriptionRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Изменение описания кадра"""
     try:
         if not request.description:
@@ -305,14 +317,14 @@ async def redo_description(request: RedoDescriptionRequest):
                 detail="Пустое описание"
             )
         
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Кадр не найден"
             )
         
-        success = frame_model.edit_frame_info(request.frame_id, {'description': request.description})
+        success = await uow.run_sync(frame_model.edit_frame_info, request.frame_id, {'description': request.description})
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -330,52 +342,43 @@ async def redo_description(request: RedoDescriptionRequest):
 
 
 @router.post("/api/frame/uploadImage")
-async def upload_image(frame_id: int = Form(...), picture: UploadFile = File(...)):
-    """Загрузка изображения"""
+async def upload_image(request: Request, uow: UnitOfWork = Depends(get_uow, scope="function")):
+    """Загрузка изображения (форма: frame_id, picture)"""
     try:
+        # Форма разбирается из тела запроса потоково: файл пишется на диск один раз,
+        # размер и формат проверяются по ходу приёма
+        form = await receive_image_form(request, 'picture', blob_store.blob_dir())
+        received = form.file
+        
         # Проверяем существование кадра
-        frame_info = frame_model.get_frame_info(frame_id)
+        frame_id = form.fields.get('frame_id', '')
+        frame_info = await uow.run_sync(frame_model.get_frame_info, int(frame_id)) if frame_id.isdigit() else None
         if not frame_info:
+            await remove_upload(received.tmp_path)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Кадр не найден"
             )
+        frame_id = int(frame_id)
         
-        # Проверяем формат файла
-        if picture.content_type not in ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Неподдерживаемый формат изображения"
-            )
-        
-        # Создаем директорию для загрузок, если её нет
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Генерируем путь к файлу
-        file_extension = os.path.splitext(picture.filename)[1] or '.jpg'
-        file_path = os.path.join(upload_dir, f"frame_{frame_id}_{uuid.uuid4()}{file_extension}")
-        
-        # Сохраняем файл
-        content = await picture.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="Слишком большой размер файла"
-            )
-        
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        # Расширение исходного файла нужно только для имени нового файла в хранилище
+        file_extension = os.path.splitext(form.filename)[1] or '.jpg'
         
-        # Обновляем путь к изображению в БД
-        success = frame_model.upload_frame_pic(frame_id, file_path, content)
-        if not success:
+        # Сохраняем в хранилище по содержимому и обновляем путь к изображению в БД
+        pic_path = await uow.run_sync(frame_model.upload_frame_pic, frame_id, received, file_extension)
+        if not pic_path:
+            await remove_upload(received.tmp_path)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при сохранении изображения"
             )
         
-        return {"success": True, "path": file_path}
+        # Модель добавила ссылку в БД; файл переносится в хранилище в пуле файловых операций
+        await place_upload(received, pic_path)
+        
+        # Уменьшенные копии строятся в фоне, оригинал уже доступен
+        images.submit_variants(media.absolute_path(pic_path))
+        return {"success": True, "path": pic_path}
     except HTTPException:
         raise
     except Exception as e:
@@ -386,11 +389,11 @@ async def upload_image(frame_id: int = Form(...), picture: UploadFile = File(...
 
 
 @router.post("/api/frame/connectFrame")
-async def connect_frame(request: ConnectFrameRequest):
+async def connect_frame(request: ConnectFrameRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Связь кадра и страницы"""
     try:
         # Проверяем существование кадра
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -398,35 +401,21 @@ async def connect_frame(request: ConnectFrameRequest):
             )
         
         # Проверяем существование страницы
-        from database.repository import DatabaseRepository
-        db = DatabaseRepository()
-        page_info = db.read_page_info(request.page_id)
+        page_info = await uow.repo.read_page_info(request.page_id)
         if not page_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Страница не найдена"
             )
         
-        # Получаем project_id кадра из БД
-        from database.base import engine
-        from database.models import Frame
-        from sqlalchemy.orm import sessionmaker
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        try:
-            frame_obj = session.query(Frame).filter(Frame.id == request.frame_id).first()
-            frame_project_id = frame_obj.project_id if frame_obj else None
-        finally:
-            session.close()
-        
         # Проверяем, что кадр и страница принадлежат одному проекту
-        if frame_project_id != page_info.get('project_id'):
+        if frame_info.get('project_id') != page_info.get('project_id'):
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Невозможно связать кадр со страницей из другого проекта"
             )
         
-        success = project_model.connect_fp(request.frame_id, request.page_id)
+        success = await uow.run_sync(project_model.connect_fp, request.frame_id, request.page_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -444,17 +433,17 @@ async def connect_frame(request: ConnectFrameRequest):
 
 
 @router.post("/api/frame/disconnectFrame")
-async def disconnect_frame(request: DisconnectFrameRequest):
+async def disconnect_frame(request: DisconnectFrameRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление связи кадра и страницы"""
     try:
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Кадр не найден"
             )
         
-        success = project_model.disconnect_fp(request.frame_id)
+        success = await uow.run_sync(project_model.disconnect_fp, request.frame_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -472,40 +461,23 @@ async def disconnect_frame(request: DisconnectFrameRequest):
 
 
 @router.post("/api/frame/batchUpdateTimes")
-async def batch_update_times(request: BatchUpdateTimesRequest):
+async def batch_update_times(request: BatchUpdateTimesRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Массовое обновление времён нескольких кадров за один запрос"""
     try:
-        errors = []
-        success_count = 0
-        
-        for update in request.updates:
-            # Проверяем валидность времени
-            if update.start_time >= update.end_time:
-                errors.append(f"Frame {update.frame_id}: start_time >= end_time")
-                continue
-            
-            # Проверяем существование кадра
-            frame_info = frame_model.get_frame_info(update.frame_id)
-            if not frame_info:
-                errors.append(f"Frame {update.frame_id}: not found")
-                continue
-            
-            # Обновляем время
-            success = frame_model.edit_frame_info(update.frame_id, {
-                'start_time': update.start_time,
-                'end_time': update.end_time
-            })
-            
-            if success:
-                success_count += 1
-            else:
-                errors.append(f"Frame {update.frame_id}: update failed")
+        result = await uow.run_sync(frame_model.batch_update_times, [update.dict() for update in request.updates])
+        if result is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Ошибка при обновлении времён кадров"
+            )
         
         return {
-            "success": len(errors) == 0,
-            "updated_count": success_count,
-            "errors": errors
+            "success": len(result['errors']) == 0,
+            "updated_count": result['updated_count'],
+            "errors": result['errors']
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -513,67 +485,153 @@ async def batch_update_times(request: BatchUpdateTimesRequest):
         )
 
 
+async def _resolve_frame_image(frame_id: int, project_id: int, pic_path: str,
+                               size: str) -> Optional[image_paths.ResolvedImage]:
+    """Файл изображения кадра в размере size (из кэша или с одной проверкой на диске) или None"""
+    resolved = image_paths.get(frame_id, size)
+    if resolved is not None:
+        return resolved
+    
+    # Путь хранится в каноническом виде относительно MEDIA_ROOT - файл проверяется один раз
+    file_path = media.absolute_path(pic_path)
+    if not file_path:
+        return None
+    try:
+        stat = await io_pool.run(os.stat, file_path)
+    except FileNotFoundError:
+        return None
+    
+    # Файл или его уменьшенная копия
+    path, media_type = await images.resolve(file_path, size)
+    if path != file_path:
+        stat = await io_pool.run(os.stat, path)
+    if media_type is None:
+        media_type = await io_pool.run(http_cache.media_type_for, path)
+    return image_paths.put(frame_id, size, project_id, path, stat, media_type)
+
+
 @router.get("/api/frame/{frame_id}/image")
-async def get_frame_image(frame_id: int):
-    """Получение изображения кадра по ID"""
+async def get_frame_image(
+    request: Request,
+    frame_id: int,
+    size: str = Query(images.ORIGINAL, pattern="^(thumb|preview|original)$"),
+    uow: UnitOfWork = Depends(get_uow, scope="function")
+):
+    """Получение изображения кадра по ID (size: thumb - миниатюра, preview - превью, original - исходный файл)"""
     try:
-        # Получаем информацию о кадре
-        frame_info = frame_model.get_frame_info(frame_id)
-        if not frame_info:
+        # Файл, найденный недавно, отдаётся без обращения к БД и к диску
+        resolved = image_paths.get(frame_id, size)
+        if resolved is None:
+            frame_image = await uow.repo.read_frame_image(frame_id)
+            if not frame_image:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Кадр не найден"
+                )
+            
+            project_id, pic_path = frame_image
+            resolved = await _resolve_frame_image(frame_id, project_id, pic_path, size)
+            if resolved is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Изображение не найдено"
+                )
+        
+        # 304, если у клиента та же версия
+        return await http_cache.cached_file_response(
+            request, resolved.path, resolved.media_type, stat=resolved.stat
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
+@router.get("/api/frame/{project_id}/loadImages")
+async def load_images(
+    request: Request,
+    project_id: int,
+    size: str = Query("thumb", pattern="^(thumb|preview|original)$"),
+    frame_ids: Optional[List[int]] = Query(None),
+    uow: UnitOfWork = Depends(get_uow, scope="function")
+):
+    """
+    Изображения всех кадров проекта (или только frame_ids) одним ответом - несжатым tar-архивом
+
+    Файл в архиве называется <id кадра><расширение>, кадры без изображения пропускаются.
+    Кадры и пути читаются одним запросом к БД вместо запроса на каждое изображение.
+    """
+    try:
+        frames = await uow.repo.read_project_images(project_id, frame_ids)
+        if frames is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="Кадр не найден"
+                detail="Проект не найден"
             )
         
-        # Проверяем, есть ли изображение
-        if not frame_info.get('pic_path'):
+        # Недостающие копии строятся параллельно в пуле потоков
+        resolved_frames = await asyncio.gather(*(
+            _resolve_frame_image(frame_id, project_id, pic_path, size) for frame_id, pic_path in frames
+        ))
+        entries = []
+        for (frame_id, _), resolved in zip(frames, resolved_frames):
+            if resolved is not None:
+                name = f"{frame_id}{os.path.splitext(resolved.path)[1].lower()}"
+                entries.append((name, resolved.path, http_cache.file_etag(resolved.path, resolved.stat)))
+        
+        # Версия архива - версии всех файлов в нём: 304, если ни один не изменился
+        digest = hashlib.sha256()
+        for name, _, etag in entries:
+            digest.update(f"{name}:{etag}\n".encode())
+        headers = {
+            'ETag': f'"{digest.hexdigest()}"',
+            'Cache-Control': http_cache.REVALIDATE,
+            'Content-Disposition': f'attachment; filename="project_{project_id}_{size}.tar"',
+        }
+        if http_cache.is_not_modified(request, headers['ETag']):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        return StreamingResponse(
+            archive.tar_stream((name, path) for name, path, _ in entries),
+            media_type="application/x-tar",
+            headers=headers
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
+@router.get("/api/images/{digest}")
+async def get_content_image(
+    request: Request,
+    digest: str,
+    size: str = Query(images.ORIGINAL, pattern="^(thumb|preview|original)$"),
+    uow: UnitOfWork = Depends(get_uow, scope="function")
+):
+    """Изображение из хранилища по хэшу содержимого (URL не меняет ответ и кэшируется браузером навсегда)"""
+    try:
+        if not http_cache.is_content_digest(digest):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Изображение не найдено"
             )
         
-        # Возвращаем файл
-        file_path = frame_info['pic_path']
-        # Попробуем несколько вариантов местоположения файла:
-        # 1) как указано в базе (может быть абсолютный или относительный путь)
-        # 2) внутри папки static (src/static/...) — если pic_path начинается с /uploads/ или uploads/
-        # 3) в корневой папке uploads/ проекта
-        candidates = []
-        if not file_path:
+        pic_path = media.absolute_path(await uow.repo.read_blob_path(digest))
+        if not pic_path or not await io_pool.run(os.path.exists, pic_path):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Изображение не найдено"
             )
-        # Оригинальный путь
-        candidates.append(file_path)
-        # Если путь со слешем в начале, убираем его и пробуем
-        if file_path.startswith('/'):
-            candidates.append(file_path[1:])
-        # Пути относительно папки static
-        current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        static_candidate = os.path.join(current_dir, 'static', file_path.lstrip('/'))
-        candidates.append(static_candidate)
-        # uploads в корне проекта
-        candidates.append(os.path.join(current_dir, '..', file_path.lstrip('/')))
-        candidates.append(os.path.join(current_dir, file_path.lstrip('/')))
-
-        # Проверяем каждый кандидат
-        found = None
-        for p in candidates:
-            if p and os.path.exists(p):
-                found = p
-                break
-
-        if not found:
-            # Логируем проверённые пути для дебага
-            print(f"Frame image not found. Checked: {candidates}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Файл изображения не найден"
-            )
-
-        # Возвращаем найденный файл
-        return FileResponse(path=found, media_type='image/jpeg')
+        
+        path, media_type = await images.resolve(pic_path, size)
+        return await http_cache.cached_file_response(request, path, media_type, immutable=True)
     except HTTPException:
         raise
     except Exception as e:
@@ -584,47 +642,40 @@ async def get_frame_image(frame_id: int):
 
 
 @router.post("/api/frame/{frame_id}/image")
-async def save_frame_image(frame_id: int, file: UploadFile = File(...)):
-    """Сохранение изображения для кадра"""
+async def save_frame_image(frame_id: int, request: Request, uow: UnitOfWork = Depends(get_uow, scope="function")):
+    """Сохранение изображения для кадра (форма: file)"""
     try:
         # Проверяем существование кадра
-        frame_info = frame_model.get_frame_info(frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Кадр не найден"
             )
         
-        # Проверяем формат файла
-        if file.content_type not in ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Неподдерживаемый формат изображения"
-            )
-        
-        # Создаем директорию для загрузок, если её нет
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
+        # Форма разбирается из тела запроса потоково: файл пишется на диск один раз,
+        # размер и формат проверяются по ходу приёма
+        form = await receive_image_form(request, 'file', blob_store.blob_dir())
+        received = form.file
         
-        # Генерируем уникальное имя файла
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(upload_dir, unique_filename)
+        # Расширение исходного файла нужно только для имени нового файла в хранилище
+        file_extension = os.path.splitext(form.filename)[1] or '.jpg'
         
-        # Сохраняем файл
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Обновляем путь к изображению в базе данных
-        success = frame_model.update_frame_image_path(frame_id, file_path)
-        if not success:
+        # Сохраняем в хранилище по содержимому и обновляем путь к изображению в базе данных
+        file_path = await uow.run_sync(frame_model.upload_frame_pic, frame_id, received, file_extension)
+        if not file_path:
             # Удаляем файл, если не удалось обновить БД
-            os.remove(file_path)
+            await remove_upload(received.tmp_path)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при сохранении пути к изображению"
             )
         
+        # Модель добавила ссылку в БД; файл переносится в хранилище в пуле файловых операций
+        await place_upload(received, file_path)
+        
+        # Уменьшенные копии строятся в фоне, оригинал уже доступен
+        images.submit_variants(media.absolute_path(file_path))
         return {"success": True, "file_path": file_path}
     except HTTPException:
         raise
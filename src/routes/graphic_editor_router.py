@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from fastapi.responses import FileResponse
 from project_data_models.graphic_editor_model import GraphicEditorModel
 from project_data_models.frame_model import FrameModel
 from dto.frame_dto import DeleteImageRequest
+from database.unit_of_work import UnitOfWork, get_uow
+from core import http_cache, images, io_pool
+from core.uploads import place_upload, receive_image_form, remove_upload
+from database import blob_store, media
 import os
-import uuid
 
 router = APIRouter()
 graphic_editor_model = GraphicEditorModel()
@@ -12,11 +15,11 @@ frame_model = FrameModel()
 
 
 @router.delete("/api/graphic/deleteImage")
-async def delete_image(request: DeleteImageRequest):
+async def delete_image(request: DeleteImageRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление изображения кадра"""
     try:
         # Проверяем существование кадра
-        frame_info = frame_model.get_frame_info(request.frame_id)
+        frame_info = await uow.run_sync(frame_model.get_frame_info, request.frame_id)
         if not frame_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -24,14 +27,14 @@ async def delete_image(request: DeleteImageRequest):
             )
         
         # Проверяем наличие изображения
-        pic_path = frame_model.get_frame_pic(request.frame_id)
+        pic_path = await uow.run_sync(frame_model.get_frame_pic, request.frame_id)
         if not pic_path:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Нет изображения для удаления"
             )
         
-        success = frame_model.delete_frame_pic(request.frame_id)
+        success = await uow.run_sync(frame_model.delete_frame_pic, request.frame_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -49,58 +52,44 @@ async def delete_image(request: DeleteImageRequest):
 
 
 @router.post("/api/graphic/saveImage")
-async def save_image(
-    frame_id: int = Form(..., gt=0),
-    picture: UploadFile = File(...)
-):
-    """Сохранение результата работы графического редактора"""
+async def save_image(request: Request, uow: UnitOfWork = Depends(get_uow, scope="function")):
+    """Сохранение результата работы графического редактора (форма: frame_id, picture)"""
     try:
+        # Форма разбирается из тела запроса потоково: файл пишется на диск один раз,
+        # размер и формат проверяются по ходу приёма
+        form = await receive_image_form(request, 'picture', blob_store.blob_dir())
+        received = form.file
+        
         # Проверяем существование кадра
-        frame_info = frame_model.get_frame_info(frame_id)
+        frame_id = form.fields.get('frame_id', '')
+        frame_info = await uow.run_sync(frame_model.get_frame_info, int(frame_id)) if frame_id.isdigit() else None
         if not frame_info:
+            await remove_upload(received.tmp_path)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Кадр не найден"
             )
+        frame_id = int(frame_id)
         
-        # Проверяем формат файла
-        if picture.content_type not in ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Некорректные данные изображения"
-            )
-        
-        # Создаем директорию для загрузок, если её нет
-        upload_dir = "uploads"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Генерируем путь к файлу
-        file_extension = os.path.splitext(picture.filename)[1] or '.jpg'
-        file_path = os.path.join(upload_dir, f"frame_{frame_id}_{uuid.uuid4()}{file_extension}")
-        
-        # Сохраняем файл
-        content = await picture.read()
-        if len(content) > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="Слишком большой размер изображения"
-            )
-        
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        # Расширение исходного файла нужно только для имени нового файла в хранилище
+        file_extension = os.path.splitext(form.filename)[1] or '.jpg'
         
-        # Обновляем путь к изображению в БД
-        success = graphic_editor_model.upload_pic(frame_id, file_path, content)
-        if not success:
+        # Сохраняем в хранилище по содержимому и обновляем путь к изображению в БД
+        pic_path = await uow.run_sync(graphic_editor_model.upload_pic, frame_id, received, file_extension)
+        if not pic_path:
             # Удаляем файл, если не удалось сохранить в БД
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            await remove_upload(received.tmp_path)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при сохранении файла"
             )
         
-        return {"success": True, "path": file_path}
+        # Модель добавила ссылку в БД; файл переносится в хранилище в пуле файловых операций
+        await place_upload(received, pic_path)
+        
+        # Уменьшенные копии строятся в фоне, оригинал уже доступен
+        images.submit_variants(media.absolute_path(pic_path))
+        return {"success": True, "path": pic_path}
     except HTTPException:
         raise
     except Exception as e:
@@ -111,27 +100,20 @@ async def save_image(
 
 
 @router.get("/api/graphic/{pic_path}/loadImage")
-async def load_image(pic_path: str):
+async def load_image(request: Request, pic_path: str):
     """Загрузка изображения в редактор"""
     try:
-        # Проверяем существование файла
-        if not os.path.exists(pic_path):
-            # Пробуем с префиксом uploads/
-            full_path = os.path.join("uploads", pic_path) if not pic_path.startswith("uploads/") else pic_path
-            if not os.path.exists(full_path):
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Изображение не найдено по указанному пути"
-                )
-            pic_path = full_path
-        
-        if not os.path.exists(pic_path):
+        # Изображения лежат только в каталоге загрузок внутри MEDIA_ROOT
+        if not pic_path.startswith(f"{media.UPLOAD_DIR}/"):
+            pic_path = f"{media.UPLOAD_DIR}/{pic_path}"
+        file_path = media.absolute_path(pic_path)
+        if not file_path or not await io_pool.run(os.path.exists, file_path):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Изображение не найдено по указанному пути"
             )
         
-        return FileResponse(pic_path)
+        return await http_cache.cached_file_response(request, file_path)
     except HTTPException:
         raise
     except Exception as e:
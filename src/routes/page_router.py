@@ -1,25 +1,24 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.responses import FileResponse
 from dto.page_dto import (
-    PageInfo, LoadPagesResponse, DeletePageRequest, RedoPageRequest,
-    NewPageResponse, LoadPageResponse, NewPageRequest
+    PageInfo, LoadPagesResponse, DeletePageRequest, RedoPageRequest, RedoPageResponse,
+    PatchPageRequest, NewPageResponse, LoadPageResponse, NewPageRequest
 )
 from project_data_models.page_model import PageModel
-from database.repository import DatabaseRepository
 from typing import Dict
+from database.unit_of_work import UnitOfWork, get_uow
 import os
 
 router = APIRouter()
 page_model = PageModel()
-db_repo = DatabaseRepository()
 
 
 @router.get("/api/page/{project_id}/loadPages", response_model=LoadPagesResponse)
-async def load_pages(project_id: int):
+async def load_pages(project_id: int, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Загрузка страниц проекта"""
     try:
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(project_id)
+        project_info = await uow.repo.read_project_info(project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -27,31 +26,22 @@ async def load_pages(project_id: int):
             )
         
         # Получаем все страницы проекта
-        from database.base import engine
-        from database.models import Page
-        from sqlalchemy.orm import sessionmaker
+        pages = await uow.repo.read_project_pages(project_id)
         
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        try:
-            pages = session.query(Page).filter(Page.project_id == project_id).order_by(Page.number).all()
-            
-            if not pages:
-                raise HTTPException(
-                    status_code=status.HTTP_204_NO_CONTENT,
-                    detail="В проекте нет страниц"
-                )
-            
-            pages_dict: Dict[str, PageInfo] = {}
-            for page in pages:
-                pages_dict[str(page.id)] = PageInfo(
-                    number=page.number,
-                    text=page.text or ""
-                )
-            
-            return LoadPagesResponse(pages=pages_dict)
-        finally:
-            session.close()
+        if not pages:
+            raise HTTPException(
+                status_code=status.HTTP_204_NO_CONTENT,
+                detail="В проекте нет страниц"
+            )
+        
+        pages_dict: Dict[str, PageInfo] = {}
+        for page in pages:
+            pages_dict[str(page['page_id'])] = PageInfo(
+                number=page['number'],
+                text=page['text'] or ""
+            )
+        
+        return LoadPagesResponse(pages=pages_dict)
     except HTTPException:
         raise
     except Exception as e:
@@ -62,17 +52,17 @@ async def load_pages(project_id: int):
 
 
 @router.delete("/api/page/deletePage")
-async def delete_page(request: DeletePageRequest):
+async def delete_page(request: DeletePageRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление страницы из сценария"""
     try:
-        page_info = page_model.get_page(request.page_id)
+        page_info = await uow.run_sync(page_model.get_page, request.page_id)
         if not page_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Страница не найдена"
             )
         
-        success = page_model.delete_page(request.page_id)
+        success = await uow.run_sync(page_model.delete_page, request.page_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -89,28 +79,53 @@ async def delete_page(request: DeletePageRequest):
         )
 
 
-@router.post("/api/page/redoPage")
-async def redo_page(request: RedoPageRequest):
-    """Редактирование страницы из сценария"""
+@router.post("/api/page/redoPage", response_model=RedoPageResponse)
+async def redo_page(request: RedoPageRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
+    """Редактирование страницы из сценария (текст целиком)"""
     try:
         # Allow empty text (client may intentionally clear page); do not treat as bad request
         
-        page_info = page_model.get_page(request.page_id)
-        if not page_info:
+        # One UPDATE: a missing page simply updates no row
+        revision = await uow.repo.update_page_text(request.page_id, request.text)
+        if revision is None:
             # If page not found, return a not-found error to caller — nothing to edit
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Страница не найдена"
             )
         
-        success = page_model.edit_page(request.page_id, {'text': request.text})
-        if not success:
+        return RedoPageResponse(success=True, revision=revision)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
+@router.post("/api/page/patchPage", response_model=RedoPageResponse)
+async def patch_page(request: PatchPageRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
+    """Редактирование страницы правками относительно ревизии base_revision"""
+    try:
+        result = await uow.repo.patch_page_text(
+            request.page_id, request.base_revision,
+            [(edit.start, edit.end, edit.text) for edit in request.edits]
+        )
+        if result is None:
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Ошибка при обновлении страницы"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Страница не найдена"
+            )
+        if not result['applied']:
+            # Текст изменился с base_revision (или правки к нему не подходят) - клиент
+            # отправляет страницу целиком через redoPage
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Текст страницы изменился (ревизия {result['revision']})"
             )
         
-        return {"success": True}
+        return RedoPageResponse(success=True, revision=result['revision'])
     except HTTPException:
         raise
     except Exception as e:
@@ -121,7 +136,7 @@ async def redo_page(request: RedoPageRequest):
 
 
 @router.post("/api/page/newPage", status_code=status.HTTP_201_CREATED, response_model=NewPageResponse)
-async def new_page(request: NewPageRequest = None):
+async def new_page(request: NewPageRequest = None, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Создание страницы в сценарии"""
     try:
         if request is None or request.project_id is None:
@@ -133,14 +148,14 @@ async def new_page(request: NewPageRequest = None):
         project_id = request.project_id
         
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(project_id)
+        project_info = await uow.repo.read_project_info(project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Проект не найден"
             )
         
-        page_id = page_model.new_page(project_id)
+        page_id = await uow.run_sync(page_model.new_page, project_id)
         if page_id is None:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -158,15 +173,15 @@ async def new_page(request: NewPageRequest = None):
 
 
 @router.get("/api/page/{page_id}/loadPage", response_model=LoadPageResponse)
-async def load_page(page_id: int):
+async def load_page(page_id: int, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Загрузка текста страницы"""
     try:
-        page_info = page_model.get_page(page_id)
+        page_info = await uow.run_sync(page_model.get_page, page_id)
         # If page is missing or has no text, return an empty text response (don't treat as error)
         if not page_info:
             return LoadPageResponse(text='')
 
-        return LoadPageResponse(text=page_info.get('text', '') or '')
+        return LoadPageResponse(text=page_info.get('text', '') or '', revision=page_info.get('revision', 0))
     except HTTPException:
         raise
     except Exception as e:
@@ -1,83 +1,29 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, Response
 from fastapi.responses import FileResponse
+from dto.frame_dto import FrameInfo
+from dto.page_dto import PageInfo
 from dto.project_dto import (
-    LoadProjectsResponse, ProjectInfo,
     CreateProjectRequest, CreateProjectResponse,
     UpdateProjectRequest, DeleteProjectRequest,
     DeleteScriptRequest, DeleteFramesRequest,
-    ConnectFramePageRequest, DisconnectFramePageRequest
+    ConnectFramePageRequest, DisconnectFramePageRequest,
+    ProjectSnapshotResponse, ProjectSearchResponse, SearchHit
 )
+from project_data_models.frame_model import FrameModel
 from project_data_models.project_model import ProjectModel
+from database import ordering, search
+from database.unit_of_work import UnitOfWork, get_uow
+from core import http_cache
+from typing import Optional
+import hashlib
 import os
-from database.repository import DatabaseRepository
-from typing import List
 
 router = APIRouter()
 project_model = ProjectModel()
-db_repo = DatabaseRepository()
-
-
-@router.get("/api/users/{user_name}/loadInfo", response_model=LoadProjectsResponse)
-async def load_user_projects(user_name: str):
-    """Загрузка личного кабинета пользователя (списка проектов)"""
-    try:
-        # Проверяем существование пользователя
-        user_info = db_repo.read_user_info(user_name)
-        if not user_info:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Пользователь не найден"
-            )
-        
-        # Получаем проекты пользователя
-        from database.base import engine
-        from database.models import Project, User
-        from sqlalchemy.orm import sessionmaker
-        
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        try:
-            # Получаем пользователя
-            user = session.query(User).filter(User.login == user_name).first()
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Пользователь не найден"
-                )
-            
-            # Получаем проекты пользователя
-            projects = session.query(Project).filter(Project.owner == user.id).all()
-            
-            if not projects:
-                raise HTTPException(
-                    status_code=status.HTTP_204_NO_CONTENT,
-                    detail="У пользователя нет проектов"
-                )
-            
-            # Формируем ответ
-            projects_list: List[ProjectInfo] = []
-            for project in projects:
-                projects_list.append(ProjectInfo(
-                    project_id=project.id,
-                    project_name=project.name
-                ))
-            
-            return LoadProjectsResponse(projects=projects_list)
-            
-        finally:
-            session.close()
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Внутренняя ошибка сервера: {str(e)}"
-        )
 
 
 @router.post("/api/user/createProject", status_code=status.HTTP_201_CREATED, response_model=CreateProjectResponse)
-async def create_project(request: CreateProjectRequest):
+async def create_project(request: CreateProjectRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Создание нового проекта пользователя"""
     try:
         # Проверяем входные данные
@@ -94,7 +40,7 @@ async def create_project(request: CreateProjectRequest):
             )
         
         # Проверяем существование пользователя
-        user_info = db_repo.read_user_info(request.login)
+        user_info = await uow.repo.read_user_info(request.login)
         if not user_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -102,14 +48,14 @@ async def create_project(request: CreateProjectRequest):
             )
         
         # Проверяем, не существует ли уже проект с таким названием у пользователя
-        if db_repo.user_project_exist(request.name, request.login):
+        if await uow.repo.user_project_exist(request.name, request.login):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Проект с таким названием у пользователя уже существует"
             )
         
         # Создаем проект
-        project_id = project_model.new_project(request.login, request.name)
+        project_id = await uow.run_sync(project_model.new_project, request.login, request.name)
         if project_id is None:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -128,7 +74,7 @@ async def create_project(request: CreateProjectRequest):
 
 
 @router.post("/api/user/updateProjectInfo")
-async def update_project_info(request: UpdateProjectRequest):
+async def update_project_info(request: UpdateProjectRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Изменение информации о проекте"""
     try:
         # Проверяем входные данные
@@ -139,7 +85,7 @@ async def update_project_info(request: UpdateProjectRequest):
             )
         
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(request.project_id)
+        project_info = await uow.repo.read_project_info(request.project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -147,7 +93,7 @@ async def update_project_info(request: UpdateProjectRequest):
             )
         
         # Обновляем название проекта
-        success = project_model.edit_project_name(request.project_id, request.name)
+        success = await uow.run_sync(project_model.edit_project_name, request.project_id, request.name)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -165,12 +111,85 @@ async def update_project_info(request: UpdateProjectRequest):
         )
 
 
+@router.get("/api/project/{project_id}/snapshot", response_model=ProjectSnapshotResponse)
+async def load_project_snapshot(request: Request, project_id: int, uow: UnitOfWork = Depends(get_uow, scope="function")):
+    """
+    Снимок проекта одним запросом к БД: кадры, страницы и связи кадров со страницами
+    (вместо loadFrames и loadPages). ETag - хэш снимка: 304, если проект не изменился.
+    """
+    try:
+        snapshot = await uow.repo.read_project_snapshot(project_id)
+        if not snapshot:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Проект не найден"
+            )
+        
+        frames = FrameModel.format_project_frames([
+            (frame.id, frame.text, frame.start_time, frame.end_time, frame.duration,
+             frame.pic_path, frame.connected_page, frame.number)
+            for frame in snapshot['frames']
+        ])
+        pages = {
+            str(page.id): PageInfo(number=i + 1 if ordering.is_sparse() else page.number, text=page.text or "")
+            for i, page in enumerate(snapshot['pages'])
+        }
+        response = ProjectSnapshotResponse(
+            project_id=snapshot['project'].id,
+            project_name=snapshot['project'].text,
+            frames=[FrameInfo(**frame) for frame in frames],
+            pages=pages,
+            links={str(frame.id): frame.connected_page for frame in snapshot['frames'] if frame.connected_page}
+        )
+        
+        body = response.model_dump_json().encode()
+        headers = {'ETag': f'"{hashlib.sha256(body).hexdigest()}"', 'Cache-Control': http_cache.REVALIDATE}
+        if http_cache.is_not_modified(request, headers['ETag']):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
+@router.get("/api/project/{project_id}/search", response_model=ProjectSearchResponse)
+async def search_project(
+    project_id: int,
+    q: str = Query(..., min_length=1, max_length=500),
+    limit: int = Query(search.SEARCH_LIMIT, ge=1, le=search.SEARCH_MAX_LIMIT),
+    kind: Optional[str] = Query(None, pattern="^(page|frame)$"),
+    uow: UnitOfWork = Depends(get_uow, scope="function")
+):
+    """Полнотекстовый поиск по тексту страниц и описаниям кадров проекта (kind - только страницы или кадры)"""
+    try:
+        project_info = await uow.repo.read_project_info(project_id)
+        if not project_info:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Проект не найден"
+            )
+        
+        hits = await uow.repo.search_project(project_id, q, limit, (kind,) if kind else search.KINDS)
+        return ProjectSearchResponse(query=q, results=[SearchHit(**hit) for hit in hits])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Внутренняя ошибка сервера: {str(e)}"
+        )
+
+
 @router.delete("/api/user/deleteProject")
-async def delete_user_project(request: DeleteProjectRequest):
+async def delete_user_project(request: DeleteProjectRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление пользователем проекта"""
     try:
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(request.project_id)
+        project_info = await uow.repo.read_project_info(request.project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -178,7 +197,7 @@ async def delete_user_project(request: DeleteProjectRequest):
             )
         
         # Удаляем проект
-        success = project_model.delete_project(request.project_id)
+        success = await uow.run_sync(project_model.delete_project, request.project_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -197,11 +216,11 @@ async def delete_user_project(request: DeleteProjectRequest):
 
 
 @router.delete("/api/user/deleteScript")
-async def delete_script(request: DeleteScriptRequest):
+async def delete_script(request: DeleteScriptRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление сценария проекта (всех страниц)"""
     try:
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(request.project_id)
+        project_info = await uow.repo.read_project_info(request.project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -209,7 +228,7 @@ async def delete_script(request: DeleteScriptRequest):
             )
         
         # Удаляем сценарий
-        success = project_model.delete_script(request.project_id)
+        success = await uow.run_sync(project_model.delete_script, request.project_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -228,11 +247,11 @@ async def delete_script(request: DeleteScriptRequest):
 
 
 @router.delete("/api/user/deleteFrames")
-async def delete_frames(request: DeleteFramesRequest):
+async def delete_frames(request: DeleteFramesRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление раскадровки проекта (всех кадров)"""
     try:
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(request.project_id)
+        project_info = await uow.repo.read_project_info(request.project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -240,7 +259,7 @@ async def delete_frames(request: DeleteFramesRequest):
             )
         
         # Удаляем раскадровку
-        success = project_model.delete_frames(request.project_id)
+        success = await uow.run_sync(project_model.delete_frames, request.project_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -259,7 +278,7 @@ async def delete_frames(request: DeleteFramesRequest):
 
 
 @router.post("/api/frame/connectFrame")
-async def connect_frame_page(request: ConnectFramePageRequest):
+async def connect_frame_page(request: ConnectFramePageRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Связь кадра и страницы"""
     try:
         # Проверяем входные данные
@@ -270,47 +289,37 @@ async def connect_frame_page(request: ConnectFramePageRequest):
             )
         
         # Проверяем существование кадра
-        from database.base import engine
-        from database.models import Frame, Page
-        from sqlalchemy.orm import sessionmaker
-        
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        try:
-            frame = session.query(Frame).filter(Frame.id == request.frame_id).first()
-            page = session.query(Page).filter(Page.id == request.page_id).first()
-            
-            if not frame:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Кадр не найден"
-                )
-            
-            if not page:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Страница не найдена"
-                )
-            
-            # Проверяем, что кадр и страница из одного проекта
-            if frame.project_id != page.project_id:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail="Невозможно связать кадр со страницей из другого проекта"
-                )
-            
-            # Проверяем, не связан ли кадр уже с другой страницей
-            if frame.connected_page is not None and frame.connected_page != request.page_id:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="Кадр уже связан с другой страницей"
-                )
-            
-        finally:
-            session.close()
+        frame = await uow.repo.read_frame_info(request.frame_id)
+        page = await uow.repo.read_page_info(request.page_id)
+        
+        if not frame:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Кадр не найден"
+            )
+        
+        if not page:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Страница не найдена"
+            )
+        
+        # Проверяем, что кадр и страница из одного проекта
+        if frame['project_id'] != page['project_id']:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Невозможно связать кадр со страницей из другого проекта"
+            )
+        
+        # Проверяем, не связан ли кадр уже с другой страницей
+        if frame['connected_page'] is not None and frame['connected_page'] != request.page_id:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Кадр уже связан с другой страницей"
+            )
         
         # Связываем кадр и страницу
-        success = project_model.connect_fp(request.frame_id, request.page_id)
+        success = await uow.run_sync(project_model.connect_fp, request.frame_id, request.page_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -329,7 +338,7 @@ async def connect_frame_page(request: ConnectFramePageRequest):
 
 
 @router.post("/api/frame/disconnectFrame")
-async def disconnect_frame_page(request: DisconnectFramePageRequest):
+async def disconnect_frame_page(request: DisconnectFramePageRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление связи кадра и страницы"""
     try:
         # Проверяем входные данные
@@ -340,30 +349,20 @@ async def disconnect_frame_page(request: DisconnectFramePageRequest):
             )
         
         # Проверяем существование кадра
-        from database.base import engine
-        from database.models import Frame
-        from sqlalchemy.orm import sessionmaker
-        
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        try:
-            frame = session.query(Frame).filter(Frame.id == request.frame_id).first()
-            
-            if not frame:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Кадр не найден"
-                )
-            
-            # Если кадр не связан со страницей
-            if frame.connected_page is None:
-                return {"success": True, "message": "Связи не существовало"}
-            
-        finally:
-            session.close()
+        frame = await uow.repo.read_frame_info(request.frame_id)
+        
+        if not frame:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Кадр не найден"
+            )
+        
+        # Если кадр не связан со страницей
+        if frame['connected_page'] is None:
+            return {"success": True, "message": "Связи не существовало"}
         
         # Разрываем связь кадра и страницы
-        success = project_model.disconnect_fp(request.frame_id)
+        success = await uow.run_sync(project_model.disconnect_fp, request.frame_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Depends, Query
 from fastapi.responses import FileResponse
 from dto.user_dto import (
     LoadUserInfoResponse, ProjectInfo, CreateProjectRequest, CreateProjectResponse,
@@ -6,51 +6,57 @@ from dto.user_dto import (
 )
 from dto.user_dto import UserInfoResponse
 from user_models.user_model import UserModel
+from user_models import sessions
 from project_data_models.project_model import ProjectModel
-from database.repository import DatabaseRepository
+from database.unit_of_work import UnitOfWork, get_uow
 import os
+from datetime import datetime
+from typing import Optional
 
 router = APIRouter()
 user_model = UserModel()
 project_model = ProjectModel()
-db_repo = DatabaseRepository()
 
 
 @router.get("/api/users/{user_name}/loadInfo", response_model=LoadUserInfoResponse)
-async def load_user_info(user_name: str):
+async def load_user_info(
+    user_name: str,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[int] = Query(None, ge=0),
+    updated_since: Optional[datetime] = None,
+    uow: UnitOfWork = Depends(get_uow, scope="function")
+):
     """Загрузка личного кабинета пользователя"""
     try:
-        # Проверяем существование пользователя
-        user_info = user_model.get_user_info(user_name)
-        if not user_info:
+        # Пользователь и страница его проектов одним запросом; следующая страница - after=next_after
+        projects = await uow.repo.read_user_projects_page(
+            user_name,
+            limit=limit + 1 if limit is not None else None,
+            after_id=after,
+            updated_since=updated_since
+        )
+        if projects is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
             )
         
-        # Получаем список проектов
-        projects = user_model.get_user_projects(user_name)
-        
-        if not projects:
+        if not projects and after is None and updated_since is None:
             raise HTTPException(
                 status_code=status.HTTP_204_NO_CONTENT,
                 detail="У пользователя нет проектов"
             )
         
-        # Получаем полную информацию о проектах
-        project_list = []
-        for project_name in projects:
-            # Получаем информацию о проекте
-            user_projects = db_repo.read_user_projects(user_name)
-            for proj in user_projects:
-                if proj['project_name'] == project_name:
-                    project_list.append(ProjectInfo(
-                        project_id=proj['project_id'],
-                        project_name=proj['project_name']
-                    ))
-                    break
+        next_after = None
+        if limit is not None and len(projects) > limit:
+            projects = projects[:limit]
+            next_after = projects[-1]['project_id']
         
-        return LoadUserInfoResponse(projects=project_list)
+        project_list = [
+            ProjectInfo(project_id=project['project_id'], project_name=project['project_name'])
+            for project in projects
+        ]
+        return LoadUserInfoResponse(projects=project_list, next_after=next_after)
     except HTTPException:
         raise
     except Exception as e:
@@ -61,7 +67,7 @@ async def load_user_info(user_name: str):
 
 
 @router.post("/api/user/createProject", status_code=status.HTTP_201_CREATED, response_model=CreateProjectResponse)
-async def create_project(request: CreateProjectRequest):
+async def create_project(request: CreateProjectRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Создание нового проекта пользователя"""
     try:
         if not request.name or not request.name.strip():
@@ -71,20 +77,20 @@ async def create_project(request: CreateProjectRequest):
             )
         
         # Проверяем существование пользователя
-        if not db_repo.user_exist(request.login):
+        if not await uow.repo.user_exist(request.login):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
             )
         
         # Проверяем, не существует ли уже проект с таким названием
-        if db_repo.user_project_exist(request.name, request.login):
+        if await uow.repo.user_project_exist(request.name, request.login):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Проект с таким названием у пользователя уже существует"
             )
         
-        project_id = project_model.new_project(request.login, request.name)
+        project_id = await uow.run_sync(project_model.new_project, request.login, request.name)
         if project_id is None:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -102,10 +108,10 @@ async def create_project(request: CreateProjectRequest):
 
 
 @router.get("/api/users/{user_name}/info", response_model=UserInfoResponse)
-async def get_user_info(user_name: str):
+async def get_user_info(user_name: str, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Return basic user info including role"""
     try:
-        user_info = user_model.get_user_info(user_name)
+        user_info = await uow.run_sync(user_model.get_user_info, user_name)
         if not user_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -122,11 +128,11 @@ async def get_user_info(user_name: str):
 
 
 @router.post("/api/user/updateProjectInfo")
-async def update_project_info(request: UpdateProjectInfoRequest):
+async def update_project_info(request: UpdateProjectInfoRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Изменение информации о проекте"""
     try:
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(request.project_id)
+        project_info = await uow.repo.read_project_info(request.project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -139,7 +145,7 @@ async def update_project_info(request: UpdateProjectInfoRequest):
                 detail="Некорректные данные для обновления"
             )
         
-        success = project_model.edit_project_name(request.project_id, request.name)
+        success = await uow.run_sync(project_model.edit_project_name, request.project_id, request.name)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -157,31 +163,32 @@ async def update_project_info(request: UpdateProjectInfoRequest):
 
 
 @router.delete("/api/user/deleteUser")
-async def delete_user(request: DeleteUserRequest):
+async def delete_user(request: DeleteUserRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление пользователем аккаунта пользователя"""
     try:
         # Проверяем существование пользователя
-        if not db_repo.user_exist(request.login):
+        if not await uow.repo.user_exist(request.login):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден"
             )
         
         # Проверяем наличие активных проектов
-        projects = user_model.get_user_projects(request.login)
+        projects = await uow.run_sync(user_model.get_user_projects, request.login)
         if projects:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="У пользователя есть активные проекты"
             )
         
-        success = user_model.delete_user(request.login)
+        success = await uow.run_sync(user_model.delete_user, request.login)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Ошибка при удалении пользователя"
             )
         
+        sessions.revoke_user_after_commit(uow.session, request.login)
         return {"success": True}
     except HTTPException:
         raise
@@ -193,18 +200,18 @@ async def delete_user(request: DeleteUserRequest):
 
 
 @router.delete("/api/user/deleteProject")
-async def delete_project(request: DeleteProjectRequest):
+async def delete_project(request: DeleteProjectRequest, uow: UnitOfWork = Depends(get_uow, scope="function")):
     """Удаление пользователем проекта"""
     try:
         # Проверяем существование проекта
-        project_info = db_repo.read_project_info(request.project_id)
+        project_info = await uow.repo.read_project_info(request.project_id)
         if not project_info:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Проект не найден"
             )
         
-        success = project_model.delete_project(request.project_id)
+        success = await uow.run_sync(project_model.delete_project, request.project_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -19,14 +19,26 @@
 	 */
 	async function fetchAllUsers() {
 		try{
-			const resp = await fetch('/api/admin/user/loadUsersAccounts');
-			if(!resp.ok){
-				console.warn('fetchAllUsers: API returned', resp.status);
-				return getMockUsers();
-			}
-			const data = await resp.json();
-			// data.users -> [{ login, email }]
-			return (data.users || []).map(u => ({ id: u.login, login: u.login, email: u.email || '', avatar: null }));
+			// Список отдаётся страницами: следующая запрашивается с after=next_after
+			const users = [];
+			let after = null;
+			do {
+				const params = new URLSearchParams({ limit: '500' });
+				if(after !== null) params.set('after', String(after));
+				const resp = await fetch(`/api/admin/user/loadUsersAccounts?${params}`);
+				if(resp.status === 204) break;
+				if(!resp.ok){
+					console.warn('fetchAllUsers: API returned', resp.status);
+					return getMockUsers();
+				}
+				const data = await resp.json();
+				// data.users -> [{ login, email, role }]
+				for(const u of (data.users || [])){
+					users.push({ id: u.login, login: u.login, email: u.email || '', role: u.role || 'user', avatar: null });
+				}
+				after = data.next_after;
+			} while(after !== null && after !== undefined);
+			return users;
 		}catch(e){
 			console.error('fetchAllUsers failed', e);
 			return getMockUsers();
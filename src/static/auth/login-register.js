@@ -142,11 +142,7 @@
         // Сохраняем токен и логин в sessionStorage
         sessionStorage.setItem('pt_access_token', loginData.access_token);
         sessionStorage.setItem('pt_login', u);
-        // Также ставим cookie, чтобы сервер мог проверить роль при переходе на защищённые страницы
-        try{
-          document.cookie = 'pt_login=' + encodeURIComponent(u) + '; path=/';
-          document.cookie = 'pt_access_token=' + encodeURIComponent(loginData.access_token) + '; path=/';
-        }catch(e){ /* ignore */ }
+        // Cookie сессии (pt_session) ставит сервер в ответе на вход: по ней проверяется роль
         // Перенаправляем на страницу личного кабинета
         window.location.href = 'http://127.0.0.1:8000/user';
       })
@@ -204,11 +200,7 @@
         // Сохраняем токен и логин в sessionStorage
         sessionStorage.setItem('pt_access_token', data.access_token);
         sessionStorage.setItem('pt_login', u);
-        // Также ставим cookie, чтобы сервер мог проверить роль при переходе на защищённые страницы
-        try{
-          document.cookie = 'pt_login=' + encodeURIComponent(u) + '; path=/';
-          document.cookie = 'pt_access_token=' + encodeURIComponent(data.access_token) + '; path=/';
-        }catch(e){ /* ignore */ }
+        // Cookie сессии (pt_session) ставит сервер в ответе на вход: по ней проверяется роль
         // Перенаправляем на страницу личного кабинета
         window.location.href = 'http://127.0.0.1:8000/user';
       })
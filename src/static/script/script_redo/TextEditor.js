@@ -26,6 +26,9 @@ class TextEditor {
 		// Page storage (simulated in-memory for now)
 		this.dirty = false;
 		this.pages = {};
+		// Last text the server has confirmed and its revision: saves send only the changed range
+		this.savedText = null;
+		this.revision = null;
 
 		this.init();
 	}
@@ -258,12 +261,15 @@ class TextEditor {
 		// If pageId is known, persist to server
 		if (this.currentPageId) {
 			try {
-				const resp = await fetch('/api/page/redoPage', {
-					method: 'POST',
-					headers: { 'Content-Type': 'application/json' },
-					body: JSON.stringify({ page_id: Number(this.currentPageId), text: this.textContent.innerHTML })
-				});
-				if (!resp.ok) throw new Error('Failed to save page');
+				const text = this.textContent.innerHTML;
+				let revision = null;
+				if (this.revision !== null && this.savedText !== null) {
+					revision = text === this.savedText ? this.revision : await this.patchPage(text);
+				}
+				// No known base revision or the page changed elsewhere: send the whole text
+				if (revision === null) revision = await this.putPage(text);
+				this.revision = revision;
+				this.savedText = text;
 				console.log('Page saved to server');
 				this.dirty = false;
 				if (notify) try { alert('Страница успешно сохранена.'); } catch(e) {}
@@ -281,6 +287,46 @@ class TextEditor {
 		}
 	}
 
+	// Single replaced range between two texts (common prefix and suffix are kept)
+	computeEdit(oldText, newText) {
+		let start = 0;
+		const maxPrefix = Math.min(oldText.length, newText.length);
+		while (start < maxPrefix && oldText.charCodeAt(start) === newText.charCodeAt(start)) start++;
+		let oldEnd = oldText.length;
+		let newEnd = newText.length;
+		while (oldEnd > start && newEnd > start && oldText.charCodeAt(oldEnd - 1) === newText.charCodeAt(newEnd - 1)) {
+			oldEnd--;
+			newEnd--;
+		}
+		return { start, end: oldEnd, text: newText.slice(start, newEnd) };
+	}
+
+	// Returns the new revision, or null if the server has a different revision
+	async patchPage(text) {
+		const resp = await fetch('/api/page/patchPage', {
+			method: 'POST',
+			headers: { 'Content-Type': 'application/json' },
+			body: JSON.stringify({
+				page_id: Number(this.currentPageId),
+				base_revision: this.revision,
+				edits: [this.computeEdit(this.savedText, text)]
+			})
+		});
+		if (resp.status === 409) return null;
+		if (!resp.ok) throw new Error('Failed to save page');
+		return (await resp.json()).revision;
+	}
+
+	async putPage(text) {
+		const resp = await fetch('/api/page/redoPage', {
+			method: 'POST',
+			headers: { 'Content-Type': 'application/json' },
+			body: JSON.stringify({ page_id: Number(this.currentPageId), text })
+		});
+		if (!resp.ok) throw new Error('Failed to save page');
+		return (await resp.json()).revision;
+	}
+
 	async loadPage(pageNum) {
 		// Save current page before switching
 		// Automatic save on page switch should not notify the user
@@ -295,6 +341,9 @@ class TextEditor {
 				if (resp.ok) {
 					const data = await resp.json();
 					this.textContent.innerHTML = data.text || '';
+					// Edits are computed against the server's text, not the browser-normalized markup
+					this.savedText = data.text || '';
+					this.revision = typeof data.revision === 'number' ? data.revision : null;
 				} else {
 					console.warn('loadPage API returned', resp.status);
 					this.textContent.innerHTML = '';
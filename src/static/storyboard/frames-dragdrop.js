@@ -43,8 +43,8 @@ function showFrameInfo(frameData) {
         try {
             const params = new URLSearchParams(window.location.search);
             const cb = window._frameCacheBustTs || params.get('_cb');
-            frameImage.src = `/api/frame/${frameData.id}/image` + (cb ? ( (`?` + '_cb=' + encodeURIComponent(cb)) ) : '');
-        } catch(e) { frameImage.src = `/api/frame/${frameData.id}/image`; }
+            frameImage.src = `/api/frame/${frameData.id}/image?size=preview` + (cb ? ( (`&` + '_cb=' + encodeURIComponent(cb)) ) : '');
+        } catch(e) { frameImage.src = `/api/frame/${frameData.id}/image?size=preview`; }
     })();
     frameImage.alt = ''; // Не показываем alt текст
 
@@ -392,7 +392,14 @@ function renderFrames() {
                 } catch(e) {}
                 return u;
             }
-            thumb.src = _cacheBustedUrl(`/api/frame/${frame.id}/image`);
+            // Images from the content-addressed store have a URL that never changes, so the browser
+            // keeps them without revalidation; others are revalidated by ETag (304 when unchanged)
+            // Thumbnails loaded in bulk when the project was opened are used first
+            const bulkUrl = sbStore.getFrameImageUrl ? sbStore.getFrameImageUrl(frame.id) : null;
+            const contentHash = typeof frame.image === 'string' && frame.image.match(/([0-9a-f]{64})\.[A-Za-z0-9]+$/);
+            thumb.src = bulkUrl ? bulkUrl : contentHash
+                ? `/api/images/${contentHash[1]}?size=thumb`
+                : _cacheBustedUrl(`/api/frame/${frame.id}/image?size=thumb`);
             thumb.alt = '';
             thumb.style.width = '100%';
             thumb.style.height = '100%';
@@ -857,9 +864,9 @@ function _cacheBustedUrlForFrame(frameId) {
     try {
         const params = new URLSearchParams(window.location.search);
         const cb = window._frameCacheBustTs || params.get('_cb');
-        if (cb) return `/api/frame/${frameId}/image` + (cb ? ( ( '?' + '_cb=' + encodeURIComponent(cb) ) ) : '');
+        if (cb) return `/api/frame/${frameId}/image?size=preview` + (cb ? ( ( '&' + '_cb=' + encodeURIComponent(cb) ) ) : '');
     } catch (e) { /* ignore */ }
-    return `/api/frame/${frameId}/image`;
+    return `/api/frame/${frameId}/image?size=preview`;
 }
 
 function refreshOpenFrameInfoFromStore() {
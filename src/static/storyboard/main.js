@@ -56,9 +56,16 @@ document.addEventListener('DOMContentLoaded', async () => {
 
     const store = window.storyboardStore;
     if (store && store.loadFrames && store.loadPages) {
+        // Кадры и страницы одним снимком проекта, миниатюры всех кадров - одним архивом
+        const loadData = async () => {
+            const ok = store.loadSnapshot ? await store.loadSnapshot(projectId) : false;
+            if (!ok) {
+                await Promise.all([store.loadFrames(projectId), store.loadPages(projectId)]);
+            }
+        };
         await Promise.all([
-            store.loadFrames(projectId),
-            store.loadPages(projectId)
+            loadData(),
+            store.loadFrameImages ? store.loadFrameImages(projectId) : null
         ]);
         // Re-render after loading data
         if (window.renderFrames) {
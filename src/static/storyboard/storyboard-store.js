@@ -389,31 +389,79 @@
       const response = await fetch(`${API_BASE}/api/frame/${projectId}/loadFrames`);
       if (!response.ok) throw new Error('Failed to load frames');
       const data = await response.json();
-      // data.frames is array
-      frames.length = 0; // Clear existing
-      data.frames.forEach(frame => {
-        frames.push({
-          frame_id: frame.frame_id,
-          description: frame.description,
-          start_time: frame.start_time,
-          end_time: frame.end_time,
-          pic_path: frame.pic_path,
-          connected: frame.connected || '',
-          number: frame.number,
-          image: !!frame.pic_path
-        });
+      setFramesFromApi(data.frames);
+      return true;
+    } catch (error) {
+      console.error('Error loading frames:', error);
+      return false;
+    }
+  }
+
+  function setFramesFromApi(list) {
+    frames.length = 0; // Clear existing
+    list.forEach(frame => {
+      frames.push({
+        frame_id: frame.frame_id,
+        description: frame.description,
+        start_time: frame.start_time,
+        end_time: frame.end_time,
+        pic_path: frame.pic_path,
+        connected: frame.connected || '',
+        number: frame.number,
+        image: !!frame.pic_path
       });
-      // Устанавливаем start_time первого кадра на 00:00
-      if (frames.length > 0) {
-        frames[0].start_time = 0;
+    });
+    // Устанавливаем start_time первого кадра на 00:00
+    if (frames.length > 0) {
+      frames[0].start_time = 0;
+    }
+  }
+
+  // Thumbnails of all frames fetched in one request (tar archive of <frame_id>.<ext> files)
+  // and kept as object URLs, so opening a project costs one image request instead of N
+  const frameImageUrls = new Map();
+  const IMAGE_TYPES = { webp: 'image/webp', png: 'image/png', jpg: 'image/jpeg', jpeg: 'image/jpeg', gif: 'image/gif' };
+
+  function readTarString(bytes, offset, length) {
+    const field = bytes.subarray(offset, offset + length);
+    const end = field.indexOf(0);
+    return new TextDecoder().decode(end === -1 ? field : field.subarray(0, end));
+  }
+
+  function dropFrameImage(frameId) {
+    const url = frameImageUrls.get(Number(frameId));
+    if (url) URL.revokeObjectURL(url);
+    frameImageUrls.delete(Number(frameId));
+  }
+
+  async function loadFrameImages(projectId) {
+    try {
+      const response = await fetch(`${API_BASE}/api/frame/${projectId}/loadImages?size=thumb`);
+      if (!response.ok) throw new Error('Failed to load frame images');
+      const bytes = new Uint8Array(await response.arrayBuffer());
+      Array.from(frameImageUrls.keys()).forEach(dropFrameImage);
+      let offset = 0;
+      while (offset + 512 <= bytes.length) {
+        const name = readTarString(bytes, offset, 100);
+        if (!name) break; // end of archive
+        const size = parseInt(readTarString(bytes, offset + 124, 12).trim(), 8) || 0;
+        const [id, ext] = name.split('.');
+        const body = bytes.subarray(offset + 512, offset + 512 + size);
+        const type = IMAGE_TYPES[(ext || '').toLowerCase()] || 'application/octet-stream';
+        frameImageUrls.set(Number(id), URL.createObjectURL(new Blob([body], { type })));
+        offset += 512 + Math.ceil(size / 512) * 512;
       }
       return true;
     } catch (error) {
-      console.error('Error loading frames:', error);
+      console.error('Error loading frame images:', error);
       return false;
     }
   }
 
+  function getFrameImageUrl(frameId) {
+    return frameImageUrls.get(Number(frameId)) || null;
+  }
+
   // Handle frame_updated signal from other tabs/windows (set by GraphicEditor after saving)
   async function handleFrameUpdatedEvent() {
     try {
@@ -422,6 +470,7 @@
       let obj = null;
       try { obj = JSON.parse(raw); } catch(e) { obj = null; }
       if (!obj || !obj.frame_id) return false;
+      dropFrameImage(obj.frame_id);
       const projectId = obj.project_id || getProjectIdFromFrames();
       // Only react when project matches current view
       if (Number(projectId) !== Number(getProjectIdFromFrames())) return false;
@@ -464,14 +513,7 @@
       const response = await fetch(`${API_BASE}/api/page/${projectId}/loadPages`);
       if (!response.ok) throw new Error('Failed to load pages');
       const data = await response.json();
-      // data.pages is Dict[str, PageInfo]
-      Object.keys(pages).forEach(key => delete pages[key]); // Clear existing
-      Object.entries(data.pages).forEach(([key, page]) => {
-        pages[key] = {
-          number: page.number,
-          text: page.text
-        };
-      });
+      setPagesFromApi(data.pages);
       return true;
     } catch (error) {
       console.error('Error loading pages:', error);
@@ -479,6 +521,32 @@
     }
   }
 
+  function setPagesFromApi(dict) {
+    // dict is Dict[str, PageInfo]
+    Object.keys(pages).forEach(key => delete pages[key]); // Clear existing
+    Object.entries(dict).forEach(([key, page]) => {
+      pages[key] = {
+        number: page.number,
+        text: page.text
+      };
+    });
+  }
+
+  // Frames, pages and their links in one request (one database query on the server)
+  async function loadSnapshot(projectId) {
+    try {
+      const response = await fetch(`${API_BASE}/api/project/${projectId}/snapshot`);
+      if (!response.ok) throw new Error('Failed to load project snapshot');
+      const data = await response.json();
+      setFramesFromApi(data.frames);
+      setPagesFromApi(data.pages);
+      return true;
+    } catch (error) {
+      console.error('Error loading project snapshot:', error);
+      return false;
+    }
+  }
+
   // Helpers to map between page database ID and display number
   function getPageNumberById(id) {
     if (id === null || id === undefined || id === '') return null;
@@ -753,6 +821,7 @@
       });
       if (!response.ok) throw new Error('Failed to upload image');
       const data = await response.json();
+      dropFrameImage(frameId);
       // Update local frame pic_path if needed
       const frame = frames.find(f => f.frame_id === frameId);
       if (frame && data.pic_path) frame.pic_path = data.pic_path;
@@ -773,6 +842,7 @@
         })
       });
       if (!response.ok) throw new Error('Failed to delete image');
+      dropFrameImage(frameId);
       // Update local frame
       const frame = frames.find(f => f.frame_id === frameId);
       if (frame) frame.pic_path = null;
@@ -901,6 +971,9 @@
     setPageText,
     loadFrames,
     loadPages,
+    loadSnapshot,
+    loadFrameImages,
+    getFrameImageUrl,
     newFrame,
     dragAndDropFrame,
     redoStartTime,
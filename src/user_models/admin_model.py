@@ -1,8 +1,8 @@
 from typing import Dict, Optional
 from database.repository import DatabaseRepository
+from user_models import passwords
 
-from database.base import engine
-from sqlalchemy.orm import sessionmaker
+from database.unit_of_work import get_session
 from database.models import User
 
 class AdminModel:
@@ -32,7 +32,7 @@ class AdminModel:
             return False
         
         # Создаем новую учетную запись
-        return self.db.create_user(username, password, email)
+        return self.db.create_user(username, passwords.hash_password(password), email)
     
     def give_admin_role(self, user_id: int) -> bool:
         """
@@ -91,8 +91,10 @@ class AdminModel:
         password = user_info.get('password')
         email = user_info.get('email')
         
-        # Обновляем информацию о пользователе
-        return self.db.update_user_info(username, password=password, email=email)
+        # Обновляем информацию о пользователе (новый пароль сохраняется хэшем)
+        return self.db.update_user_info(
+            username, password=passwords.hash_password(password) if password else None, email=email
+        )
     
     def delete_user(self, username: str) -> bool:
         """
@@ -116,8 +118,7 @@ class AdminModel:
         # Нужно добавить метод в репозиторий или использовать сессию напрямую
         # Пока используем простой подход через сессию
         
-        Session = sessionmaker(bind=engine)
-        session = Session()
+        session = get_session()
         try:
             user = session.query(User).filter(User.id == user_id).first()
             return user.login if user else None
@@ -1,22 +1,22 @@
-import secrets
-from typing import Optional
+from typing import Optional, Union
 from database.repository import DatabaseRepository
+from user_models import passwords, sessions
 
 
 class AuthModel:
     def __init__(self):
         self.db = DatabaseRepository()
     
-    def login(self, username: str, password: str) -> int:
+    def login(self, username: str, password: str) -> Union[str, int]:
         """
-        Проверяет логин и пароль пользователя в таблице user
+        Проверяет логин и пароль пользователя в таблице user и открывает сессию
         
         Args:
             username: логин пользователя
             password: пароль пользователя
         
         Returns:
-            auth_token: int - токен авторизации в случае успеха (положительное число >= 1000)
+            auth_token: str - токен сессии в случае успеха
             status: int - статус ошибки (1 - пользователь не найден, 2 - неверный пароль)
         """
         # Проверяем существование пользователя
@@ -28,20 +28,18 @@ class AuthModel:
         if not user_info:
             return 1  # Пользователь не найден
         
-        # Сравниваем пароли
-        if user_info['password'] != password:
+        # Сравниваем пароль с сохранённым хэшем
+        if not passwords.verify_password(password, user_info['password']):
             return 2  # Неверный пароль
         
-        # Генерируем auth_token (используем хэш для простоты)
-        # Убеждаемся, что токен >= 1000, чтобы отличать от status кодов 1 и 2
-        auth_token = hash(username + password + secrets.token_hex(8))
-        auth_token = abs(auth_token)
-        # Ограничиваем до разумного размера и убеждаемся, что >= 1000
-        auth_token = (auth_token % (10 ** 10 - 1000)) + 1000
+        # Пароль сохранён как есть или с прежними параметрами KDF - перехэшируем
+        if passwords.needs_rehash(user_info['password']):
+            self.db.update_user_info(username, password=passwords.hash_password(password))
         
-        return auth_token
+        # Роль запоминается в сессии: проверка прав не обращается к БД
+        return sessions.create(username, user_info.get('role'))
     
-    def register(self, username: str, password: str) -> Optional[int]:
+    def register(self, username: str, password: str) -> Optional[str]:
         """
         Проверяет отсутствие логина пользователя в таблице user, 
         в случае успеха создает новую запись о пользователе
@@ -51,21 +49,77 @@ class AuthModel:
             password: пароль пользователя
         
         Returns:
-            auth_token: int - токен авторизации в случае успеха
+            auth_token: str - токен сессии в случае успеха
             None - если учетная запись уже существует
         """
         # Проверяем наличие учетной записи
         if self.db.user_exist(username):
             return None  # Учетная запись уже существует
         
-        # Создаем новую учетную запись
-        success = self.db.create_user(username, password, '')
+        # Создаем новую учетную запись (в БД попадает только хэш пароля)
+        success = self.db.create_user(username, passwords.hash_password(password), '')
         if not success:
             return None
         
-        # Генерируем auth_token
-        auth_token = hash(username + password + secrets.token_hex(8))
-        auth_token = abs(auth_token)
-        auth_token = auth_token % (10 ** 10)
+        return sessions.create(username, 'user')
+    
+    async def login_async(self, repo, username: str, password: str) -> Union[str, int]:
+        """
+        Вход для асинхронных маршрутов: то же, что login, но хэш пароля считается
+        в пуле потоков, а не в цикле событий
+        
+        Args:
+            repo: асинхронный репозиторий (AsyncDatabaseRepository)
+            username: логин пользователя
+            password: пароль пользователя
+        
+        Returns:
+            auth_token: str - токен сессии в случае успеха
+            status: int - статус ошибки (1 - пользователь не найден, 2 - неверный пароль)
+        """
+        user_info = await repo.read_user_info(username)
+        if not user_info:
+            return 1  # Пользователь не найден
+        
+        if not await passwords.verify_password_async(password, user_info['password']):
+            return 2  # Неверный пароль
+        
+        if passwords.needs_rehash(user_info['password']):
+            await repo.update_user_info(username, password=await passwords.hash_password_async(password))
+        
+        return sessions.create(username, user_info.get('role'))
+    
+    async def register_async(self, repo, username: str, password: str) -> Optional[str]:
+        """
+        Регистрация для асинхронных маршрутов: то же, что register, но хэш пароля считается
+        в пуле потоков
         
-        return auth_token
\ No newline at end of file
+        Args:
+            repo: асинхронный репозиторий (AsyncDatabaseRepository)
+            username: логин пользователя
+            password: пароль пользователя
+        
+        Returns:
+            auth_token: str - токен сессии в случае успеха
+            None - если учетная запись уже существует
+        """
+        if await repo.user_exist(username):
+            return None  # Учетная запись уже существует
+        
+        password_hash = await passwords.hash_password_async(password)
+        if not await repo.create_user(username, password_hash, ''):
+            return None
+        
+        return sessions.create(username, 'user')
+    
+    def logout(self, token: Optional[str]) -> bool:
+        """
+        Закрывает сессию
+        
+        Args:
+            token: токен сессии
+        
+        Returns:
+            success: bool - была ли сессия открыта
+        """
+        return sessions.revoke(token)
\ No newline at end of file
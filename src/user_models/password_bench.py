@@ -0,0 +1,81 @@
+"""
+Замер скорости проверки паролей с текущими параметрами KDF
+
+Запуск (из каталога src):
+    python -m user_models.password_bench              # 200 входов
+    python -m user_models.password_bench --logins 500
+
+Печатает число входов в секунду на одном ядре, пропускную способность пула хэширования
+при пачке одновременных входов и задержку цикла событий во время пачки: при проверке в пуле
+цикл продолжает обслуживать запросы, при проверке в цикле он стоит всё время хэширования.
+"""
+from user_models import passwords
+
+import asyncio
+import sys
+import time
+from typing import Dict, List
+
+# Шаг, с которым фоновая задача измеряет задержку цикла событий
+TICK = 0.005
+
+
+async def _max_loop_lag(stop: asyncio.Event) -> float:
+    lag = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lag = max(lag, time.perf_counter() - started - TICK)
+    return lag
+
+
+async def _burst(stored: str, logins: int, offload: bool) -> Dict[str, float]:
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_max_loop_lag(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    if offload:
+        results = await asyncio.gather(*(
+            passwords.verify_password_async('benchmark', stored) for _ in range(logins)
+        ))
+    else:
+        results = [passwords.verify_password('benchmark', stored) for _ in range(logins)]
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lag = await ticker
+    assert all(results)
+    return {'per_second': logins / elapsed, 'loop_lag_ms': lag * 1000}
+
+
+def run(logins: int) -> Dict[str, Dict[str, float]]:
+    """Замер: один поток, пачка входов в пуле и та же пачка в цикле событий"""
+    stored = passwords.hash_password('benchmark')
+    single = max(1, logins // 10)
+    started = time.perf_counter()
+    for _ in range(single):
+        passwords.verify_password('benchmark', stored)
+    per_core = single / (time.perf_counter() - started)
+    return {
+        'single_thread': {'per_second': per_core},
+        'pool': asyncio.run(_burst(stored, logins, offload=True)),
+        'event_loop': asyncio.run(_burst(stored, logins, offload=False)),
+    }
+
+
+def main(argv: List[str]) -> int:
+    logins = int(argv[argv.index('--logins') + 1]) if '--logins' in argv else 200
+    scheme = passwords.PASSWORD_HASH
+    params = (f"n={passwords.PASSWORD_SCRYPT_N}, r={passwords.PASSWORD_SCRYPT_R}, p={passwords.PASSWORD_SCRYPT_P}"
+              if scheme == 'scrypt' else f"iterations={passwords.PASSWORD_PBKDF2_ITERATIONS}")
+    result = run(logins)
+    print(f"{scheme} ({params}), потоков пула: {passwords.PASSWORD_WORKERS}, входов в пачке: {logins}")
+    print(f"  одно ядро:          {result['single_thread']['per_second']:8.1f} входов/с")
+    print(f"  пачка в пуле:       {result['pool']['per_second']:8.1f} входов/с, "
+          f"задержка цикла событий до {result['pool']['loop_lag_ms']:.1f} мс")
+    print(f"  пачка в цикле:      {result['event_loop']['per_second']:8.1f} входов/с, "
+          f"задержка цикла событий до {result['event_loop']['loop_lag_ms']:.1f} мс")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
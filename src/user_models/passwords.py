@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Хэширование паролей медленной функцией (KDF) из hashlib: scrypt или PBKDF2-HMAC-SHA256.
+# Хэш хранится в users.password вместе с алгоритмом, параметрами и солью:
+#   scrypt$<n>$<r>$<p>$<соль>$<хэш>
+#   pbkdf2_sha256$<итерации>$<соль>$<хэш>
+# (соль и хэш - base64 без "="). Пароли, сохранённые до хэширования, хранятся как есть;
+# они проверяются прямым сравнением и перехэшируются при следующем входе, как и хэши
+# с параметрами, отличными от текущих.
+PASSWORD_HASH = os.getenv("PASSWORD_HASH", "scrypt")
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", str(2 ** 14)))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "600000"))
+# Потоки пула, в котором считаются хэши: hashlib отпускает GIL на время scrypt и PBKDF2,
+# поэтому потоки занимают ядра параллельно, не останавливая цикл событий
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(os.cpu_count() or 1)))
+
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # Памяти нужно 128 * r * n байт на каждый из p потоков вычисления; запас сверху
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n * p + 1024 * 1024, dklen=HASH_BYTES)
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, dklen=HASH_BYTES)
+
+
+def hash_password(password: str) -> str:
+    """Хэш пароля с текущими алгоритмом и параметрами (блокирует поток на время KDF)"""
+    salt = secrets.token_bytes(SALT_BYTES)
+    if PASSWORD_HASH == 'pbkdf2_sha256':
+        digest = _pbkdf2(password, salt, PASSWORD_PBKDF2_ITERATIONS)
+        return f"pbkdf2_sha256${PASSWORD_PBKDF2_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+    if PASSWORD_HASH != 'scrypt':
+        raise ValueError(f"Unknown PASSWORD_HASH: {PASSWORD_HASH}")
+    digest = _scrypt(password, salt, PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R, PASSWORD_SCRYPT_P)
+    return (f"scrypt${PASSWORD_SCRYPT_N}${PASSWORD_SCRYPT_R}${PASSWORD_SCRYPT_P}"
+            f"${_b64(salt)}${_b64(digest)}")
+
+
+def is_hashed(stored: Optional[str]) -> bool:
+    """Сохранён ли пароль в виде хэша (а не как есть)"""
+    return bool(stored) and stored.split('$', 1)[0] in ('scrypt', 'pbkdf2_sha256') and stored.count('$') >= 3
+
+
+def verify_password(password: str, stored: Optional[str]) -> bool:
+    """Совпадает ли пароль с сохранённым значением (блокирует поток на время KDF)"""
+    if not stored:
+        return False
+    if not is_hashed(stored):
+        # Пароль, сохранённый до хэширования
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    try:
+        parts = stored.split('$')
+        if parts[0] == 'scrypt':
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            salt, expected = _unb64(parts[4]), _unb64(parts[5])
+            digest = _scrypt(password, salt, n, r, p)
+        else:
+            iterations = int(parts[1])
+            salt, expected = _unb64(parts[2]), _unb64(parts[3])
+            digest = _pbkdf2(password, salt, iterations)
+    except (IndexError, ValueError) as e:
+        print(f"Error verifying password hash: {e}")
+        return False
+    return hmac.compare_digest(digest, expected)
+
+
+def needs_rehash(stored: Optional[str]) -> bool:
+    """Нужно ли перехэшировать пароль (сохранён как есть или с другими алгоритмом и параметрами)"""
+    if not is_hashed(stored):
+        return True
+    parts = stored.split('$')
+    if PASSWORD_HASH == 'pbkdf2_sha256':
+        return parts[0] != 'pbkdf2_sha256' or parts[1] != str(PASSWORD_PBKDF2_ITERATIONS)
+    return parts[0] != 'scrypt' or parts[1:4] != [
+        str(PASSWORD_SCRYPT_N), str(PASSWORD_SCRYPT_R), str(PASSWORD_SCRYPT_P)
+    ]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password-hash")
+        return _executor
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password в пуле потоков хэширования"""
+    return await asyncio.wrap_future(_get_executor().submit(hash_password, password))
+
+
+async def verify_password_async(password: str, stored: Optional[str]) -> bool:
+    """verify_password в пуле потоков хэширования"""
+    if not is_hashed(stored):
+        # Прямое сравнение не нагружает процессор
+        return verify_password(password, stored)
+    return await asyncio.wrap_future(_get_executor().submit(verify_password, password, stored))
@@ -0,0 +1,212 @@
+from abc import ABC, abstractmethod
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Сессии пользователей: случайный непрозрачный токен -> логин и роль.
+# Токен выдаётся при входе и регистрации, передаётся в cookie SESSION_COOKIE (HttpOnly) или
+# в заголовке "Authorization: Bearer <токен>" и проверяется без запросов к БД.
+# Хранилище по умолчанию живёт в памяти процесса: при нескольких воркерах подключается общее
+# хранилище через set_backend, иначе сессия известна только воркеру, который её выдал.
+SESSION_COOKIE = "pt_session"
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(7 * 24 * 3600)))
+SESSION_STORE_SIZE = int(os.getenv("SESSION_STORE_SIZE", "100000"))
+SESSION_COOKIE_SECURE = os.getenv("SESSION_COOKIE_SECURE", "false").strip().lower() in ("1", "true", "yes", "on")
+# Байт случайности в токене (в base64url токен в 4/3 раза длиннее)
+TOKEN_BYTES = 32
+
+
+class SessionInfo(NamedTuple):
+    """Пользователь сессии"""
+    login: str
+    role: str
+
+
+class SessionBackend(ABC):
+    """
+    Хранилище сессий
+
+    Реализация для общего хранилища нескольких воркеров (например, поверх Redis) подключается
+    через set_backend. Все операции - по ключу, без перебора сессий.
+    """
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[SessionInfo]:
+        """Сессия по токену или None (нет, истекла или отозвана)"""
+
+    @abstractmethod
+    def set(self, token: str, session: SessionInfo, ttl: float) -> None:
+        """Сохранение сессии на ttl секунд"""
+
+    @abstractmethod
+    def delete(self, token: str) -> bool:
+        """Отзыв сессии"""
+
+    @abstractmethod
+    def delete_login(self, login: str) -> int:
+        """Отзыв всех сессий пользователя"""
+
+    @abstractmethod
+    def set_role(self, login: str, role: str) -> int:
+        """Новая роль во всех сессиях пользователя"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Размер хранилища и счётчики"""
+
+
+class LocalSessionBackend(SessionBackend):
+    """Сессии в памяти процесса: LRU с ограничением числа сессий и временем жизни"""
+
+    def __init__(self, max_entries: int = SESSION_STORE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[SessionInfo, float]]" = OrderedDict()
+        self._by_login: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'created': 0, 'revoked': 0, 'expirations': 0, 'evictions': 0}
+
+    def _drop(self, token: str):
+        session, _ = self._entries.pop(token)
+        tokens = self._by_login.get(session.login)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_login[session.login]
+
+    def get(self, token: str) -> Optional[SessionInfo]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            if time.monotonic() >= entry[1]:
+                self._drop(token)
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(token)
+            self._counters['hits'] += 1
+            return entry[0]
+
+    def set(self, token: str, session: SessionInfo, ttl: float) -> None:
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+            self._entries[token] = (session, time.monotonic() + ttl)
+            self._by_login.setdefault(session.login, set()).add(token)
+            self._counters['created'] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._counters['evictions'] += 1
+
+    def delete(self, token: str) -> bool:
+        with self._lock:
+            if token not in self._entries:
+                return False
+            self._drop(token)
+            self._counters['revoked'] += 1
+            return True
+
+    def delete_login(self, login: str) -> int:
+        with self._lock:
+            tokens = list(self._by_login.get(login, ()))
+            for token in tokens:
+                self._drop(token)
+            self._counters['revoked'] += len(tokens)
+            return len(tokens)
+
+    def set_role(self, login: str, role: str) -> int:
+        with self._lock:
+            tokens = self._by_login.get(login, ())
+            for token in tokens:
+                session, expires = self._entries[token]
+                self._entries[token] = (session._replace(role=role), expires)
+            return len(tokens)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, size=len(self._entries), max_size=self.max_entries)
+
+
+_backend: SessionBackend = LocalSessionBackend()
+
+
+def get_backend() -> SessionBackend:
+    """Текущее хранилище сессий"""
+    return _backend
+
+
+def set_backend(backend: SessionBackend) -> None:
+    """Подключение другого хранилища сессий (например, общего для всех воркеров)"""
+    global _backend
+    _backend = backend
+
+
+def create(login: str, role: str) -> str:
+    """Новая сессия пользователя, возвращает её токен"""
+    token = secrets.token_urlsafe(TOKEN_BYTES)
+    _backend.set(token, SessionInfo(login, role or 'user'), SESSION_TTL)
+    return token
+
+
+def resolve(token: Optional[str]) -> Optional[SessionInfo]:
+    """Пользователь по токену сессии или None"""
+    if not token:
+        return None
+    return _backend.get(token)
+
+
+def revoke(token: Optional[str]) -> bool:
+    """Выход: отзыв одной сессии"""
+    if not token:
+        return False
+    return _backend.delete(token)
+
+
+def revoke_user(login: str) -> int:
+    """Отзыв всех сессий пользователя (например, при удалении учётной записи)"""
+    return _backend.delete_login(login)
+
+
+def update_role(login: str, role: str) -> int:
+    """Смена роли пользователя в его открытых сессиях"""
+    return _backend.set_role(login, role)
+
+
+# Изменения ролей и удаление пользователей в БД доходят до сессий только после фиксации транзакции:
+# при откате единицы работы открытые сессии остаются такими же, как строки пользователей в БД
+
+def _pending(session) -> List[Callable[[], None]]:
+    return session.info.setdefault('session_ops', [])
+
+
+def revoke_user_after_commit(session, login: str):
+    """Отзыв всех сессий пользователя после фиксации текущей транзакции"""
+    _pending(session).append(lambda: revoke_user(login))
+
+
+def update_role_after_commit(session, login: str, role: str):
+    """Смена роли в сессиях пользователя после фиксации текущей транзакции"""
+    _pending(session).append(lambda: update_role(login, role))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    for operation in session.info.pop('session_ops', []):
+        operation()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop('session_ops', None)
+
+
+def get_stats() -> Dict[str, int]:
+    """Счётчики хранилища сессий текущего процесса"""
+    return _backend.stats()
@@ -1,5 +1,6 @@
 from typing import Optional, Dict, List
 from database.repository import DatabaseRepository
+from user_models import passwords
 
 
 class UserModel:
@@ -60,8 +61,10 @@ class UserModel:
         password = user_info.get('password')
         email = user_info.get('email')
         
-        # Обновляем информацию о пользователе
-        return self.db.update_user_info(username, password=password, email=email)
+        # Обновляем информацию о пользователе (новый пароль сохраняется хэшем)
+        return self.db.update_user_info(
+            username, password=passwords.hash_password(password) if password else None, email=email
+        )
     
     def delete_user(self, username: str) -> bool:
         """
@@ -10,6 +10,7 @@ from unittest.mock import Mock, patch
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 from user_models.admin_model import AdminModel
+from user_models import passwords
 
 
 class TestAdminModel:
@@ -38,9 +39,9 @@ class TestAdminModel:
         result = admin_model.new_user(user_info)
         assert result is True
         admin_model.db.user_exist.assert_called_once_with("new_user")
-        admin_model.db.create_user.assert_called_once_with(
-            "new_user", "password123", "email@example.com"
-        )
+        username, password_hash, email = admin_model.db.create_user.call_args.args
+        assert (username, email) == ("new_user", "email@example.com")
+        assert passwords.verify_password("password123", password_hash)
 
 
     # ===== метод give_admin_role =====
@@ -79,11 +80,11 @@ class TestAdminModel:
         # Assert
         assert result is True
         admin_model.db.user_exist.assert_called_once_with("existing_user")
-        admin_model.db.update_user_info.assert_called_once_with(
-            "existing_user",
-            password="new_password",
-            email=None
-        )
+        admin_model.db.update_user_info.assert_called_once()
+        call = admin_model.db.update_user_info.call_args
+        assert call.args == ("existing_user",)
+        assert call.kwargs['email'] is None
+        assert passwords.verify_password("new_password", call.kwargs['password'])
     
     def test_m20_edit_non_existing_user_info_by_admin(self, admin_model):
         """
@@ -141,3 +142,23 @@ class TestAdminModel:
         assert result is False
         admin_model.db.user_exist.assert_called_once_with(username)
         admin_model.db.delete_user.assert_not_called()
+
+    # ===== список пользователей для админки =====
+    def test_m74_users_query_filters_and_order(self):
+        """
+        Тест M74: Запрос списка пользователей упорядочен по id (курсор страниц), фильтр по началу
+        логина экранирует символы шаблона LIKE
+        Позитивный тест
+        """
+        from sqlalchemy.dialects import sqlite
+        from database.async_repository import AsyncDatabaseRepository
+
+        query = AsyncDatabaseRepository._users_query('an_%', 'admin')
+        compiled = query.compile(dialect=sqlite.dialect())
+        sql = str(compiled)
+        assert 'ORDER BY users.id' in sql
+        assert "ESCAPE '/'" in sql
+        assert 'an/_/%' in compiled.params.values()
+        assert 'admin' in compiled.params.values()
+
+        assert 'WHERE' not in str(AsyncDatabaseRepository._users_query().compile(dialect=sqlite.dialect()))
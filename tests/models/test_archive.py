@@ -0,0 +1,39 @@
+"""
+Модульные тесты для потоковой отдачи изображений архивом
+"""
+import sys
+import os
+import io
+import asyncio
+import tarfile
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from core import archive
+
+
+class TestArchive:
+    """Тесты для модуля core.archive"""
+
+    def test_m68_tar_stream_skips_missing_files(self, tmp_path):
+        """
+        Тест M68: Файлы отдаются одним tar-архивом по блокам, отсутствующий файл пропускается
+        Позитивный тест
+        """
+        first = tmp_path / 'a.webp'
+        first.write_bytes(b'a' * 700)
+        second = tmp_path / 'b.png'
+        second.write_bytes(b'b' * 512)
+        entries = [('1.webp', str(first)), ('2.png', str(tmp_path / 'missing.png')), ('3.png', str(second))]
+
+        async def collect():
+            return [chunk async for chunk in archive.tar_stream(entries)]
+
+        data = b''.join(asyncio.run(collect()))
+
+        assert len(data) % tarfile.BLOCKSIZE == 0
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            assert tar.getnames() == ['1.webp', '3.png']
+            assert tar.extractfile('1.webp').read() == b'a' * 700
+            assert tar.extractfile('3.png').read() == b'b' * 512
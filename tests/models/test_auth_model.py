@@ -10,6 +10,7 @@ from unittest.mock import Mock, patch
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 from user_models.auth_model import AuthModel
+from user_models import sessions
 
 
 class TestAuthModel:
@@ -37,8 +38,8 @@ class TestAuthModel:
             'role': 'user'
         }
         result = auth_model.login(username, password)
-        assert isinstance(result, int)
-        assert result >= 1000
+        assert isinstance(result, str)
+        assert sessions.resolve(result) == sessions.SessionInfo(username, 'user')
         auth_model.db.user_exist.assert_called_once_with(username)
         auth_model.db.read_user_info.assert_called_once_with(username)
 
@@ -77,3 +78,123 @@ class TestAuthModel:
         assert result >= 0
         auth_model.db.user_exist.assert_called_once_with(username)
         auth_model.db.create_user.assert_called_once_with(username, password, email)
+
+    # ===== сессии =====
+    def test_m78_session_store_ttl_lru_and_revocation(self, auth_model):
+        """
+        Тест M78: Токены сессий случайны, хранилище вытесняет давние сессии и истёкшие по TTL,
+        выход и удаление пользователя отзывают сессии, смена роли видна в открытых сессиях
+        Позитивный тест
+        """
+        backend = sessions.LocalSessionBackend(max_entries=2)
+        previous = sessions.get_backend()
+        sessions.set_backend(backend)
+        try:
+            first = sessions.create('anna', 'user')
+            second = sessions.create('anna', 'user')
+            assert first != second and len(first) >= 40
+            assert sessions.resolve(first).login == 'anna'
+
+            # Переполнение вытесняет сессию, к которой дольше всего не обращались (second)
+            third = sessions.create('boris', 'admin')
+            assert sessions.resolve(second) is None
+            assert sessions.resolve(first) is not None
+            assert backend.stats()['evictions'] == 1
+
+            assert sessions.update_role('anna', 'admin') == 1
+            assert sessions.resolve(first).role == 'admin'
+
+            assert auth_model.logout(first) is True
+            assert sessions.resolve(first) is None
+            assert auth_model.logout(first) is False
+            assert sessions.revoke_user('boris') == 1
+            assert sessions.resolve(third) is None
+
+            backend.set('expired', sessions.SessionInfo('anna', 'user'), ttl=0)
+            assert sessions.resolve('expired') is None
+            assert sessions.resolve(None) is None
+            assert backend.stats()['expirations'] == 1
+        finally:
+            sessions.set_backend(previous)
+
+    # ===== хэширование паролей =====
+    def test_m79_password_hash_and_rehash_on_login(self, auth_model, monkeypatch):
+        """
+        Тест M79: Пароль хранится хэшем KDF с солью, старые пароли и хэши с прежними параметрами
+        перехэшируются при входе, проверка идёт в пуле потоков
+        Позитивный тест
+        """
+        import asyncio
+        from unittest.mock import AsyncMock
+        from user_models import passwords
+
+        monkeypatch.setattr(passwords, 'PASSWORD_SCRYPT_N', 2 ** 10)
+        first = passwords.hash_password('secret')
+        assert first.startswith('scrypt$1024$8$1$')
+        assert first != passwords.hash_password('secret')
+        assert passwords.verify_password('secret', first)
+        assert not passwords.verify_password('Secret', first)
+        assert not passwords.needs_rehash(first)
+        assert passwords.needs_rehash('secret')
+        assert not passwords.verify_password('secret', 'scrypt$broken$')
+
+        monkeypatch.setattr(passwords, 'PASSWORD_HASH', 'pbkdf2_sha256')
+        monkeypatch.setattr(passwords, 'PASSWORD_PBKDF2_ITERATIONS', 1000)
+        assert passwords.needs_rehash(first)
+        assert passwords.verify_password('secret', first)
+
+        repo = Mock()
+        repo.read_user_info = AsyncMock(return_value={'username': 'anna', 'password': first, 'role': 'admin'})
+        repo.update_user_info = AsyncMock(return_value=True)
+        token = asyncio.run(auth_model.login_async(repo, 'anna', 'secret'))
+        assert sessions.resolve(token) == sessions.SessionInfo('anna', 'admin')
+        rehashed = repo.update_user_info.call_args.kwargs['password']
+        assert rehashed.startswith('pbkdf2_sha256$1000$')
+        assert passwords.verify_password('secret', rehashed)
+
+        repo.update_user_info.reset_mock()
+        repo.read_user_info.return_value['password'] = rehashed
+        assert asyncio.run(auth_model.login_async(repo, 'anna', 'wrong')) == 2
+        assert isinstance(asyncio.run(auth_model.login_async(repo, 'anna', 'secret')), str)
+        repo.update_user_info.assert_not_called()
+
+    def test_m82_incomplete_session_backend_is_rejected_on_creation(self, auth_model):
+        """
+        Тест M82: Хранилище сессий без части методов не создаётся
+        Позитивный тест
+        """
+        class GetOnlyBackend(sessions.SessionBackend):
+            def get(self, token):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnlyBackend()
+        assert isinstance(sessions.LocalSessionBackend(), sessions.SessionBackend)
+
+    def test_m87_session_changes_apply_only_after_commit(self, auth_model, monkeypatch):
+        """
+        Тест M87: Смена роли и отзыв сессий пользователя применяются после фиксации транзакции,
+        а при откате отбрасываются
+        Позитивный тест
+        """
+        backend = sessions.LocalSessionBackend()
+        monkeypatch.setattr(sessions, '_backend', backend)
+        token = sessions.create('bob', 'user')
+        db_session = Mock()
+        db_session.info = {}
+
+        # Транзакция откатилась: роль в сессии прежняя
+        sessions.update_role_after_commit(db_session, 'bob', 'admin')
+        assert sessions.resolve(token).role == 'user'
+        sessions._discard_pending(db_session)
+        sessions._apply_pending(db_session)
+        assert sessions.resolve(token).role == 'user'
+
+        # Транзакция зафиксирована: роль меняется, затем сессии отзываются
+        sessions.update_role_after_commit(db_session, 'bob', 'admin')
+        sessions._apply_pending(db_session)
+        assert sessions.resolve(token).role == 'admin'
+        sessions.revoke_user_after_commit(db_session, 'bob')
+        assert sessions.resolve(token) is not None
+        sessions._apply_pending(db_session)
+        assert sessions.resolve(token) is None
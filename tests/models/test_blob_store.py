@@ -0,0 +1,100 @@
+"""
+Модульные тесты для хранилища изображений с адресацией по содержимому
+"""
+import sys
+import os
+from unittest.mock import Mock
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database import blob_store, media
+
+
+class TestBlobStore:
+    """Тесты для модуля database.blob_store"""
+
+    def test_m64_release_removes_file_after_last_reference(self):
+        """
+        Тест M64: Ссылки одного пути снимаются одним UPDATE, файл без ссылок удаляется только после фиксации
+        Позитивный тест
+        """
+        session = Mock()
+        session.info = {}
+        shared = Mock(); shared.scalar.return_value = 1
+        last = Mock(); last.scalar.return_value = 0
+        session.execute.side_effect = [shared, last, Mock()]
+
+        blob_store.release(session, ['blobs/a.png', 'blobs/a.png', 'blobs/b.png', ''])
+
+        # a.png: один UPDATE на две ссылки; b.png: UPDATE и DELETE строки без ссылок
+        assert session.execute.call_count == 3
+        assert list(session.info['blob_store_removals']) == [media.absolute_path('blobs/b.png')]
+
+    def test_m80_removal_keeps_file_referenced_again_by_another_worker(self, tmp_path, monkeypatch):
+        """
+        Тест M80: Файл, на который после снятия последней ссылки сослался place() другого воркера, не удаляется
+        Позитивный тест
+        """
+        monkeypatch.setattr(blob_store, 'run_file_task', lambda task: task())
+        monkeypatch.setattr(blob_store, 'removal_hooks', [])
+        path = tmp_path / 'ab' / ('ab' * 32 + '.png')
+        path.parent.mkdir()
+        path.write_bytes(b'data')
+
+        # Воркер A снимает последнюю ссылку, удаление ждёт фиксации
+        session = Mock()
+        session.info = {}
+        session.execute.return_value.scalar.return_value = 0
+        blob_store.release(session, [str(path)])
+
+        # Воркер B загружает то же содержимое: очередь A ему не видна, файл уже есть на диске
+        upload = tmp_path / '.upload-1.part'
+        upload.write_bytes(b'data')
+        blob_store.place(str(upload), str(path))
+
+        kept = blob_store.removal_stats()['kept']
+        blob_store._apply_pending(session)
+        assert path.exists()
+        assert blob_store.removal_stats()['kept'] == kept + 1
+
+        # Без повторной ссылки файл удаляется
+        blob_store.release(session, [str(path)])
+        blob_store._apply_pending(session)
+        assert not path.exists()
+
+    def test_m85_drain_removes_files_without_holding_queue_lock(self, tmp_path, monkeypatch):
+        """
+        Тест M85: Очередь удаляет файлы без блокировки очереди, путь, который переносит place(), не удаляется
+        Позитивный тест
+        """
+        monkeypatch.setattr(blob_store, 'run_file_task', lambda task: task())
+        hook = Mock()
+        monkeypatch.setattr(blob_store, 'removal_hooks', [hook])
+        stale = tmp_path / 'stale.png'
+        stale.write_bytes(b'old')
+        placing = tmp_path / 'placing.png'
+        placing.write_bytes(b'new')
+
+        real_remove = os.remove
+        lock_held = []
+
+        def remove(path):
+            lock_held.append(blob_store._queued_lock.locked())
+            real_remove(path)
+        monkeypatch.setattr(blob_store.os, 'remove', remove)
+
+        # place() другого потока сейчас работает с placing.png
+        blob_store._busy.add(str(placing))
+        try:
+            kept = blob_store.removal_stats()['kept']
+            blob_store.enqueue_removals([str(stale), str(placing)])
+        finally:
+            blob_store._release(str(placing))
+
+        assert not stale.exists()
+        assert placing.exists()
+        assert lock_held == [False]
+        hook.assert_called_once_with(str(stale))
+        assert blob_store.removal_stats()['kept'] == kept + 1
+        assert not blob_store._busy
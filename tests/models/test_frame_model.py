@@ -51,3 +51,141 @@ class TestFrameModel:
             mock_session.commit.assert_called_once()
 
     # ===== метод edit_frame_info =====
+
+    # ===== метод reorder_frames =====
+    def test_m56_reorder_frames_two_updates(self, frame_model):
+        """
+        Тест M56: Перемещение кадра выполняется двумя UPDATE независимо от числа кадров
+        Позитивный тест
+        """
+        mock_session = Mock()
+        frame_model.Session.return_value = mock_session
+        mock_session.query.return_value.filter.return_value.first.return_value = (2,)
+        mock_session.query.return_value.filter.return_value.scalar.return_value = 2000
+        result = frame_model.reorder_frames(1, 10, 5)
+        assert result is True
+        assert mock_session.execute.call_count == 2
+        mock_session.commit.assert_called_once()
+
+    def test_m57_reorder_frames_same_position(self, frame_model):
+        """
+        Тест M57: Перемещение кадра на его же позицию не изменяет БД
+        Позитивный тест
+        """
+        mock_session = Mock()
+        frame_model.Session.return_value = mock_session
+        mock_session.query.return_value.filter.return_value.first.return_value = (3,)
+        mock_session.query.return_value.filter.return_value.scalar.return_value = 3
+        result = frame_model.reorder_frames(1, 10, 7)
+        assert result is True
+        mock_session.execute.assert_not_called()
+
+    # ===== метод get_project_frames =====
+    def test_m58_get_project_frames_sparse_numbers(self, frame_model):
+        """
+        Тест M58: В режиме ключей с промежутками клиент получает номера 1..N
+        Позитивный тест
+        """
+        mock_session = Mock()
+        frame_model.Session.return_value = mock_session
+        frames = []
+        for frame_id, key in ((7, 1024), (3, 1536), (9, 4096)):
+            frame = Mock(id=frame_id, description='', start_time=0, end_time=1, pic_path='', connected_page=None)
+            frame.number = key
+            frames.append(frame)
+        mock_session.query.return_value.filter.return_value.order_by.return_value.all.return_value = frames
+        with patch('project_data_models.frame_model.ordering.is_sparse', return_value=True):
+            result = frame_model.get_project_frames(1)
+        assert [f['frame_id'] for f in result] == [7, 3, 9]
+        assert [f['number'] for f in result] == [1, 2, 3]
+
+    def test_m59_get_project_frames_derived_times(self, frame_model):
+        """
+        Тест M59: В режиме вычисляемого таймлайна времена кадров - префиксные суммы длительностей
+        Позитивный тест
+        """
+        mock_session = Mock()
+        frame_model.Session.return_value = mock_session
+        frames = []
+        for number, duration in enumerate((5, 0, 7), start=1):
+            frame = Mock(id=number, description='', start_time=0, end_time=0, pic_path='',
+                         connected_page=None, number=number, duration=duration)
+            frames.append(frame)
+        mock_session.query.return_value.filter.return_value.order_by.return_value.all.return_value = frames
+        with patch('project_data_models.frame_model.timeline.is_derived', return_value=True):
+            result = frame_model.get_project_frames(1)
+        assert [(f['start_time'], f['end_time']) for f in result] == [(0, 5), (5, 5), (5, 12)]
+
+    def test_m69_format_project_frames_from_snapshot_rows(self):
+        """
+        Тест M69: Строки снимка проекта приводятся к тому же виду, что и в loadFrames
+        Позитивный тест
+        """
+        rows = [
+            (4, None, 0, 10, 10, 'uploads/a.png', 2, 1),
+            (6, 'Кадр', 10, 15, 5, '', None, 2),
+        ]
+        result = FrameModel.format_project_frames(rows)
+        assert result == [
+            {'frame_id': 4, 'description': '', 'start_time': 0, 'end_time': 10,
+             'pic_path': 'uploads/a.png', 'connected': '2', 'number': 1},
+            {'frame_id': 6, 'description': 'Кадр', 'start_time': 10, 'end_time': 15,
+             'pic_path': '', 'connected': '', 'number': 2},
+        ]
+
+    # ===== метод batch_update_times =====
+    def test_m60_batch_update_times_single_statement(self, frame_model):
+        """
+        Тест M60: Пакет времён проверяется одним SELECT и применяется одним UPDATE, ошибки по кадрам возвращаются
+        Позитивный тест
+        """
+        mock_session = Mock()
+        frame_model.Session.return_value = mock_session
+        mock_session.get_bind.return_value.dialect.name = 'postgresql'
+        mock_session.query.return_value.filter.return_value.all.return_value = [(1, 10), (2, 10)]
+        updates = [
+            {'frame_id': 1, 'start_time': 0, 'end_time': 5},
+            {'frame_id': 2, 'start_time': 5, 'end_time': 9},
+            {'frame_id': 3, 'start_time': 9, 'end_time': 12},
+            {'frame_id': 4, 'start_time': 7, 'end_time': 7},
+        ]
+        result = frame_model.batch_update_times(updates)
+        assert result == {
+            'updated_count': 2,
+            'errors': ["Frame 4: start_time >= end_time", "Frame 3: not found"]
+        }
+        mock_session.query.assert_called_once()
+        assert mock_session.execute.call_count == 1
+        mock_session.commit.assert_called_once()
+
+    def test_m86_update_frame_info_refreshes_derived_timeline(self):
+        """
+        Тест M86: Изменение времён через update_frame_info после фиксации обновляет кэш таймлайна,
+        и в режиме derived времена кадров читаются уже с новой длительностью
+        Позитивный тест
+        """
+        from database import timeline
+        from database.repository import DatabaseRepository
+
+        repository = DatabaseRepository()
+        session = Mock()
+        session.info = {}
+        session.commit.side_effect = lambda: timeline._apply_pending(session)
+        repository.Session = Mock(return_value=session)
+        frame = Mock(project_id=86, start_time=10, end_time=20, duration=10)
+        session.query.return_value.filter.return_value.first.return_value = frame
+
+        # Кэш таймлайна проекта уже загружен
+        timeline.timeline_cache.invalidate(86)
+        timeline.timeline_cache.get(86, lambda: [(1, 10), (2, 10), (3, 5)])
+        loader = Mock(side_effect=AssertionError('кэш не должен перезагружаться'))
+
+        with patch('database.repository.read_cache'):
+            assert repository.update_frame_info(2, start_time=10, end_time=25) is True
+
+        assert frame.duration == 15
+        with patch('database.timeline.load_frame_durations', loader):
+            with patch('database.timeline.TIMELINE_MODE', 'derived'):
+                assert timeline.frame_times(session, 86, 2) == (10, 25)
+                assert timeline.frame_times(session, 86, 3) == (25, 30)
+        timeline.timeline_cache.invalidate(86)
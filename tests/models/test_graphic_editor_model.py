@@ -21,6 +21,21 @@ class TestGraphicEditorModel:
         model = GraphicEditorModel()
         model.db = Mock()
         return model
-    
-    
 
+    # ===== метод upload_pic =====
+    def test_m62_upload_pic_stores_blob(self, graphic_editor_model):
+        """
+        Тест M62: Полученный файл сохраняется в хранилище по содержимому, кадр ссылается на файл хранилища
+        Позитивный тест
+        """
+        received = Mock(tmp_path='uploads/blobs/.upload-1.part', size=4, sha256='ab' * 32)
+        graphic_editor_model.db.store_image.return_value = 'uploads/blobs/ab/' + 'ab' * 32 + '.png'
+        graphic_editor_model.db.change_pic.return_value = True
+
+        with patch('builtins.open', mock_open()) as opened:
+            result = graphic_editor_model.upload_pic(1, received, '.png')
+
+        assert result == 'uploads/blobs/ab/' + 'ab' * 32 + '.png'
+        opened.assert_not_called()
+        graphic_editor_model.db.store_image.assert_called_once_with(received.sha256, 4, '.png')
+        graphic_editor_model.db.change_pic.assert_called_once_with(1, result)
@@ -0,0 +1,39 @@
+"""
+Модульные тесты для HTTP-кэширования изображений
+"""
+import sys
+import os
+import asyncio
+from unittest.mock import Mock
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from core import http_cache
+
+
+class TestHttpCache:
+    """Тесты для модуля core.http_cache"""
+
+    def test_m66_content_etag_and_not_modified(self, tmp_path):
+        """
+        Тест M66: ETag файла хранилища - хэш из имени, совпадающий If-None-Match даёт 304 без тела
+        Позитивный тест
+        """
+        digest = 'ab' * 32
+        path = tmp_path / f'{digest}.png'
+        path.write_bytes(b'\x89PNG\r\n\x1a\n' + b'0' * 100)
+        request = Mock()
+
+        request.headers = {}
+        response = asyncio.run(http_cache.cached_file_response(request, str(path), immutable=True))
+        assert response.status_code == 200
+        assert response.headers['etag'] == f'"{digest}"'
+        assert response.headers['cache-control'] == http_cache.IMMUTABLE
+        assert response.media_type == 'image/png'
+
+        request.headers = {'if-none-match': f'"other", W/"{digest}"'}
+        response = asyncio.run(http_cache.cached_file_response(request, str(path)))
+        assert response.status_code == 304
+        assert response.body == b''
+        assert response.headers['cache-control'] == http_cache.REVALIDATE
@@ -0,0 +1,47 @@
+"""
+Модульные тесты для канонических путей изображений и кэша найденных файлов
+"""
+import sys
+import os
+from unittest.mock import Mock
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database import image_paths, media
+
+
+class TestImagePaths:
+    """Тесты для модулей database.media и database.image_paths"""
+
+    def test_m67_canonical_paths_and_cache_invalidation(self):
+        """
+        Тест M67: Пути приводятся к виду uploads/..., кэш кадра сбрасывается только после фиксации
+        Позитивный тест
+        """
+        inside = os.path.join(media.MEDIA_ROOT, 'uploads', 'a.png')
+        assert media.canonical_path('/uploads/a.png') == 'uploads/a.png'
+        assert media.canonical_path('uploads\\a.png') == 'uploads/a.png'
+        assert media.canonical_path(inside) == 'uploads/a.png'
+        assert media.canonical_path('') == ''
+        assert media.absolute_path('/uploads/a.png') == inside
+        # Путь, выходящий за пределы MEDIA_ROOT, не даёт файла
+        assert media.absolute_path('uploads/../../etc/passwd') == ''
+
+        image_paths.clear()
+        stat = os.stat(__file__)
+        image_paths.put(1, 'thumb', 10, inside, stat, 'image/webp')
+        image_paths.put(2, 'thumb', 10, inside, stat, 'image/webp')
+        assert image_paths.get(1, 'thumb').path == inside
+
+        session = Mock()
+        session.info = {}
+        image_paths.invalidate_after_commit(session, 1)
+        assert image_paths.get(1, 'thumb') is not None
+
+        image_paths._apply_pending(session)
+        assert image_paths.get(1, 'thumb') is None
+        assert image_paths.get(2, 'thumb') is not None
+
+        image_paths.invalidate_project(10)
+        assert image_paths.get(2, 'thumb') is None
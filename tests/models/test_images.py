@@ -0,0 +1,38 @@
+"""
+Модульные тесты для уменьшенных копий изображений кадров
+"""
+import sys
+import os
+import asyncio
+import pytest
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from core import images
+
+
+class TestImages:
+    """Тесты для модуля core.images"""
+
+    def test_m65_build_variants_and_resolve(self, tmp_path):
+        """
+        Тест M65: Копии строятся по большей стороне рядом с оригиналом и отдаются вместо него
+        Позитивный тест
+        """
+        Image = pytest.importorskip("PIL.Image")
+        original = tmp_path / 'abc.png'
+        Image.new('RGBA', (2000, 1000), (10, 20, 30, 128)).save(original)
+
+        images.build_variants(str(original))
+
+        with Image.open(images.variant_path(str(original), 'thumb')) as thumb:
+            assert max(thumb.size) == images.IMAGE_SIZES['thumb']
+            assert thumb.mode == 'RGBA'
+        path, media_type = asyncio.run(images.resolve(str(original), 'preview'))
+        assert path == str(tmp_path / 'abc.preview.webp')
+        assert media_type == 'image/webp'
+        assert asyncio.run(images.resolve(str(original), 'original')) == (str(original), None)
+
+        images.remove_variants(str(original))
+        assert os.listdir(tmp_path) == ['abc.png']
@@ -0,0 +1,27 @@
+"""
+Модульные тесты для проверки индексов под частые запросы
+"""
+import sys
+import os
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database.index_check import find_missing, metadata_indexes
+from database.models import Base
+
+
+class TestIndexCheck:
+    """Тесты для модуля database.index_check"""
+
+    def test_m61_models_cover_hot_queries(self):
+        """
+        Тест M61: Индексы моделей покрывают все частые запросы, а без индекса запрос попадает в отчёт
+        Позитивный тест
+        """
+        indexes = metadata_indexes(Base.metadata)
+        assert find_missing(indexes) == []
+
+        indexes['project'] = [('id',)]
+        missing = find_missing(indexes)
+        assert [(table, columns) for table, columns, _ in missing] == [('project', ('owner',))]
@@ -0,0 +1,73 @@
+"""
+Модульные тесты для пула файловых операций
+"""
+import sys
+import os
+import asyncio
+import time
+from unittest.mock import Mock
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from core import io_pool
+from database import blob_store
+
+
+class TestIOPool:
+    """Тесты для модуля core.io_pool"""
+
+    def test_m75_file_operations_and_deferred_removal(self, tmp_path):
+        """
+        Тест M75: Файловые операции выполняются в пуле и учитываются в метриках; удаление файла
+        после фиксации идёт в пуле и отменяется, если то же содержимое загрузили снова
+        Позитивный тест
+        """
+        io_pool.metrics.reset()
+        path = tmp_path / 'image.png'
+        path.write_bytes(b'data')
+
+        async def scenario():
+            stat = await io_pool.run(os.stat, str(path))
+            exists = await io_pool.run(os.path.exists, str(tmp_path / 'missing.png'))
+            try:
+                await io_pool.run(os.stat, str(tmp_path / 'missing.png'))
+            except FileNotFoundError:
+                return stat.st_size, exists
+            raise AssertionError('FileNotFoundError expected')
+
+        assert asyncio.run(scenario()) == (4, False)
+        metrics = io_pool.get_metrics()
+        assert metrics['submitted'] == 3
+        assert metrics['completed'] == 3
+        assert metrics['failed'] == 1
+        assert metrics['queued'] == 0
+        assert metrics['active'] == 0
+        assert metrics['workers'] == io_pool.IO_WORKERS
+
+        # Удаление после фиксации передаётся пулу (его подключает импорт core.io_pool)
+        tasks = []
+        previous = blob_store.run_file_task
+        blob_store.run_file_task = tasks.append
+        try:
+            session = Mock()
+            session.info = {'blob_store_removals': {str(path): time.time()}}
+            blob_store._apply_pending(session)
+            assert len(tasks) == 1
+            assert path.exists()
+
+            # Повторная загрузка того же содержимого до удаления отменяет его
+            upload = tmp_path / '.upload-1.part'
+            upload.write_bytes(b'data')
+            blob_store.place(str(upload), str(path))
+            assert not upload.exists()
+            tasks[0]()
+            assert path.exists()
+
+            session.info = {'blob_store_removals': {str(path): time.time()}}
+            blob_store._apply_pending(session)
+            tasks[1]()
+            assert not path.exists()
+        finally:
+            blob_store.run_file_task = previous
+        assert previous == io_pool._run_blob_task
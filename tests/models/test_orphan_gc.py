@@ -0,0 +1,65 @@
+"""
+Модульные тесты для сборщика неиспользуемых файлов загрузок
+"""
+import sys
+import os
+import time
+from unittest.mock import Mock
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database import blob_store, media, orphan_gc
+
+
+class TestOrphanGC:
+    """Тесты для модуля database.orphan_gc"""
+
+    def test_m76_collect_queues_unreferenced_files(self, tmp_path, monkeypatch):
+        """
+        Тест M76: Сборщик удаляет старые файлы без ссылок и копии удалённых изображений, оставляя
+        используемые, новые и снова загруженные файлы; очередь удаляет файлы пачками
+        Позитивный тест
+        """
+        monkeypatch.setattr(media, 'MEDIA_ROOT', str(tmp_path))
+        monkeypatch.setattr(blob_store, 'REMOVAL_BATCH_SIZE', 2)
+        tasks = []
+        monkeypatch.setattr(blob_store, 'run_file_task', tasks.append)
+        monkeypatch.setattr(blob_store, 'removal_hooks', [])
+        uploads = tmp_path / 'uploads'
+        (uploads / 'blobs' / 'ab').mkdir(parents=True)
+        old = time.time() - 2 * orphan_gc.ORPHAN_GC_GRACE
+        files = {
+            'used': uploads / 'blobs' / 'ab' / 'abc.png',
+            'used_thumb': uploads / 'blobs' / 'ab' / 'abc.thumb.webp',
+            'legacy': uploads / 'frame_1.jpg',
+            'orphan': uploads / 'blobs' / 'ab' / 'abd.png',
+            'orphan_thumb': uploads / 'blobs' / 'ab' / 'abd.thumb.webp',
+            'stale_part': uploads / 'blobs' / '.upload-x.part',
+            'reused': uploads / 'blobs' / 'ab' / 'abe.png',
+            'fresh': uploads / 'new.png',
+        }
+        for name, path in files.items():
+            path.write_bytes(b'data')
+            if name != 'fresh':
+                os.utime(path, (old, old))
+
+        session = Mock()
+        session.execute.return_value = [('uploads/blobs/ab/abc.png',), ('/uploads/frame_1.jpg',)]
+        result = orphan_gc.collect(session)
+        assert result == {'scanned': 8, 'orphans': 4, 'queued': 4}
+        # Одна задача разбирает всю очередь
+        assert len(tasks) == 1
+
+        # Содержимое снова загрузили до удаления - файл остаётся
+        upload = uploads / 'blobs' / '.upload-y.part'
+        upload.write_bytes(b'data')
+        blob_store.place(str(upload), 'uploads/blobs/ab/abe.png')
+
+        stats = blob_store.removal_stats()
+        tasks[0]()
+        remaining = {name for name, path in files.items() if path.exists()}
+        assert remaining == {'used', 'used_thumb', 'legacy', 'reused', 'fresh'}
+        after = blob_store.removal_stats()
+        assert after['pending'] == 0
+        assert after['removed'] - stats['removed'] == 3
@@ -42,3 +42,32 @@ class TestPageModel:
         page_model.db.read_page_info.assert_called_once_with(page_id)
 
     # ===== метод edit_page =====
+    def test_m71_edit_page_single_update(self, page_model):
+        """
+        Тест M71: Текст и номер страницы меняются одним вызовом (одной транзакцией)
+        Позитивный тест
+        """
+        page_model.db.update_page.return_value = True
+        result = page_model.edit_page(1, {'text': 'Новый текст', 'number': 2})
+        assert result is True
+        page_model.db.update_page.assert_called_once_with(1, text='Новый текст', number=2)
+        page_model.db.update_page_text.assert_not_called()
+        page_model.db.update_page_number.assert_not_called()
+
+    def test_m72_apply_text_edits(self):
+        """
+        Тест M72: Правки с позициями UTF-16 применяются к исходному тексту, неподходящие отклоняются
+        Позитивный тест
+        """
+        from database import text_patch
+
+        text = 'Сцена 🎬 один'
+        # 🎬 занимает две единицы UTF-16, как в браузере
+        assert text_patch.utf16_length(text) == 13
+        assert text_patch.apply_edits(text, [(0, 5, 'Кадр'), (9, 13, 'два')]) == 'Кадр 🎬 два'
+        assert text_patch.apply_edits(text, []) == text
+        assert text_patch.apply_edits('', [(0, 0, 'a')]) == 'a'
+
+        for edits in ([(0, 14, '')], [(5, 8, ''), (6, 7, '')], [(6, 7, '')]):
+            with pytest.raises(text_patch.PatchError):
+                text_patch.apply_edits(text, edits)
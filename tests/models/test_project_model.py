@@ -70,22 +70,15 @@ class TestProjectModel:
         """Тест: Успешное удаление всех страниц проекта"""
         # Arrange
         project_id = 1
-        mock_session = Mock()
-        mock_page1 = Mock()
-        mock_page1.id = 1
-        mock_page2 = Mock()
-        mock_page2.id = 2
-        
-        project_model.Session.return_value = mock_session
-        mock_session.query.return_value.filter.return_value.all.return_value = [mock_page1, mock_page2]
-        project_model.db.delete_page.return_value = True
+        project_model.db.delete_project_pages.return_value = 2
         
         # Act
         result = project_model.delete_script(project_id)
         
         # Assert
         assert result is True
-        assert project_model.db.delete_page.call_count == 2
+        project_model.db.delete_project_pages.assert_called_once_with(project_id)
+        project_model.db.delete_page.assert_not_called()
     
     # ===== метод delete_frames =====
     
@@ -93,22 +86,58 @@ class TestProjectModel:
         """Тест: Успешное удаление всех кадров проекта"""
         # Arrange
         project_id = 1
-        mock_session = Mock()
-        mock_frame1 = Mock()
-        mock_frame1.id = 1
-        mock_frame2 = Mock()
-        mock_frame2.id = 2
-        
-        project_model.Session.return_value = mock_session
-        mock_session.query.return_value.filter.return_value.all.return_value = [mock_frame1, mock_frame2]
-        project_model.db.delete_frame.return_value = True
+        project_model.db.delete_project_frames.return_value = 2
         
         # Act
         result = project_model.delete_frames(project_id)
         
         # Assert
         assert result is True
-        assert project_model.db.delete_frame.call_count == 2
+        project_model.db.delete_project_frames.assert_called_once_with(project_id)
+        project_model.db.delete_frame.assert_not_called()
+    
+    def test_m77_bulk_delete_releases_images_in_one_transaction(self):
+        """
+        Тест M77: Кадры проекта удаляются одним DELETE, ссылки на изображения снимаются,
+        а кэши сбрасываются в той же транзакции
+        Позитивный тест
+        """
+        from database.repository import DatabaseRepository
+
+        repository = DatabaseRepository()
+        session = Mock()
+        session.info = {}
+        repository.Session = Mock(return_value=session)
+        frames_query = session.query.return_value.filter.return_value
+        frames_query.all.return_value = [('uploads/blobs/a.png',), ('',)]
+        frames_query.delete.return_value = 2
+
+        with patch('database.repository.blob_store.release') as release:
+            assert repository.delete_project_frames(7) == 2
+        release.assert_called_once_with(session, ['uploads/blobs/a.png', ''])
+        frames_query.delete.assert_called_once_with(synchronize_session=False)
+        session.commit.assert_called_once()
+        assert 'read_cache_ops' in session.info
+
+        # Ошибка фиксации: транзакция откатывается, файлы в очередь удаления не попадают
+        from database import blob_store, media
+        session = Mock()
+        session.info = {}
+        repository.Session = Mock(return_value=session)
+        frames_query = session.query.return_value.filter.return_value
+        frames_query.all.return_value = [('uploads/blobs/a.png',)]
+        frames_query.delete.return_value = 1
+        # Последняя ссылка на файл снимается настоящим release
+        session.execute.return_value.scalar.return_value = 0
+        session.commit.side_effect = Exception('db down')
+        session.rollback.side_effect = lambda: blob_store._discard_pending(session)
+        pending = blob_store.removal_stats()['pending']
+
+        assert repository.delete_project_frames(7) == -1
+        session.rollback.assert_called_once()
+        assert 'blob_store_removals' not in session.info
+        assert media.absolute_path('uploads/blobs/a.png') not in blob_store._queued
+        assert blob_store.removal_stats()['pending'] == pending
     
     # ===== метод connect_fp =====
     
@@ -0,0 +1,108 @@
+"""
+Модульные тесты для кэша чтения проектов, кадров и страниц
+"""
+import sys
+import os
+import pytest
+from unittest.mock import Mock
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from database import read_cache
+
+
+class TestReadCache:
+    """Тесты для модуля database.read_cache"""
+
+    def test_m70_lru_tags_and_invalidation_after_commit(self):
+        """
+        Тест M70: Кэш вытесняет старые записи, сбрасывает кадры проекта по тегу после фиксации
+        и не сохраняет значения, прочитанные до сброса
+        Позитивный тест
+        """
+        backend = read_cache.LocalLRUBackend(max_entries=3, ttl=60)
+        previous = read_cache.get_backend()
+        read_cache.set_backend(backend)
+        try:
+            session = Mock()
+            session.info = {}
+
+            value, version = read_cache.lookup(session, read_cache.frame_key(1))
+            assert value is None
+            read_cache.store(read_cache.frame_key(1), {'frame_id': 1, 'project_id': 10}, version)
+            read_cache.store(read_cache.frame_key(2), {'frame_id': 2, 'project_id': 10}, version)
+            read_cache.store(read_cache.page_key(5), {'page_id': 5, 'project_id': 10}, version)
+
+            cached, _ = read_cache.lookup(session, read_cache.frame_key(1))
+            assert cached == {'frame_id': 1, 'project_id': 10}
+            # Вызывающий получает копию и не портит запись кэша
+            cached['frame_id'] = 99
+            assert read_cache.lookup(session, read_cache.frame_key(1))[0]['frame_id'] == 1
+
+            # Переполнение вытесняет давно не запрошенную запись (frame:2)
+            read_cache.store(read_cache.project_key(10), {'project_id': 10}, backend.version())
+            assert backend.get(read_cache.frame_key(2)) is None
+            assert backend.stats()['evictions'] == 1
+
+            # Сброс ждёт фиксации; до неё чтения транзакции идут мимо кэша
+            read_cache.invalidate_frames_after_commit(session, 10)
+            assert read_cache.lookup(session, read_cache.frame_key(1)) == (None, None)
+            assert backend.get(read_cache.frame_key(1)) is not None
+
+            read_cache._apply_pending(session)
+            assert backend.get(read_cache.frame_key(1)) is None
+            assert backend.get(read_cache.page_key(5)) is not None
+            assert backend.get(read_cache.project_key(10)) is not None
+
+            # Значение, прочитанное до сброса, не сохраняется
+            _, stale_version = read_cache.lookup(session, read_cache.frame_key(1))
+            backend.invalidate([read_cache.frame_key(3)])
+            read_cache.store(read_cache.frame_key(1), {'frame_id': 1, 'project_id': 10}, stale_version)
+            assert backend.get(read_cache.frame_key(1)) is None
+
+            stats = read_cache.get_stats()
+            assert stats['hits'] >= 2
+            assert stats['misses'] >= 1
+        finally:
+            read_cache.set_backend(previous)
+
+    def test_m81_incomplete_backend_is_rejected_on_creation(self):
+        """
+        Тест M81: Бэкенд кэша без части методов не создаётся
+        Позитивный тест
+        """
+        class GetOnlyBackend(read_cache.CacheBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnlyBackend()
+        assert isinstance(read_cache.LocalLRUBackend(), read_cache.CacheBackend)
+
+    def test_m83_content_writes_bump_project_updated_at_once(self):
+        """
+        Тест M83: Изменения кадров и страниц отмечают проекты, перед фиксацией updated_at
+        обновляется одним UPDATE; при откате отметки снимаются
+        Позитивный тест
+        """
+        from database import project_activity
+
+        session = Mock()
+        session.info = {}
+        read_cache.invalidate_frames_after_commit(session, 10)
+        read_cache.invalidate_pages_after_commit(session, 10)
+        read_cache.invalidate_page_after_commit(session, 5)
+        assert session.info['touched_projects'] == {10}
+        assert session.info['touched_pages'] == {5}
+
+        project_activity._update_touched(session)
+        session.execute.assert_called_once()
+        assert 'touched_projects' not in session.info
+        project_activity._update_touched(session)
+        session.execute.assert_called_once()
+
+        read_cache.invalidate_frames_after_commit(session, 11)
+        project_activity._discard_touched(session)
+        project_activity._update_touched(session)
+        session.execute.assert_called_once()
@@ -0,0 +1,59 @@
+"""
+Модульные тесты для полнотекстового поиска по проекту
+"""
+import sys
+import os
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from database import search
+from database.models import Page
+
+
+class TestSearch:
+    """Тесты для модуля database.search"""
+
+    def test_m73_inverted_index_ranking_and_snippets(self):
+        """
+        Тест M73: Индекс в памяти находит документы со всеми словами запроса (по началу слова),
+        ранжирует их и выделяет найденные слова; запрос PostgreSQL использует выражение GIN-индекса
+        Позитивный тест
+        """
+        index = search.build_index(
+            pages=[
+                (1, 1, '<p>ИНТ. КВАРТИРА — НОЧЬ</p><p>Анна входит в квартиру&nbsp;и включает свет.</p>'),
+                (2, 2, 'Улица. Дождь. Анна бежит к машине.'),
+                (3, 3, None),
+            ],
+            frames=[(7, 1, 'Анна у окна, дождь, дождь')],
+        )
+        assert len(index) == 4
+
+        hits = index.search('анна дожд')
+        assert [(hit['kind'], hit['id']) for hit in hits] == [('frame', 7), ('page', 2)]
+        assert hits[0]['rank'] > hits[1]['rank']
+        assert hits[0]['snippet'] == '<b>Анна</b> у окна, <b>дождь</b>, <b>дождь</b>'
+
+        page_hits = index.search('квартир', kinds=('page',))
+        assert [hit['id'] for hit in page_hits] == [1]
+        # Теги разметки в фрагмент не попадают
+        assert '<p>' not in page_hits[0]['snippet']
+        assert '<b>КВАРТИРА</b>' in page_hits[0]['snippet']
+
+        assert index.search('анна', limit=1)[0]['id'] == 7
+        assert index.search('nbsp') == []
+        assert index.search('нет такого') == []
+        assert index.search('   ') == []
+
+        index_sql = str(CreateIndex(next(
+            index for index in Page.__table__.indexes if index.name == 'ix_page_text_search'
+        )).compile(dialect=postgresql.dialect()))
+        document_sql = str(search.document(Page.text).compile(dialect=postgresql.dialect()))
+        # В DDL индекса столбец пишется без имени таблицы
+        assert document_sql.replace('page.', '') in index_sql
+        query_sql = str(search.postgres_query(1, 'анна', 10).compile(dialect=postgresql.dialect()))
+        assert document_sql in query_sql
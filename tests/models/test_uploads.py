@@ -0,0 +1,107 @@
+"""
+Модульные тесты для потокового сохранения загрузок
+"""
+import sys
+import os
+import asyncio
+import hashlib
+import pytest
+
+# Добавляем путь к src в PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from core import uploads
+
+
+BOUNDARY = 'plot-twister-test'
+
+
+def form_body(file_data: bytes, content_type: str = 'image/png', frame_id: str = '7') -> bytes:
+    """Тело multipart/form-data с полем frame_id и файлом picture"""
+    return (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="frame_id"\r\n\r\n{frame_id}\r\n'
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="picture"; filename="a.png"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode() + file_data + f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+class FakeRequest:
+    """Запрос, тело которого читается блоками через stream(), как у starlette"""
+
+    def __init__(self, body: bytes, chunk: int = 5, content_length: bool = True):
+        self.headers = {'content-type': f'multipart/form-data; boundary={BOUNDARY}'}
+        if content_length:
+            self.headers['content-length'] = str(len(body))
+        self.body = body
+        self.chunk = chunk
+        self.read = 0
+
+    async def stream(self):
+        for i in range(0, len(self.body), self.chunk):
+            self.read += len(self.body[i:i + self.chunk])
+            yield self.body[i:i + self.chunk]
+
+
+class TestUploads:
+    """Тесты для модуля core.uploads"""
+
+    def test_m63_receive_form_streams_body_and_enforces_limit(self, tmp_path, monkeypatch):
+        """
+        Тест M63: Файл разбирается из тела запроса и пишется блоками, превышение лимита
+        прерывает приём и не оставляет файлов
+        Позитивный тест
+        """
+        monkeypatch.setattr(uploads, 'UPLOAD_CHUNK_SIZE', 4)
+        data = b'0123456789'
+
+        form = asyncio.run(uploads.receive_form(FakeRequest(form_body(data)), 'picture', str(tmp_path),
+                                                max_size=10, allowed_types=uploads.IMAGE_TYPES))
+
+        assert form.file.size == 10
+        assert form.file.sha256 == hashlib.sha256(data).hexdigest()
+        assert open(form.file.tmp_path, 'rb').read() == data
+        assert form.fields == {'frame_id': '7'}
+        assert (form.filename, form.content_type) == ('a.png', 'image/png')
+
+        # Без Content-Length приём прерывается на первом блоке сверх лимита, тело не дочитывается
+        monkeypatch.setattr(uploads, 'FORM_OVERHEAD', 1024)
+        request = FakeRequest(form_body(b'x' * 5000), content_length=False)
+        with pytest.raises(uploads.UploadTooLargeError):
+            asyncio.run(uploads.receive_form(request, 'picture', str(tmp_path), max_size=10))
+        assert request.read < len(request.body)
+
+        # Недопустимый тип отклоняется до записи файла
+        with pytest.raises(uploads.InvalidUploadError):
+            asyncio.run(uploads.receive_form(FakeRequest(form_body(data, 'text/html')), 'picture',
+                                             str(tmp_path), max_size=10, allowed_types=uploads.IMAGE_TYPES))
+        with pytest.raises(uploads.InvalidUploadError):
+            asyncio.run(uploads.receive_form(FakeRequest(form_body(data)[:-20]), 'picture', str(tmp_path)))
+        assert os.listdir(tmp_path) == [os.path.basename(form.file.tmp_path)]
+
+    def test_m84_place_upload_moves_file_in_io_pool(self, tmp_path, monkeypatch):
+        """
+        Тест M84: Полученный файл переносится в хранилище задачей пула файловых операций,
+        при ошибке переноса временный файл удаляется
+        Позитивный тест
+        """
+        from core import io_pool
+        from database import blob_store
+
+        tmp = tmp_path / '.upload-1.part'
+        tmp.write_bytes(b'data')
+        target = tmp_path / 'ab' / ('ab' * 32 + '.png')
+        received = uploads.ReceivedUpload(str(tmp), 4, 'ab' * 32)
+        submitted = io_pool.get_metrics()['submitted']
+
+        asyncio.run(uploads.place_upload(received, str(target)))
+        assert target.read_bytes() == b'data'
+        assert not tmp.exists()
+        assert io_pool.get_metrics()['submitted'] > submitted
+
+        def fail(tmp_path, path):
+            raise OSError('disk full')
+        monkeypatch.setattr(blob_store, 'place', fail)
+        tmp.write_bytes(b'data')
+        with pytest.raises(OSError):
+            asyncio.run(uploads.place_upload(received, str(target)))
+        assert not tmp.exists()
@@ -10,6 +10,7 @@ from unittest.mock import Mock, MagicMock
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
 from user_models.user_model import UserModel
+from user_models import passwords
 
 
 class TestUserModel:
@@ -67,11 +68,11 @@ class TestUserModel:
         user_model.db.update_user_info.return_value = True
         result = user_model.edit_user_info(user_info)
         assert result is True
-        user_model.db.update_user_info.assert_called_once_with(
-            "existing_user",
-            password="new_password",
-            email="new_email@example.com"
-        )
+        user_model.db.update_user_info.assert_called_once()
+        call = user_model.db.update_user_info.call_args
+        assert call.args == ("existing_user",)
+        assert call.kwargs['email'] == "new_email@example.com"
+        assert passwords.verify_password("new_password", call.kwargs['password'])
 
     # ===== метод delete_user =====
     def test_m4_delete_existing_user(self, user_model):